@@ -0,0 +1,454 @@
+"""Command-line interface for scripted and pipeline use."""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+from core.batch_journal import (BatchJournal, find_incomplete_journals, new_journal_path,
+                                read_journal)
+from core.batch_planner import BatchPlanner
+from core.batch_runner import BatchRunner, make_operation
+from core.encode_options import EncodeOptions, parse_size
+from core.image_processor import ImageProcessor
+from core.metadata_export import FORMATS, export_metadata
+from core.metadata_handler import MetadataHandler
+from core.qos import PROFILES as QOS_PROFILES, QosController, QosProfile
+from core.sharding import ShardManifest, merge_manifests, parse_shard, select_shard
+from core.verify import MODES as VERIFY_MODES, Verifier
+from utils.helpers import format_duration, is_image_file, iter_image_files
+
+# Seconds between progress lines for batch commands
+PROGRESS_INTERVAL = 0.5
+
+
+def _open_source(path):
+    """Return a path, or the binary stdin stream for '-'."""
+    return sys.stdin.buffer if path == '-' else path
+
+
+def _open_output(source_arg, output_arg):
+    """
+    Resolve where a result goes.
+    
+    Reading from stdin writes to stdout unless -o is given; a file argument
+    without -o is rewritten in place.
+    """
+    if output_arg == '-' or (output_arg is None and source_arg == '-'):
+        return sys.stdout.buffer
+    return output_arg
+
+
+def _encode_options(args):
+    """Build EncodeOptions from the encoding arguments."""
+    return EncodeOptions(quality=args.quality, optimize=args.optimize, progressive=args.progressive,
+                         png_compress_level=args.png_level, target_size=args.target_size)
+
+
+def cmd_strip(args):
+    """Remove all metadata."""
+    output = _open_output(args.input, args.output)
+    MetadataHandler(encode_options=_encode_options(args)).remove_all_metadata(
+        _open_source(args.input), output=output)
+    return 0
+
+
+def cmd_resize(args):
+    """Resize to fit within the given dimensions."""
+    output = _open_output(args.input, args.output)
+    ImageProcessor(encode_options=_encode_options(args)).resize_image(
+        _open_source(args.input), args.width, args.height,
+        maintain_aspect=not args.exact, output=output)
+    return 0
+
+
+def cmd_crop(args):
+    """Center-crop to the given dimensions."""
+    output = _open_output(args.input, args.output)
+    ImageProcessor(encode_options=_encode_options(args)).crop_center(
+        _open_source(args.input), args.width, args.height, output=output)
+    return 0
+
+
+def cmd_info(args):
+    """Print metadata as JSON."""
+    metadata = MetadataHandler().get_all_metadata(_open_source(args.input))
+    json.dump(metadata, sys.stdout, indent=2, default=str)
+    sys.stdout.write('\n')
+    return 0
+
+
+def cmd_export(args):
+    """Write a metadata report for many files as JSONL or CSV."""
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.output.lower().endswith(".csv") else "jsonl"
+    paths = iter_image_files(args.paths, recursive=not args.no_recursive)
+    last_update = [0.0]
+
+    def progress(records, errors):
+        now = time.perf_counter()
+        if now - last_update[0] >= PROGRESS_INTERVAL:
+            last_update[0] = now
+            sys.stderr.write(f"\rExported {records} files, {errors} unreadable  ")
+            sys.stderr.flush()
+
+    start = time.perf_counter()
+    if args.output == '-':
+        stats = export_metadata(paths, sys.stdout, fmt, workers=args.workers,
+                                ordered=not args.unordered, processes=args.processes,
+                                progress=progress)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as stream:
+            stats = export_metadata(paths, stream, fmt, workers=args.workers,
+                                    ordered=not args.unordered, processes=args.processes,
+                                    progress=progress)
+    print(f"\rExported {stats['records']} files, {stats['errors']} unreadable, "
+          f"in {format_duration(time.perf_counter() - start)}", file=sys.stderr)
+    return 0
+
+
+def _expand_paths(paths):
+    """Expand directories into the image files directly inside them; return absolute paths."""
+    result = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            result.extend(sorted(f for f in path.iterdir() if f.is_file() and is_image_file(str(f))))
+        else:
+            result.append(path)
+    return [str(path.resolve()) for path in result]
+
+
+def _qos_controller(args):
+    """Build a QosController from --qos, --limit-rate and --limit-files, or None without them."""
+    if not (args.qos or args.limit_rate or args.limit_files):
+        return None
+    base = QOS_PROFILES[args.qos or "foreground"]
+    profile = QosProfile(base.name, workers=base.workers, nice=base.nice, io_class=base.io_class,
+                         bytes_per_second=args.limit_rate or base.bytes_per_second,
+                         files_per_second=args.limit_files or base.files_per_second)
+    print(f"Priority: {profile.describe()}", file=sys.stderr)
+    return QosController(profile)
+
+
+def _run_batch(plan, journal, workers, encode_options, manifest=None, prefetch=None, verify=None,
+               qos=None):
+    """Run a planned batch with journaling; Ctrl+C stops cleanly so it can be resumed."""
+    runner = BatchRunner(workers, prefetch=prefetch, qos=qos)
+    verifier = Verifier(verify) if verify else None
+    func = make_operation(plan.operation, plan.params, encode_options=encode_options,
+                          verifier=verifier)
+    if manifest is not None:
+        func = manifest.wrap(func)
+    cancel = threading.Event()
+    last_update = [0.0]
+    report = {}
+
+    def progress(snapshot):
+        now = time.perf_counter()
+        if now - last_update[0] >= PROGRESS_INTERVAL or snapshot.done == snapshot.total:
+            last_update[0] = now
+            sys.stderr.write(f"\rProcessed {snapshot.done}/{snapshot.total}, "
+                             f"{snapshot.failed} failed, about {format_duration(snapshot.eta)} left  ")
+            sys.stderr.flush()
+
+    def run():
+        report.update(runner.run(plan, func, progress=progress, cancel=cancel, journal=journal))
+        report["verify"] = verifier
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(0.2)
+    except KeyboardInterrupt:
+        cancel.set()
+        print("\nStopping after the files in progress...", file=sys.stderr)
+        thread.join()
+
+    cancelled = report.get("cancelled", True)
+    journal.close(finished=not cancelled)
+    if manifest is not None:
+        manifest.close(finished=not cancelled)
+
+    print(f"\nDone: {report.get('succeeded', 0)} succeeded, {len(report.get('failed', []))} failed "
+          f"in {format_duration(report.get('elapsed', 0))}", file=sys.stderr)
+    if report.get("prefetch") is not None:
+        print(report["prefetch"].summary(), file=sys.stderr)
+    if report.get("verify") is not None:
+        print(report["verify"].summary(), file=sys.stderr)
+    if report.get("qos") is not None:
+        print(report["qos"].summary(), file=sys.stderr)
+    for path, error in report.get("failed", []):
+        print(f"  {path}: {error}", file=sys.stderr)
+    if cancelled:
+        print(f"Interrupted. Resume with: just-de-pic resume {journal.path}", file=sys.stderr)
+    return 1 if cancelled or report.get("failed") else 0
+
+
+def cmd_batch(args):
+    """Run an operation over many files in place, with a resumable journal."""
+    if args.operation == "strip":
+        operation, params = "strip", ()
+    elif args.operation == "resize":
+        operation, params = "resize", (args.width, args.height, not args.exact)
+    else:
+        operation, params = "crop_center", (args.width, args.height)
+
+    encode_options = _encode_options(args)
+    verify = getattr(args, "verify", None)
+    manifest = None
+    if args.shard or args.manifest:
+        index, count = args.shard or (1, 1)
+        selected = select_shard(args.paths, index, count)
+        paths = [str(path) for path, _ in selected]
+        keys = {str(path): key for path, key in selected}
+        manifest_path = Path(args.manifest or f"shard-{index}-of-{count}.manifest.jsonl").resolve()
+        manifest = ShardManifest.create(manifest_path, index, count, operation, params, keys,
+                                        encode=encode_options.to_dict())
+        print(f"Shard {index}/{count}: {len(paths)} files\nManifest: {manifest_path}", file=sys.stderr)
+        if not paths:
+            manifest.close(finished=True)
+            return 0
+    else:
+        paths, keys = _expand_paths(args.paths), None
+        if not paths:
+            raise ValueError("No image files given")
+
+    workers = args.workers or BatchRunner().workers
+    plan = BatchPlanner(workers=workers).plan(paths, operation, params)
+    print(plan.summary(), file=sys.stderr)
+
+    journal_path = args.journal or new_journal_path()
+    ordered = [item.path for item in plan.items]
+    journal = BatchJournal.create(journal_path, operation, params, ordered,
+                                  encode=encode_options.to_dict(),
+                                  keys=[keys[p] for p in ordered] if keys else None,
+                                  manifest=str(manifest.path) if manifest else None,
+                                  verify=verify)
+    print(f"Journal: {journal_path}", file=sys.stderr)
+    return _run_batch(plan, journal, workers, encode_options, manifest, args.prefetch, verify,
+                      _qos_controller(args))
+
+
+def cmd_resume(args):
+    """Continue an interrupted batch from its journal."""
+    journal_path = args.journal
+    if journal_path is None:
+        incomplete = find_incomplete_journals()
+        if not incomplete:
+            raise ValueError("No interrupted batch found")
+        journal_path = incomplete[0]
+
+    state = read_journal(journal_path)
+    items = state.pending
+    if args.retry_failed:
+        items += [item for item in state.items if item in state.failed]
+    print(f"Journal: {journal_path}\n{len(state.done)} done, {len(state.failed)} failed, "
+          f"{len(state.pending)} pending", file=sys.stderr)
+    if not items:
+        print("Nothing left to do", file=sys.stderr)
+        return 0
+
+    workers = args.workers or BatchRunner().workers
+    plan = BatchPlanner(workers=workers).plan(items, state.operation, state.params)
+    manifest = ShardManifest.reopen(state.manifest, state.keys) if state.manifest else None
+    return _run_batch(plan, BatchJournal.reopen(journal_path), workers,
+                      EncodeOptions.from_dict(state.encode), manifest, args.prefetch, state.verify,
+                      _qos_controller(args))
+
+
+def cmd_merge_manifests(args):
+    """Combine the manifests of a sharded batch and report gaps."""
+    manifests = []
+    for path in map(Path, args.manifests):
+        manifests.extend(sorted(path.glob("*.manifest.jsonl")) if path.is_dir() else [path])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            report = merge_manifests(manifests, output, expect=args.expect)
+    else:
+        report = merge_manifests(manifests, expect=args.expect)
+
+    print(report.summary(), file=sys.stderr)
+    for key, error in report.failed:
+        print(f"  failed: {key}: {error}", file=sys.stderr)
+    for key in report.misplaced:
+        print(f"  wrong shard: {key}", file=sys.stderr)
+    for key in report.missing:
+        print(f"  missing: {key}", file=sys.stderr)
+    return 0 if report.complete else 1
+
+
+def cmd_serve(args):
+    """Run the local HTTP service."""
+    from server.http_service import ImageService
+
+    service = ImageService(workers=args.workers, queue_size=args.queue_size,
+                           max_body_size=args.max_body_mb * 1024 * 1024)
+    service.run(port=args.port, unix_path=args.unix)
+    return 0
+
+
+def build_parser():
+    """Build the argument parser for all subcommands."""
+    parser = argparse.ArgumentParser(
+        prog="just-de-pic",
+        description="Remove or inspect image metadata. Use '-' for stdin/stdout.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_io(sub):
+        sub.add_argument("input", nargs="?", default="-",
+                         help="Input image path, or '-' for stdin (default)")
+        sub.add_argument("-o", "--output",
+                         help="Output path or '-' for stdout (default: stdout for "
+                              "stdin input, otherwise overwrite in place)")
+        add_encode_args(sub)
+
+    def add_encode_args(sub):
+        group = sub.add_argument_group("encoding (when pixels are re-encoded)")
+        group.add_argument("--quality", type=int, metavar="1-95",
+                           help="JPEG/WebP quality (default: reuse the source JPEG's "
+                                "quantization tables and subsampling)")
+        group.add_argument("--optimize", action="store_true",
+                           help="Optimized Huffman tables for JPEG, optimize pass for PNG/GIF")
+        group.add_argument("--progressive", action="store_true", help="Write progressive JPEGs")
+        group.add_argument("--png-level", type=int, choices=range(10), metavar="0-9",
+                           help="PNG compression level")
+        group.add_argument("--target-size", type=parse_size, metavar="SIZE",
+                           help="Largest JPEG/WebP output, e.g. 200k or 1.5M; quality is searched")
+
+    strip = subparsers.add_parser("strip", help="Remove all metadata")
+    add_io(strip)
+    strip.set_defaults(func=cmd_strip)
+
+    resize = subparsers.add_parser("resize", help="Downscale to fit within WIDTH x HEIGHT")
+    resize.add_argument("width", type=int)
+    resize.add_argument("height", type=int)
+    resize.add_argument("--exact", action="store_true",
+                        help="Force exact dimensions instead of keeping the aspect ratio")
+    add_io(resize)
+    resize.set_defaults(func=cmd_resize)
+
+    crop = subparsers.add_parser("crop", help="Center-crop to WIDTH x HEIGHT")
+    crop.add_argument("width", type=int)
+    crop.add_argument("height", type=int)
+    add_io(crop)
+    crop.set_defaults(func=cmd_crop)
+
+    info = subparsers.add_parser("info", help="Print metadata as JSON")
+    info.add_argument("input", nargs="?", default="-",
+                      help="Input image path, or '-' for stdin (default)")
+    info.set_defaults(func=cmd_info)
+
+    export = subparsers.add_parser("export", help="Write a metadata report for files and folders")
+    export.add_argument("paths", nargs="+", help="Image files or folders (searched recursively)")
+    export.add_argument("-o", "--output", default="-",
+                        help="Report file, or '-' for stdout (default)")
+    export.add_argument("--format", choices=FORMATS,
+                        help="Report format (default: csv for a .csv output, otherwise jsonl)")
+    export.add_argument("--workers", type=int, help="Parallel readers (default: CPU count)")
+    export.add_argument("--unordered", action="store_true",
+                        help="Write records as they are read instead of in path order")
+    export.add_argument("--processes", action="store_true",
+                        help="Read in worker processes instead of threads")
+    export.add_argument("--no-recursive", action="store_true", help="Do not descend into subfolders")
+    export.set_defaults(func=cmd_export)
+
+    def add_qos_args(sub):
+        group = sub.add_argument_group("resource limits (for shared machines)")
+        group.add_argument("--qos", choices=sorted(QOS_PROFILES),
+                           help="Priority profile: background uses a quarter of the cores, "
+                                "niceness 10 and idle I/O (default: foreground)")
+        group.add_argument("--limit-rate", type=parse_size, metavar="SIZE",
+                           help="Most input bytes started per second, e.g. 20M")
+        group.add_argument("--limit-files", type=float, metavar="N",
+                           help="Most files started per second")
+
+    batch = subparsers.add_parser("batch", help="Process many files in place, resumably")
+    batch_ops = batch.add_subparsers(dest="operation", required=True)
+
+    def add_batch_args(sub):
+        sub.add_argument("paths", nargs="+", help="Image files or folders")
+        sub.add_argument("--workers", type=int, help="Worker threads (default: CPU count)")
+        sub.add_argument("--journal", metavar="PATH",
+                         help="Journal file (default: a new file in the cache directory)")
+        sub.add_argument("--prefetch", type=int, metavar="N",
+                         help="Files to read ahead of the workers (default: 2 per worker, 0 = off)")
+        sub.add_argument("--shard", type=parse_shard, metavar="INDEX/COUNT",
+                         help="Only process the files of this shard, e.g. 2/8")
+        sub.add_argument("--manifest", metavar="PATH",
+                         help="Result manifest to write (default with --shard: "
+                              "shard-INDEX-of-COUNT.manifest.jsonl)")
+        add_qos_args(sub)
+        add_encode_args(sub)
+        sub.set_defaults(func=cmd_batch)
+
+    batch_strip = batch_ops.add_parser("strip", help="Remove all metadata")
+    batch_strip.add_argument("--verify", nargs="?", const="payload", choices=VERIFY_MODES,
+                             help="Check that image data survived: compare payload hashes "
+                                  "(default), or also sample pixels of re-encoded files")
+    add_batch_args(batch_strip)
+    batch_resize = batch_ops.add_parser("resize", help="Downscale to fit within WIDTH x HEIGHT")
+    batch_resize.add_argument("width", type=int)
+    batch_resize.add_argument("height", type=int)
+    batch_resize.add_argument("--exact", action="store_true",
+                              help="Force exact dimensions instead of keeping the aspect ratio")
+    add_batch_args(batch_resize)
+    batch_crop = batch_ops.add_parser("crop", help="Center-crop to WIDTH x HEIGHT")
+    batch_crop.add_argument("width", type=int)
+    batch_crop.add_argument("height", type=int)
+    add_batch_args(batch_crop)
+
+    resume = subparsers.add_parser("resume", help="Continue an interrupted batch")
+    resume.add_argument("journal", nargs="?",
+                        help="Journal file (default: the most recent unfinished batch)")
+    resume.add_argument("--retry-failed", action="store_true", help="Also retry failed files")
+    resume.add_argument("--workers", type=int, help="Worker threads (default: CPU count)")
+    resume.add_argument("--prefetch", type=int, metavar="N",
+                        help="Files to read ahead of the workers (default: 2 per worker, 0 = off)")
+    add_qos_args(resume)
+    resume.set_defaults(func=cmd_resume)
+
+    merge = subparsers.add_parser("merge-manifests",
+                                  help="Combine shard manifests and report missing or failed files")
+    merge.add_argument("manifests", nargs="+",
+                       help="Manifest files, or folders containing *.manifest.jsonl")
+    merge.add_argument("-o", "--output", help="Write the merged entries here as JSONL")
+    merge.add_argument("--expect", nargs="+", metavar="PATH",
+                       help="The batch's original paths; list files that have no entry")
+    merge.set_defaults(func=cmd_merge_manifests)
+
+    serve = subparsers.add_parser("serve", help="Run a local HTTP service (localhost only)")
+    serve.add_argument("--port", type=int, default=8765, help="TCP port on 127.0.0.1 (default: 8765)")
+    serve.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of TCP")
+    serve.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    serve.add_argument("--queue-size", type=int, default=64,
+                       help="Requests allowed to wait for a worker before answering 503")
+    serve.add_argument("--max-body-mb", type=int, default=256, help="Largest accepted upload in MB")
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def run_cli(argv):
+    """
+    Run the command-line interface.
+    
+    Args:
+        argv: Argument list without the program name
+        
+    Returns:
+        int: Process exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        sys.stdout.flush()
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Metadata stripping for images inside ZIP and TAR archives."""
+
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+from core.metadata_handler import MetadataHandler
+from utils.helpers import is_image_file
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Stripped members are staged in memory up to this size before spilling
+SPOOL_LIMIT = 64 * 1024 * 1024
+
+TAR_WRITE_MODES = {
+    '.tgz': 'w|gz',
+    '.gz': 'w|gz',
+    '.bz2': 'w|bz2',
+    '.tbz2': 'w|bz2',
+    '.xz': 'w|xz',
+    '.txz': 'w|xz',
+}
+
+
+class ArchiveStripper:
+    """
+    Rewrites a ZIP or TAR archive with metadata removed from every image member.
+
+    Members are processed one at a time straight from the source archive;
+    nothing is extracted to disk. Each stripped member is staged in a
+    spooled buffer (so a failed member never leaves a partial entry behind
+    and the TAR header can carry the final size), which keeps memory per member
+    bounded by SPOOL_LIMIT. Non-image members are copied through unchanged;
+    images that fail to strip are left out of the output and reported.
+    """
+
+    def __init__(self, metadata_handler=None, spool_limit=SPOOL_LIMIT):
+        self.metadata_handler = metadata_handler or MetadataHandler()
+        self.spool_limit = spool_limit
+
+    def strip_archive(self, src_path, dst_path, progress=None):
+        """
+        Write a copy of an archive with metadata stripped from its images.
+
+        Args:
+            src_path: Path to the source ZIP or TAR archive
+            dst_path: Path of the archive to write
+            progress: Optional callable receiving (member_name, stats)
+
+        Returns:
+            dict: Counts of stripped, copied and failed members
+        """
+        src_path = Path(src_path)
+        dst_path = Path(dst_path)
+        if src_path.resolve() == dst_path.resolve():
+            raise ValueError("Output archive must differ from the input archive")
+
+        stats = {"stripped": 0, "copied": 0, "failed": []}
+
+        if zipfile.is_zipfile(src_path):
+            self._strip_zip(src_path, dst_path, stats, progress)
+        elif tarfile.is_tarfile(src_path):
+            self._strip_tar(src_path, dst_path, stats, progress)
+        else:
+            raise ValueError(f"Not a ZIP or TAR archive: {src_path.name}")
+
+        return stats
+
+    def _strip_member(self, src, name, stats):
+        """
+        Strip one image member into a spooled buffer.
+
+        Returns:
+            SpooledTemporaryFile: Stripped data rewound to the start, or None on failure
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_limit)
+        try:
+            self.metadata_handler.strip_stream(src, spool)
+        except Exception as e:
+            spool.close()
+            print(f"Error stripping {name}: {e}")
+            stats["failed"].append(name)
+            return None
+
+        spool.seek(0)
+        stats["stripped"] += 1
+        return spool
+
+    def _strip_zip(self, src_path, dst_path, stats, progress):
+        """Rewrite a ZIP archive member by member."""
+        with zipfile.ZipFile(src_path) as zin, \
+                zipfile.ZipFile(dst_path, 'w', allowZip64=True) as zout:
+            zout.comment = zin.comment
+
+            for info in zin.infolist():
+                out_info = zipfile.ZipInfo(info.filename, info.date_time)
+                out_info.compress_type = info.compress_type
+                out_info.external_attr = info.external_attr
+                out_info.create_system = info.create_system
+                out_info.comment = info.comment
+
+                if info.is_dir():
+                    zout.writestr(out_info, b'')
+                    continue
+
+                spool = None
+                if is_image_file(info.filename):
+                    with zin.open(info) as src:
+                        spool = self._strip_member(src, info.filename, stats)
+                    if spool is None:
+                        continue
+
+                with zout.open(out_info, 'w', force_zip64=True) as dst:
+                    if spool is not None:
+                        with spool:
+                            shutil.copyfileobj(spool, dst, COPY_CHUNK_SIZE)
+                    else:
+                        with zin.open(info) as src:
+                            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                        stats["copied"] += 1
+
+                if progress:
+                    progress(info.filename, stats)
+
+    def _strip_tar(self, src_path, dst_path, stats, progress):
+        """Rewrite a TAR archive member by member, reading it as a stream."""
+        suffix = dst_path.suffix.lower()
+        write_mode = TAR_WRITE_MODES.get(suffix, 'w|')
+
+        with tarfile.open(str(src_path), 'r|*') as tin, \
+                tarfile.open(str(dst_path), write_mode, format=tarfile.PAX_FORMAT) as tout:
+            for member in tin:
+                if not member.isfile():
+                    tout.addfile(member)
+                    continue
+
+                src = tin.extractfile(member)
+                spool = None
+                if is_image_file(member.name):
+                    spool = self._strip_member(src, member.name, stats)
+                    if spool is None:
+                        continue
+
+                if spool is not None:
+                    with spool:
+                        spool.seek(0, 2)
+                        member.size = spool.tell()
+                        spool.seek(0)
+                        tout.addfile(member, spool)
+                else:
+                    tout.addfile(member, src)
+                    stats["copied"] += 1
+
+                if progress:
+                    progress(member.name, stats)
\ No newline at end of file
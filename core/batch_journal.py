@@ -0,0 +1,279 @@
+"""Write-ahead journal that makes batch operations resumable."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from utils.helpers import fsync_path, get_cache_dir
+
+JOURNAL_VERSION = 1
+
+# Outcomes are made durable in groups: whichever limit is hit first
+GROUP_COMMIT_RECORDS = 256
+GROUP_COMMIT_SECONDS = 0.5
+
+# Finished journals kept in the default directory; older ones are pruned
+JOURNALS_KEPT = 20
+
+TAIL_SIZE = 4096
+
+
+def get_journal_dir():
+    """Return the default directory for batch journals."""
+    return get_cache_dir() / "journals"
+
+
+def new_journal_path(directory=None):
+    """Return a fresh journal path, pruning old finished journals."""
+    directory = Path(directory) if directory else get_journal_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    prune_finished_journals(directory)
+    return directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.jsonl"
+
+
+def is_finished(journal_path):
+    """Check whether a journal ends with an end record, reading only its tail."""
+    try:
+        with open(journal_path, 'rb') as f:
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - TAIL_SIZE))
+            lines = f.read().splitlines()
+    except OSError:
+        return False
+    for line in reversed(lines):
+        if line.strip():
+            try:
+                return json.loads(line).get("event") == "end"
+            except ValueError:
+                return False
+    return False
+
+
+def find_incomplete_journals(directory=None):
+    """Return unfinished journals, newest first."""
+    directory = Path(directory) if directory else get_journal_dir()
+    if not directory.is_dir():
+        return []
+    journals = sorted(directory.glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return [journal for journal in journals if not is_finished(journal)]
+
+
+def prune_finished_journals(directory, keep=JOURNALS_KEPT):
+    """Delete all but the newest keep finished journals in directory."""
+    journals = sorted(Path(directory).glob("*.jsonl"), key=lambda p: p.stat().st_mtime, reverse=True)
+    finished = [journal for journal in journals if is_finished(journal)]
+    for journal in finished[keep:]:
+        try:
+            journal.unlink()
+        except OSError:
+            pass
+
+
+class JournalState:
+    """What a journal says about a batch: its operation, items and outcomes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.operation = None
+        self.params = ()
+        self.encode = None  # EncodeOptions.to_dict() of the original run
+        self.manifest = None  # ShardManifest path, for sharded runs
+        self.verify = None  # Verifier mode, if outputs are verified
+        self.items = []
+        self.keys = {}  # path -> shard key, for sharded runs
+        self.done = set()
+        self.failed = {}  # path -> error message
+        self.finished = False
+
+    @property
+    def pending(self):
+        """Items with no recorded outcome, in their original order."""
+        return [item for item in self.items if item not in self.done and item not in self.failed]
+
+
+def read_journal(journal_path):
+    """
+    Replay a journal.
+
+    Torn lines (from a crash mid-write) are skipped; the items they
+    described simply stay pending.
+
+    Returns:
+        JournalState: The recovered state
+    """
+    state = JournalState(journal_path)
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            event = record.get("event")
+            if event == "begin":
+                if record.get("version") != JOURNAL_VERSION:
+                    raise ValueError(f"Unsupported journal version: {record.get('version')}")
+                state.operation = record["operation"]
+                state.params = tuple(record["params"])
+                state.encode = record.get("encode")
+                state.manifest = record.get("manifest")
+                state.verify = record.get("verify")
+            elif event == "items":
+                state.items.extend(record["paths"])
+                state.keys.update(zip(record["paths"], record.get("keys", ())))
+            elif event == "done":
+                state.done.update(record["paths"])
+                for path in record["paths"]:
+                    state.failed.pop(path, None)
+            elif event == "failed":
+                state.failed[record["path"]] = record["error"]
+            elif event == "end":
+                state.finished = True
+            elif event == "resume":
+                state.finished = False
+
+    if state.operation is None:
+        raise ValueError(f"Not a batch journal: {journal_path}")
+    return state
+
+
+class BatchJournal:
+    """
+    Append-only JSONL log of a batch, written ahead of and alongside the work.
+
+    The journal starts with the operation and the full item list, synced
+    before any file is touched. Outcomes are buffered and committed in
+    groups by a background thread: it first syncs the directories of the
+    files completed in the group (making their renames durable), then
+    appends the records and syncs the journal. A crash loses at most the
+    last uncommitted group, whose files are redone on resume; the batch
+    operations are idempotent for the same parameters, and each file is
+    replaced atomically, so redoing them is harmless.
+    """
+
+    def __init__(self, path, group_records=GROUP_COMMIT_RECORDS, group_seconds=GROUP_COMMIT_SECONDS):
+        self.path = Path(path)
+        self.group_records = group_records
+        self.group_seconds = group_seconds
+
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._cond = threading.Condition()
+        self._done = []
+        self._records = []
+        self._dirs = set()
+        self._closing = False
+        self._thread = threading.Thread(target=self._commit_loop, daemon=True, name="batch-journal")
+        self._thread.start()
+
+    @classmethod
+    def create(cls, path, operation, params, paths, encode=None, keys=None, manifest=None,
+               verify=None, **kwargs):
+        """
+        Start a journal for a new batch; the item list is durable on return.
+
+        Args:
+            path: Journal file to create
+            operation: Batch operation name
+            params: Operation parameters
+            paths: Item paths in processing order
+            encode: EncodeOptions.to_dict() so a resume encodes the same way
+            keys: Shard keys parallel to paths, for sharded runs
+            manifest: ShardManifest path, reopened by a resume
+            verify: Verifier mode, so a resume verifies the same way
+        """
+        items = {"event": "items", "paths": [str(p) for p in paths]}
+        if keys is not None:
+            items["keys"] = list(keys)
+        with open(path, 'x', encoding='utf-8') as f:
+            f.write(json.dumps({"event": "begin", "version": JOURNAL_VERSION,
+                                "operation": operation, "params": list(params),
+                                "encode": encode, "manifest": manifest, "verify": verify,
+                                "created": time.time()}) + "\n")
+            f.write(json.dumps(items) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        fsync_path(Path(path).parent)
+        return cls(path, **kwargs)
+
+    @classmethod
+    def reopen(cls, path, **kwargs):
+        """Continue appending to an existing journal for a resumed run."""
+        # Terminate a line torn by a crash so new records start cleanly
+        with open(path, 'rb+') as f:
+            f.seek(0, 2)
+            if f.tell():
+                f.seek(-1, 2)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        journal = cls(path, **kwargs)
+        journal._append({"event": "resume", "time": time.time()})
+        return journal
+
+    def record_done(self, path):
+        """Record that path was written successfully."""
+        path = str(path)
+        with self._cond:
+            self._done.append(path)
+            self._dirs.add(os.path.dirname(os.path.abspath(path)))
+            if len(self._done) >= self.group_records:
+                self._cond.notify()
+
+    def record_failed(self, path, error):
+        """Record that processing path failed."""
+        self._append({"event": "failed", "path": str(path), "error": str(error)})
+
+    def close(self, finished):
+        """
+        Commit everything outstanding and stop the commit thread.
+
+        Args:
+            finished: Whether every item was attempted; writes the end record
+        """
+        if finished:
+            self._append({"event": "end", "time": time.time()})
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        self._file.close()
+
+    def _append(self, record):
+        """Queue a record for the next group commit."""
+        with self._cond:
+            self._records.append(record)
+            if len(self._records) >= self.group_records:
+                self._cond.notify()
+
+    def _commit_loop(self):
+        """Commit buffered outcomes whenever a group fills up or the interval passes."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: (self._closing or len(self._done) >= self.group_records
+                             or len(self._records) >= self.group_records),
+                    timeout=self.group_seconds)
+                done, self._done = self._done, []
+                records, self._records = self._records, []
+                dirs, self._dirs = self._dirs, set()
+                closing = self._closing
+            self._commit(done, records, dirs)
+            if closing:
+                return
+
+    def _commit(self, done, records, dirs):
+        """Make one group durable: directory entries first, then the journal."""
+        if not done and not records:
+            return
+        for directory in dirs:
+            fsync_path(directory)
+
+        lines = []
+        if done:
+            lines.append(json.dumps({"event": "done", "paths": done}) + "\n")
+        # End/failed records follow the done records queued before them
+        lines.extend(json.dumps(record) + "\n" for record in records)
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""Planning for batch operations: header scan, cost estimates and job order."""
+
+import heapq
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from core.stream_stripper import StreamStripper, HEADER_SIZE
+from utils.helpers import format_duration, format_size
+
+# Rough single-core costs used for estimates; the runner corrects them
+# from observed throughput once the batch is under way.
+DECODE_SECONDS_PER_MP = {
+    'JPEG': 0.004, 'PNG': 0.015, 'WEBP': 0.015, 'TIFF': 0.002, 'GIF': 0.005, 'BMP': 0.003,
+}
+ENCODE_SECONDS_PER_MP = {
+    'JPEG': 0.006, 'PNG': 0.065, 'WEBP': 0.085, 'TIFF': 0.002, 'GIF': 0.008, 'BMP': 0.003,
+}
+DEFAULT_SECONDS_PER_MP = 0.02
+RESAMPLE_SECONDS_PER_MP = 0.022
+BYTE_COPY_SECONDS_PER_MB = 0.004
+FILE_OVERHEAD_SECONDS = 0.002
+
+OPERATIONS = ("strip", "resize", "crop_center")
+
+
+class BatchItem:
+    """One file in a batch, with what the header scan found out about it."""
+
+    __slots__ = ("path", "file_size", "format", "width", "height", "frames", "byte_level",
+                 "cost", "projected_size", "error")
+
+    def __init__(self, path):
+        self.path = path
+        self.file_size = 0
+        self.format = None
+        self.width = 0
+        self.height = 0
+        self.frames = 1
+        self.byte_level = False
+        self.cost = FILE_OVERHEAD_SECONDS
+        self.projected_size = 0
+        self.error = None
+
+    @property
+    def megapixels(self):
+        return self.width * self.height * self.frames / 1e6
+
+
+class BatchPlan:
+    """
+    An ordered list of batch items with totals for the pre-run summary.
+
+    Items are sorted by estimated cost, largest first, so that the longest
+    jobs start early and the small ones fill in the gaps at the end instead
+    of one huge file running alone on a single core.
+    """
+
+    def __init__(self, operation, params, items, workers):
+        self.operation = operation
+        self.params = tuple(params)
+        self.items = sorted(items, key=lambda item: item.cost, reverse=True)
+        self.workers = workers
+
+        self.total_bytes = sum(item.file_size for item in self.items)
+        self.projected_bytes = sum(item.projected_size for item in self.items)
+        self.total_cost = sum(item.cost for item in self.items)
+        self.estimated_seconds = self._estimate_makespan()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _estimate_makespan(self):
+        """Simulate the largest-first schedule across the workers."""
+        loads = [0.0] * max(1, min(self.workers, len(self.items)))
+        for item in self.items:
+            heapq.heapreplace(loads, loads[0] + item.cost)
+        return max(loads)
+
+    def summary(self):
+        """Return a short multi-line description of the batch."""
+        lines = [
+            f"{len(self.items)} files, {format_size(self.total_bytes)}",
+            f"Estimated time: ~{format_duration(self.estimated_seconds)} on {self.workers} workers",
+            f"Projected output: ~{format_size(self.projected_bytes)}",
+        ]
+        unreadable = sum(1 for item in self.items if item.error is not None)
+        if unreadable:
+            lines.append(f"{unreadable} files could not be read and will likely fail")
+        return "\n".join(lines)
+
+
+class BatchPlanner:
+    """Scans image headers and estimates what a batch operation will cost."""
+
+    def __init__(self, workers=None, scan_workers=8):
+        """
+        Args:
+            workers: Number of workers the batch will run on
+            scan_workers: Threads used to read headers
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.scan_workers = scan_workers
+        self.stripper = StreamStripper()
+
+    def plan(self, paths, operation, params=()):
+        """
+        Build a plan for running an operation over paths.
+
+        Args:
+            paths: Image file paths
+            operation: One of "strip", "resize" or "crop_center"
+            params: Operation parameters, as passed to ImageProcessor
+
+        Returns:
+            BatchPlan: Items ordered largest first, with totals
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown batch operation: {operation}")
+
+        with ThreadPoolExecutor(max_workers=self.scan_workers) as executor:
+            items = list(executor.map(self.scan, paths))
+        for item in items:
+            self.estimate(item, operation, params)
+        return BatchPlan(operation, params, items, self.workers)
+
+    def scan(self, path):
+        """Read the size, format and dimensions of one file without decoding it."""
+        item = BatchItem(path)
+        try:
+            item.file_size = os.path.getsize(path)
+            with open(path, 'rb') as f:
+                item.byte_level = self.stripper.can_strip(f.read(HEADER_SIZE))
+                f.seek(0)
+                with Image.open(f) as img:
+                    item.format = img.format
+                    item.width, item.height = img.size
+                    item.frames = getattr(img, 'n_frames', 1)
+        except Exception as e:
+            item.error = e
+        return item
+
+    def estimate(self, item, operation, params):
+        """Fill in item.cost (seconds on one core) and item.projected_size."""
+        item.projected_size = item.file_size
+        if item.error is not None:
+            return
+
+        in_mp = item.megapixels
+        decode = in_mp * DECODE_SECONDS_PER_MP.get(item.format, DEFAULT_SECONDS_PER_MP)
+        encode_rate = ENCODE_SECONDS_PER_MP.get(item.format, DEFAULT_SECONDS_PER_MP)
+
+        if operation == "strip":
+            if item.byte_level:
+                item.cost += item.file_size / 1e6 * BYTE_COPY_SECONDS_PER_MB
+            else:
+                item.cost += decode + in_mp * encode_rate
+            return
+
+        if operation == "resize":
+            max_width, max_height = params[0], params[1]
+            maintain_aspect = params[2] if len(params) > 2 else True
+            if maintain_aspect:
+                scale = min(max_width / item.width, max_height / item.height)
+                if scale >= 1:
+                    # Already fits; only the header is read
+                    return
+                out_width, out_height = int(item.width * scale), int(item.height * scale)
+            else:
+                out_width, out_height = max_width, max_height
+            out_mp = out_width * out_height * item.frames / 1e6
+            item.cost += decode + in_mp * RESAMPLE_SECONDS_PER_MP + out_mp * encode_rate
+        else:
+            out_width = min(params[0], item.width)
+            out_height = min(params[1], item.height)
+            out_mp = out_width * out_height * item.frames / 1e6
+            item.cost += decode + out_mp * encode_rate
+
+        if in_mp:
+            item.projected_size = int(item.file_size * out_mp / in_mp)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""Worker-pool execution of planned batch operations."""
+
+import os
+import threading
+import time
+
+from core.image_processor import ImageProcessor
+from core.metadata_handler import MetadataHandler
+from core.prefetcher import DEFAULT_MAX_BYTES, Prefetcher
+
+
+def make_operation(operation, params, processor=None, metadata_handler=None, encode_options=None,
+                   verifier=None):
+    """
+    Return a callable that applies a named batch operation to one file in place.
+
+    Args:
+        operation: "strip", "resize" or "crop_center"
+        params: Operation parameters as recorded in the plan or journal
+        processor: Optional ImageProcessor to use
+        metadata_handler: Optional MetadataHandler to use
+        encode_options: EncodeOptions for the handler or processor created here
+        verifier: Optional Verifier checking each stripped file's image data
+    """
+    if operation == "strip":
+        handler = metadata_handler or MetadataHandler(encode_options=encode_options)
+        strip = lambda path: handler.remove_all_metadata(str(path))
+        return verifier.wrap(strip) if verifier is not None else strip
+
+    processor = processor or ImageProcessor(encode_options=encode_options)
+    if operation == "resize":
+        return lambda path: processor.resize_image(str(path), *params)
+    if operation == "crop_center":
+        return lambda path: processor.crop_center(str(path), *params)
+    raise ValueError(f"Unknown batch operation: {operation}")
+
+
+class BatchProgress:
+    """Snapshot of a running batch, passed to progress callbacks."""
+
+    __slots__ = ("done", "failed", "total", "elapsed", "eta", "path")
+
+    def __init__(self, done, failed, total, elapsed, eta, path):
+        self.done = done
+        self.failed = failed
+        self.total = total
+        self.elapsed = elapsed
+        self.eta = eta
+        self.path = path
+
+
+class BatchRunner:
+    """
+    Runs a BatchPlan on a pool of worker threads.
+
+    Jobs are handed out in plan order (largest first). The ETA starts from
+    the plan's estimate and shifts towards the observed rate, measured as
+    estimated cost completed per wall-clock second, as more jobs finish.
+    A Prefetcher reads upcoming files while the current ones are processed.
+    With a QosController, each file waits for the current profile's worker
+    slots and rate limits, and worker and read-ahead threads run at its
+    niceness and I/O class.
+    """
+
+    def __init__(self, workers=None, prefetch=None, prefetch_bytes=DEFAULT_MAX_BYTES, qos=None):
+        """
+        Args:
+            workers: Worker threads (default: CPU count)
+            prefetch: Files read ahead beyond those being processed
+                      (default: two per worker; 0 disables read-ahead)
+            prefetch_bytes: Memory budget for files read ahead
+            qos: Optional QosController; its profile may be changed while a batch runs
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.prefetch = self.workers * 2 if prefetch is None else prefetch
+        self.prefetch_bytes = prefetch_bytes
+        self.qos = qos
+
+    def run(self, plan, func, progress=None, cancel=None, journal=None):
+        """
+        Run func on every item of plan.
+
+        Args:
+            plan: BatchPlan to execute
+            func: Callable taking a file path; raising marks the item failed
+            progress: Optional callable receiving a BatchProgress after each item
+            cancel: Optional threading.Event; once set, no new items are started
+            journal: Optional BatchJournal receiving each outcome
+
+        Returns:
+            dict: succeeded count, failed [(path, message)], elapsed seconds,
+                  whether the run was cancelled, read-ahead stats
+                  (PrefetchStats, or None without read-ahead) and throttling
+                  stats (QosStats, or None without a QosController)
+        """
+        items = iter(enumerate(plan.items))
+        lock = threading.Lock()
+        report = {"succeeded": 0, "failed": [], "elapsed": 0.0, "cancelled": False, "prefetch": None,
+                  "qos": None}
+        qos = self.qos
+        if qos is not None:
+            qos.reset_stats()
+        state = {"done": 0, "cost_done": 0.0}
+        start = time.perf_counter()
+
+        prefetcher = None
+        if self.prefetch > 0 and len(plan) > 1:
+            # The window counts files being processed too, hence the workers
+            prefetcher = Prefetcher([item.path for item in plan.items],
+                                    sizes=[item.file_size for item in plan.items],
+                                    depth=self.workers + self.prefetch,
+                                    max_bytes=self.prefetch_bytes,
+                                    thread_hook=qos.apply_to_thread if qos is not None else None)
+
+        def next_item():
+            with lock:
+                if cancel is not None and cancel.is_set():
+                    report["cancelled"] = True
+                    return None
+                return next(items, None)
+
+        def worker():
+            while True:
+                entry = next_item()
+                if entry is None:
+                    return
+                index, item = entry
+                if qos is not None:
+                    qos.apply_to_thread()
+                    if not qos.acquire(item.file_size, cancel):
+                        # Cancelled while throttled; the item stays pending in the journal
+                        with lock:
+                            report["cancelled"] = True
+                        return
+                if prefetcher is not None:
+                    prefetcher.wait(index)
+                began = time.perf_counter()
+                try:
+                    func(item.path)
+                    error = None
+                except Exception as e:
+                    error = str(e)
+                if qos is not None:
+                    qos.release()
+                if prefetcher is not None:
+                    prefetcher.done(index, time.perf_counter() - began)
+
+                if journal is not None:
+                    if error is None:
+                        journal.record_done(item.path)
+                    else:
+                        journal.record_failed(item.path, error)
+
+                with lock:
+                    if error is None:
+                        report["succeeded"] += 1
+                    else:
+                        report["failed"].append((item.path, error))
+                    state["done"] += 1
+                    state["cost_done"] += item.cost
+                    elapsed = time.perf_counter() - start
+                    snapshot = BatchProgress(state["done"], len(report["failed"]), len(plan),
+                                             elapsed, self._eta(plan, state, elapsed), item.path)
+                if progress is not None:
+                    progress(snapshot)
+
+        threads = [threading.Thread(target=worker, daemon=True, name=f"batch-{i}")
+                   for i in range(max(1, min(self.workers, len(plan))))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        report["elapsed"] = time.perf_counter() - start
+        if prefetcher is not None:
+            prefetcher.close()
+            report["prefetch"] = prefetcher.stats
+        if qos is not None:
+            report["qos"] = qos.stats
+        return report
+
+    def _eta(self, plan, state, elapsed):
+        """Blend the planned estimate with the observed throughput."""
+        remaining_cost = max(0.0, plan.total_cost - state["cost_done"])
+        planned = remaining_cost / plan.total_cost * plan.estimated_seconds if plan.total_cost else 0.0
+        if not state["cost_done"] or not elapsed:
+            return planned
+
+        observed = remaining_cost * elapsed / state["cost_done"]
+        # Trust observation more as jobs complete; the first few are noisy
+        weight = min(1.0, state["done"] / (2.0 * self.workers))
+        return planned * (1 - weight) + observed * weight
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""Encoder settings for images whose pixels have to be written out."""
+
+import io
+
+from PIL import JpegImagePlugin
+
+# Used when a JPEG is re-encoded without a quality and without source tables
+DEFAULT_JPEG_QUALITY = 95
+
+# Formats where a quality setting trades size for fidelity
+QUALITY_FORMATS = {'JPEG', 'WEBP'}
+
+SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+              'G': 1024 ** 3, 'GB': 1024 ** 3}
+
+
+def parse_size(text):
+    """
+    Parse a byte size such as "250000", "200k" or "1.5MB".
+
+    Returns:
+        int: Size in bytes
+    """
+    text = str(text).strip().upper()
+    number = text.rstrip('KMGB')
+    unit = text[len(number):]
+    if unit not in SIZE_UNITS:
+        raise ValueError(f"Invalid size: {text}")
+    try:
+        size = int(float(number) * SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size: {text}")
+    if size <= 0:
+        raise ValueError(f"Size must be positive: {text}")
+    return size
+
+
+class EncodeOptions:
+    """
+    How images are encoded when pixels are written.
+
+    By default a JPEG is written with the quantization tables, chroma
+    subsampling and progressive flag of the image it came from. The
+    output then stays close to the input in quality and size, instead of
+    being re-encoded at a fixed quality. An explicit quality overrides
+    this. With target_size set, JPEG and WebP quality is found by binary
+    search: the highest quality whose output fits the target.
+    """
+
+    def __init__(self, quality=None, keep_quantization=True, optimize=False, progressive=False,
+                 png_compress_level=None, target_size=None, min_quality=20, max_quality=95):
+        """
+        Args:
+            quality: JPEG/WebP quality 1-95; overrides keep_quantization
+            keep_quantization: Reuse the source JPEG's tables and subsampling
+            optimize: Optimized Huffman tables (JPEG), optimize pass (PNG, GIF),
+                      slowest/best method (WebP)
+            progressive: Write progressive JPEGs
+            png_compress_level: zlib level 0-9 for PNG output
+            target_size: Maximum output size in bytes for JPEG/WebP
+            min_quality: Lowest quality tried when searching for target_size
+            max_quality: Highest quality tried when searching for target_size
+        """
+        self.quality = quality
+        self.keep_quantization = keep_quantization
+        self.optimize = optimize
+        self.progressive = progressive
+        self.png_compress_level = png_compress_level
+        self.target_size = target_size
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+
+    def to_dict(self):
+        """Return the options as a JSON-serializable dict."""
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build options from to_dict() output; None gives the defaults."""
+        return cls(**(data or {}))
+
+    def describe(self):
+        """Return a canonical string of the options, for cache keys."""
+        return ",".join(f"{key}={value!r}" for key, value in sorted(self.__dict__.items()))
+
+    def save_args(self, img_format, source=None, quality=None):
+        """
+        Build Pillow save() keyword arguments.
+
+        Args:
+            img_format: Output format name
+            source: The image the pixels came from, used to copy encoder settings
+            quality: Quality to use instead of the configured one
+
+        Returns:
+            dict: Keyword arguments for Image.save
+        """
+        quality = quality if quality is not None else self.quality
+        args = {}
+
+        if img_format == 'JPEG':
+            source_tables = (source is not None and source.format == 'JPEG'
+                             and getattr(source, 'quantization', None))
+            if quality is not None:
+                args['quality'] = quality
+            elif self.keep_quantization and source_tables:
+                args['qtables'] = source.quantization
+                sampling = JpegImagePlugin.get_sampling(source)
+                if sampling != -1:
+                    args['subsampling'] = sampling
+            else:
+                args['quality'] = DEFAULT_JPEG_QUALITY
+            if self.optimize:
+                args['optimize'] = True
+            if self.progressive or (self.keep_quantization and source_tables
+                                    and source.info.get('progressive')):
+                args['progressive'] = True
+        elif img_format == 'WEBP':
+            if quality is not None:
+                args['quality'] = quality
+            if self.optimize:
+                args['method'] = 6
+        elif img_format == 'PNG':
+            if self.png_compress_level is not None:
+                args['compress_level'] = self.png_compress_level
+            if self.optimize:
+                args['optimize'] = True
+        elif img_format == 'GIF':
+            if self.optimize:
+                args['optimize'] = True
+        elif img_format == 'TIFF':
+            # Pillow writes uncompressed TIFF unless told otherwise
+            compression = source.info.get('compression') if source is not None else None
+            if compression and compression != 'raw':
+                args['compression'] = compression
+
+        return args
+
+    def save(self, img, target, img_format, source=None, **extra):
+        """
+        Encode img to target.
+
+        Args:
+            img: Image to write
+            target: Path or writable binary stream
+            img_format: Output format name
+            source: The image the pixels came from
+            **extra: Additional save() arguments (e.g. save_all, duration)
+        """
+        if self.target_size and img_format in QUALITY_FORMATS:
+            data = self._encode_to_size(img, img_format, source, extra)
+            if hasattr(target, 'write'):
+                target.write(data)
+            else:
+                with open(target, 'wb') as f:
+                    f.write(data)
+            return
+
+        img.save(target, img_format, **self.save_args(img_format, source), **extra)
+
+    def _encode_to_size(self, img, img_format, source, extra):
+        """Binary-search the highest quality whose output fits target_size."""
+        def encode(quality):
+            buffer = io.BytesIO()
+            img.save(buffer, img_format, **self.save_args(img_format, source, quality), **extra)
+            return buffer.getvalue()
+
+        best = None
+        low, high = self.min_quality, self.max_quality
+        while low <= high:
+            quality = (low + high) // 2
+            data = encode(quality)
+            if len(data) <= self.target_size:
+                best = data
+                low = quality + 1
+            else:
+                high = quality - 1
+
+        # Nothing fits: the smallest allowed quality is the closest we get
+        return best if best is not None else encode(self.min_quality)
\ No newline at end of file
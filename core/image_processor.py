@@ -1,98 +1,144 @@
-"""Image processing operations: resize and crop."""
-
-from PIL import Image
-from pathlib import Path
-
-
-class ImageProcessor:
-    """Handles image resize and crop operations."""
-    
-    def resize_image(self, image_path, max_width, max_height, maintain_aspect=True):
-        """
-        Resize an image to fit within max dimensions.
-        
-        Args:
-            image_path: Path to the image file
-            max_width: Maximum width in pixels
-            max_height: Maximum height in pixels
-            maintain_aspect: Whether to maintain aspect ratio (default: True)
-        """
-        path = Path(image_path)
-        
-        with Image.open(path) as img:
-            if maintain_aspect:
-                # Calculate the scaling factor
-                width_ratio = max_width / img.width
-                height_ratio = max_height / img.height
-                scale_factor = min(width_ratio, height_ratio)
-                
-                # Only downscale, never upscale
-                if scale_factor < 1:
-                    new_width = int(img.width * scale_factor)
-                    new_height = int(img.height * scale_factor)
-                    
-                    # Resize the image
-                    resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                    
-                    # Save with same format
-                    resized.save(path, img.format)
-            else:
-                # Force exact dimensions (may distort)
-                resized = img.resize((max_width, max_height), Image.Resampling.LANCZOS)
-                resized.save(path, img.format)
-                
-    def crop_center(self, image_path, crop_width, crop_height):
-        """
-        Crop an image from the center to specified dimensions.
-        
-        Args:
-            image_path: Path to the image file
-            crop_width: Target width in pixels
-            crop_height: Target height in pixels
-        """
-        path = Path(image_path)
-        
-        with Image.open(path) as img:
-            # Calculate center crop coordinates
-            left = (img.width - crop_width) // 2
-            top = (img.height - crop_height) // 2
-            right = left + crop_width
-            bottom = top + crop_height
-            
-            # Ensure crop is within bounds
-            left = max(0, left)
-            top = max(0, top)
-            right = min(img.width, right)
-            bottom = min(img.height, bottom)
-            
-            # Crop the image
-            cropped = img.crop((left, top, right, bottom))
-            
-            # Save with same format
-            cropped.save(path, img.format)
-            
-    def crop_custom(self, image_path, left, top, right, bottom):
-        """
-        Crop an image with custom coordinates.
-        
-        Args:
-            image_path: Path to the image file
-            left: Left coordinate
-            top: Top coordinate
-            right: Right coordinate
-            bottom: Bottom coordinate
-        """
-        path = Path(image_path)
-        
-        with Image.open(path) as img:
-            # Ensure coordinates are within bounds
-            left = max(0, min(left, img.width))
-            top = max(0, min(top, img.height))
-            right = max(left, min(right, img.width))
-            bottom = max(top, min(bottom, img.height))
-            
-            # Crop the image
-            cropped = img.crop((left, top, right, bottom))
-            
-            # Save with same format
-            cropped.save(path, img.format)
\ No newline at end of file
+"""Image processing operations: resize and crop."""
+
+from PIL import Image
+from core.encode_options import EncodeOptions
+from utils.helpers import is_path_like, transform_file
+
+
+class ImageProcessor:
+    """
+    Handles image resize and crop operations.
+    
+    Every operation takes a file path, a bytes-like object, or a readable
+    binary stream. With no output the file is overwritten in place (or, for
+    bytes and streams, the result is returned as bytes); otherwise the
+    result goes to the given path or writable stream.
+    """
+    
+    def __init__(self, cache=None, encode_options=None):
+        """
+        Args:
+            cache: Optional ResultCache used to reuse earlier results
+            encode_options: EncodeOptions for written images (default: keep
+                            the source's JPEG tables, Pillow defaults otherwise)
+        """
+        self.cache = cache
+        self.encode_options = encode_options or EncodeOptions()
+        
+    def _run(self, source, output, operation, params, transform):
+        """Apply transform to source, going through the result cache for in-place edits."""
+        def process(src, dst):
+            with Image.open(src) as img:
+                result = transform(img, *params)
+                if result is None:
+                    return False
+                # Save with same format
+                self.encode_options.save(result, dst, img.format, source=img)
+                
+        if output is None and is_path_like(source) and self.cache is not None:
+            cache_params = params + (self.encode_options.describe(),)
+            self.cache.apply(source, operation, cache_params,
+                             lambda: transform_file(source, None, process, seekable=True))
+            return None
+            
+        return transform_file(source, output, process, seekable=True)
+            
+    def resize_image(self, image_path, max_width, max_height, maintain_aspect=True, output=None):
+        """
+        Resize an image to fit within max dimensions.
+        
+        Args:
+            image_path: Path to the image file, image bytes, or a binary stream
+            max_width: Maximum width in pixels
+            max_height: Maximum height in pixels
+            maintain_aspect: Whether to maintain aspect ratio (default: True)
+            output: Optional destination path or writable binary stream
+            
+        Returns:
+            bytes: Resized image when the input is not a path and no output is given
+        """
+        return self._run(image_path, output, "resize", (max_width, max_height, maintain_aspect),
+                         self._resize)
+        
+    def _resize(self, img, max_width, max_height, maintain_aspect):
+        """Return img resized, or None if it already fits."""
+        if maintain_aspect:
+            # Calculate the scaling factor
+            width_ratio = max_width / img.width
+            height_ratio = max_height / img.height
+            scale_factor = min(width_ratio, height_ratio)
+            
+            # Only downscale, never upscale
+            if scale_factor >= 1:
+                return None
+                
+            new_width = int(img.width * scale_factor)
+            new_height = int(img.height * scale_factor)
+            
+            # Resize the image
+            return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            
+        # Force exact dimensions (may distort)
+        return img.resize((max_width, max_height), Image.Resampling.LANCZOS)
+                
+    def crop_center(self, image_path, crop_width, crop_height, output=None):
+        """
+        Crop an image from the center to specified dimensions.
+        
+        Args:
+            image_path: Path to the image file, image bytes, or a binary stream
+            crop_width: Target width in pixels
+            crop_height: Target height in pixels
+            output: Optional destination path or writable binary stream
+            
+        Returns:
+            bytes: Cropped image when the input is not a path and no output is given
+        """
+        return self._run(image_path, output, "crop_center", (crop_width, crop_height),
+                         self._crop_center)
+        
+    def _crop_center(self, img, crop_width, crop_height):
+        """Return the center crop of img."""
+        # Calculate center crop coordinates
+        left = (img.width - crop_width) // 2
+        top = (img.height - crop_height) // 2
+        right = left + crop_width
+        bottom = top + crop_height
+        
+        # Ensure crop is within bounds
+        left = max(0, left)
+        top = max(0, top)
+        right = min(img.width, right)
+        bottom = min(img.height, bottom)
+        
+        # Crop the image
+        return img.crop((left, top, right, bottom))
+            
+    def crop_custom(self, image_path, left, top, right, bottom, output=None):
+        """
+        Crop an image with custom coordinates.
+        
+        Args:
+            image_path: Path to the image file, image bytes, or a binary stream
+            left: Left coordinate
+            top: Top coordinate
+            right: Right coordinate
+            bottom: Bottom coordinate
+            output: Optional destination path or writable binary stream
+            
+        Returns:
+            bytes: Cropped image when the input is not a path and no output is given
+        """
+        return self._run(image_path, output, "crop_custom", (left, top, right, bottom),
+                         self._crop_custom)
+        
+    def _crop_custom(self, img, left, top, right, bottom):
+        """Return img cropped to the given box, clamped to its bounds."""
+        # Ensure coordinates are within bounds
+        left = max(0, min(left, img.width))
+        top = max(0, min(top, img.height))
+        right = max(left, min(right, img.width))
+        bottom = max(top, min(bottom, img.height))
+        
+        # Crop the image
+        return img.crop((left, top, right, bottom))
\ No newline at end of file
@@ -0,0 +1,174 @@
+"""Bulk metadata export to JSONL or CSV."""
+
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+
+from core.metadata_reader import read_metadata
+
+FORMATS = ("jsonl", "csv")
+
+# Paths per task; amortises scheduling (and pickling, with processes)
+CHUNK_SIZE = 64
+
+# Tasks in flight per worker; bounds memory for ordered output
+CHUNKS_PER_WORKER = 4
+
+CSV_COLUMNS = ("path", "size", "modified", "format", "mode", "width", "height",
+               "has_exif", "has_gps", "has_xmp", "exif_tags", "camera", "taken", "error")
+
+
+def read_record(path):
+    """
+    Build the export record for one file.
+
+    Args:
+        path: Image file path
+
+    Returns:
+        dict: path, size, modified, format, mode, width, height, has_gps and
+              the metadata categories; error is set if the file could not be read
+    """
+    record = {"path": str(path)}
+    try:
+        stat = os.stat(path)
+        record["size"] = stat.st_size
+        record["modified"] = int(stat.st_mtime)
+        meta = read_metadata(path)
+        metadata = meta.to_dict()
+        record["has_gps"] = meta.has_gps
+    except Exception as e:
+        record["error"] = str(e)
+        return record
+
+    metadata.pop("Basic", None)
+    record["format"] = meta.format
+    record["mode"] = meta.mode
+    if meta.size:
+        record["width"], record["height"] = meta.size
+    record["metadata"] = metadata
+    return record
+
+
+def _read_chunk(paths):
+    """Worker entry point: read a chunk of records (module-level so it pickles)."""
+    return [read_record(path) for path in paths]
+
+
+def _chunks(paths, size):
+    paths = iter(paths)
+    while True:
+        chunk = [str(path) for path in islice(paths, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_records(paths, workers=None, ordered=True, processes=False, chunk_size=CHUNK_SIZE):
+    """
+    Read metadata for many files in parallel and yield the records.
+
+    paths may be a lazy iterator; only a bounded window of chunks is ever
+    in flight, so memory does not grow with the number of files.
+
+    Args:
+        paths: Image file paths
+        workers: Parallel readers (default: CPU count)
+        ordered: Yield records in input order; otherwise as they complete
+        processes: Use worker processes instead of threads, for when the
+                   Python-level parsing rather than I/O is the bottleneck
+        chunk_size: Paths per task
+
+    Yields:
+        dict: One record per path (see read_record)
+    """
+    workers = workers or os.cpu_count() or 1
+    window = workers * CHUNKS_PER_WORKER
+    chunks = _chunks(paths, chunk_size)
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+
+    with executor_class(max_workers=workers) as executor:
+        if ordered:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(executor.submit(_read_chunk, chunk))
+                if len(in_flight) >= window:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+        else:
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(executor.submit(_read_chunk, chunk))
+                if len(in_flight) >= window:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield from future.result()
+            for future in in_flight:
+                yield from future.result()
+
+
+class JsonlWriter:
+    """Writes each record as one JSON line, with the full metadata."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+
+
+class CsvWriter:
+    """Writes one summary row per record; the full metadata only goes to JSONL."""
+
+    def __init__(self, stream):
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, record):
+        metadata = record.get("metadata", {})
+        exif = metadata.get("EXIF", {})
+        camera = " ".join(str(exif[tag]).strip() for tag in ("Make", "Model") if tag in exif)
+        row = dict(record)
+        xmp = metadata.get("XMP", {})
+        row.update(has_exif=bool(exif), has_xmp=bool(xmp),
+                   exif_tags=len(exif), camera=camera,
+                   taken=exif.get("DateTimeOriginal") or exif.get("DateTime", ""))
+        if "error" in record:
+            row.update(has_exif="", has_gps="", has_xmp="", exif_tags="")
+        self.writer.writerow(row)
+
+
+def export_metadata(paths, stream, fmt="jsonl", workers=None, ordered=True, processes=False,
+                    progress=None):
+    """
+    Stream metadata records for paths to a text stream.
+
+    Args:
+        paths: Image file paths (may be a lazy iterator)
+        stream: Writable text stream
+        fmt: "jsonl" or "csv"
+        workers: Parallel readers (default: CPU count)
+        ordered: Keep input order in the output
+        processes: Read in worker processes instead of threads
+        progress: Optional callable receiving (records written, errors)
+
+    Returns:
+        dict: Number of records written and of files that could not be read
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    writer = JsonlWriter(stream) if fmt == "jsonl" else CsvWriter(stream)
+
+    stats = {"records": 0, "errors": 0}
+    for record in iter_records(paths, workers=workers, ordered=ordered, processes=processes):
+        writer.write(record)
+        stats["records"] += 1
+        if "error" in record:
+            stats["errors"] += 1
+        if progress is not None:
+            progress(stats["records"], stats["errors"])
+    return stats
\ No newline at end of file
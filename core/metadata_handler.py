@@ -1,142 +1,191 @@
-"""Metadata handling for various image formats."""
-
-import piexif
-from PIL import Image
-from pathlib import Path
-import json
-
-
-class MetadataHandler:
-    """Handles reading, writing, and removing image metadata."""
-    
-    def get_all_metadata(self, image_path):
-        """
-        Get all metadata from an image file.
-        
-        Returns:
-            dict: Dictionary containing metadata categories and their fields
-        """
-        metadata = {
-            "EXIF": {},
-            "IPTC": {},
-            "XMP": {},
-            "Basic": {}
-        }
-        
-        try:
-            # Open image with PIL
-            with Image.open(image_path) as img:
-                # Get basic info
-                metadata["Basic"]["Format"] = img.format
-                metadata["Basic"]["Mode"] = img.mode
-                metadata["Basic"]["Size"] = f"{img.width}x{img.height}"
-                
-                # Get EXIF data
-                if img.format in ['JPEG', 'TIFF']:
-                    exif_dict = piexif.load(image_path)
-                    
-                    # Process each IFD
-                    for ifd_name in exif_dict:
-                        if ifd_name == "thumbnail":
-                            continue
-                            
-                        ifd_data = exif_dict[ifd_name]
-                        for tag, value in ifd_data.items():
-                            # Get tag name
-                            tag_name = piexif.TAGS[ifd_name].get(tag, {}).get("name", f"Tag_{tag}")
-                            
-                            # Convert bytes to string if needed
-                            if isinstance(value, bytes):
-                                try:
-                                    value = value.decode('utf-8', errors='ignore')
-                                except:
-                                    value = str(value)
-                                    
-                            metadata["EXIF"][tag_name] = value
-                            
-                # Get other metadata from PIL info
-                info = img.info
-                for key, value in info.items():
-                    if key not in metadata["EXIF"]:
-                        metadata["XMP"][key] = str(value)
-                        
-        except Exception as e:
-            print(f"Error reading metadata: {e}")
-            
-        # Remove empty categories
-        metadata = {k: v for k, v in metadata.items() if v}
-        
-        return metadata
-        
-    def has_metadata(self, image_path):
-        """Check if an image has any metadata."""
-        try:
-            metadata = self.get_all_metadata(image_path)
-            # Check if any category has data (besides Basic)
-            for category, data in metadata.items():
-                if category != "Basic" and data:
-                    return True
-            return False
-        except:
-            return False
-            
-    def remove_all_metadata(self, image_path):
-        """Remove all metadata from an image file."""
-        path = Path(image_path)
-        
-        try:
-            # Open and save image without metadata
-            with Image.open(path) as img:
-                # Create a clean copy without metadata
-                clean_img = Image.new(img.mode, img.size)
-                clean_img.putdata(list(img.getdata()))
-                
-                # Save without metadata
-                if img.format == 'JPEG':
-                    clean_img.save(path, 'JPEG', quality=95)
-                elif img.format == 'PNG':
-                    clean_img.save(path, 'PNG')
-                else:
-                    clean_img.save(path, img.format)
-                    
-        except Exception as e:
-            # Alternative method using piexif for JPEG
-            if path.suffix.lower() in ['.jpg', '.jpeg']:
-                piexif.remove(str(path))
-            else:
-                raise e
-                
-    def update_metadata(self, image_path, metadata_dict):
-        """
-        Update metadata in an image file.
-        
-        Args:
-            image_path: Path to the image file
-            metadata_dict: Dictionary containing metadata to update
-        """
-        path = Path(image_path)
-        
-        try:
-            if path.suffix.lower() in ['.jpg', '.jpeg']:
-                # Load existing EXIF
-                exif_dict = piexif.load(str(path))
-                
-                # Update EXIF data
-                if "EXIF" in metadata_dict:
-                    for field, value in metadata_dict["EXIF"].items():
-                        # Find the appropriate IFD and tag
-                        for ifd_name in ["0th", "Exif", "GPS", "1st"]:
-                            for tag, tag_info in piexif.TAGS[ifd_name].items():
-                                if tag_info.get("name") == field:
-                                    # Convert value to appropriate type
-                                    if isinstance(value, str):
-                                        value = value.encode('utf-8')
-                                    exif_dict[ifd_name][tag] = value
-                                    break
-                                    
-                # Save with updated EXIF
-                exif_bytes = piexif.dump(exif_dict)
-                piexif.insert(exif_bytes, str(path))
-                
-        except Exception as e:
+"""Metadata handling for various image formats."""
+
+import io
+import piexif
+from PIL import Image, ImageSequence
+from pathlib import Path
+import json
+from core.encode_options import EncodeOptions
+from core.metadata_reader import read_metadata
+from core.stream_stripper import HEADER_SIZE, StreamStripper
+from utils.helpers import is_path_like, transform_file
+
+# Formats Pillow can write back with every frame
+MULTI_FRAME_FORMATS = {'GIF', 'PNG', 'WEBP', 'TIFF'}
+
+
+class MetadataHandler:
+    """Handles reading, writing, and removing image metadata."""
+    
+    def __init__(self, cache=None, encode_options=None):
+        """
+        Args:
+            cache: Optional ResultCache used to reuse earlier strip results
+            encode_options: EncodeOptions for images that must be re-encoded
+        """
+        self.cache = cache
+        self.encode_options = encode_options or EncodeOptions()
+        self.stripper = StreamStripper()
+        
+    def get_all_metadata(self, image_path, strict=False):
+        """
+        Get all metadata from an image file.
+        
+        Args:
+            image_path: Path to the image file, image bytes, or a binary stream
+            strict: Raise read errors instead of printing them and returning
+                    an empty dict
+            
+        Returns:
+            dict: Dictionary containing metadata categories and their fields
+        """
+        try:
+            return read_metadata(image_path).to_dict()
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Error reading metadata: {e}")
+            return {}
+        
+    def has_metadata(self, image_path):
+        """Check if an image has any metadata (without decoding it)."""
+        try:
+            return read_metadata(image_path).has_metadata()
+        except Exception:
+            return False
+            
+    def remove_all_metadata(self, image_path, output=None):
+        """
+        Remove all metadata from an image.
+        
+        Args:
+            image_path: Path to the image file, image bytes, or a binary stream
+            output: Optional destination path or writable binary stream; by
+                    default a path is stripped in place
+                    
+        Returns:
+            bytes: Stripped image when the input is not a path and no output is given
+        """
+        if output is None and is_path_like(image_path):
+            if self.cache is not None:
+                self.cache.apply(image_path, "strip", (self.encode_options.describe(),),
+                                 lambda: self._remove_all_metadata(image_path))
+            else:
+                self._remove_all_metadata(image_path)
+            return None
+            
+        if is_path_like(image_path) and is_path_like(output):
+            return transform_file(image_path, output, self._strip_file, mapped=True)
+        return transform_file(image_path, output, self.strip_stream)
+            
+    def _remove_all_metadata(self, image_path):
+        """Strip metadata from a file in place."""
+        path = Path(image_path)
+        
+        try:
+            transform_file(path, None, self._strip_file, mapped=True)
+        except Exception as e:
+            # Alternative method using piexif for JPEG
+            if path.suffix.lower() in ['.jpg', '.jpeg']:
+                piexif.remove(str(path))
+            else:
+                raise e
+                
+    def strip_stream(self, src, dst):
+        """
+        Copy an image from one stream to another without metadata.
+        
+        Formats with a byte-level stripper are streamed in a single pass;
+        anything else is decoded and re-encoded from memory.
+        
+        Args:
+            src: Readable binary stream
+            dst: Writable binary stream
+            
+        Returns:
+            str: Image format name
+        """
+        head = src.read(HEADER_SIZE)
+        if self.stripper.can_strip(head):
+            return self.stripper.strip(src, dst, head)
+            
+        with Image.open(io.BytesIO(head + src.read())) as img:
+            self._save_clean_copy(img, dst)
+            return img.format
+            
+    def _strip_file(self, src, dst):
+        """
+        strip_stream for file-to-file rewrites.
+        
+        Returns False when the byte-level stripper found nothing to remove,
+        so an in-place strip leaves the file alone and a copy is cloned.
+        """
+        head = src.read(HEADER_SIZE)
+        if self.stripper.can_strip(head):
+            _, changed = self.stripper.strip_file(src, dst, head)
+            return None if changed else False
+            
+        with Image.open(io.BytesIO(head + src.read())) as img:
+            self._save_clean_copy(img, dst)
+        return None
+            
+    def _save_clean_copy(self, img, target):
+        """Save the pixel data of img (every frame, for multi-frame images) to target without metadata."""
+        save_args = {}
+        if getattr(img, 'n_frames', 1) > 1 and img.format in MULTI_FRAME_FORMATS:
+            frames, durations, disposals = [], [], []
+            for frame in ImageSequence.Iterator(img):
+                frames.append(self._clean_frame(frame))
+                durations.append(frame.info.get('duration', 0))
+                disposals.append(getattr(frame, 'disposal_method', 0))
+                
+            save_args.update(save_all=True, append_images=frames[1:])
+            if img.format in ('GIF', 'PNG', 'WEBP'):
+                save_args.update(duration=durations, loop=img.info.get('loop', 0))
+            if img.format == 'GIF':
+                save_args['disposal'] = disposals
+            self.encode_options.save(frames[0], target, img.format, source=img, **save_args)
+        else:
+            self.encode_options.save(self._clean_frame(img), target, img.format, source=img)
+            
+    def _clean_frame(self, frame):
+        """Copy a frame's pixels (and palette) into a new image with no info attached."""
+        clean_img = Image.frombytes(frame.mode, frame.size, frame.tobytes())
+        if frame.mode in ('P', 'PA'):
+            clean_img.putpalette(frame.getpalette(rawmode='RGBA'), rawmode='RGBA')
+        return clean_img
+        
+    def update_metadata(self, image_path, metadata_dict):
+        """
+        Update metadata in an image file.
+        
+        Args:
+            image_path: Path to the image file
+            metadata_dict: Dictionary containing metadata to update
+        """
+        path = Path(image_path)
+        
+        try:
+            if path.suffix.lower() in ['.jpg', '.jpeg']:
+                # Load existing EXIF
+                exif_dict = piexif.load(str(path))
+                
+                # Update EXIF data
+                if "EXIF" in metadata_dict:
+                    for field, value in metadata_dict["EXIF"].items():
+                        # Find the appropriate IFD and tag
+                        for ifd_name in ["0th", "Exif", "GPS", "1st"]:
+                            for tag, tag_info in piexif.TAGS[ifd_name].items():
+                                if tag_info.get("name") == field:
+                                    # Convert value to appropriate type
+                                    if isinstance(value, str):
+                                        value = value.encode('utf-8')
+                                    exif_dict[ifd_name][tag] = value
+                                    break
+                                    
+                # Save with updated EXIF
+                exif_bytes = piexif.dump(exif_dict)
+                piexif.insert(exif_bytes, str(path))
+                
+        except Exception as e:
             print(f"Error updating metadata: {e}")
\ No newline at end of file
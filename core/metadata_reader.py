@@ -0,0 +1,769 @@
+"""Single-pass metadata reader with lazily decoded EXIF, IPTC and XMP."""
+
+import re
+import struct
+import zlib
+import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from fractions import Fraction
+
+import piexif
+from PIL import Image
+
+from core.stream_stripper import GIF_SCAN_SIZE, HEADER_SIZE, JPEG_STANDALONE_MARKERS, StreamStripper
+from core.tiff_stripper import TYPE_SIZES
+from utils.helpers import open_input
+
+# Out-of-line TIFF values larger than this are not read (they are image
+# data or embedded files, not metadata)
+MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+# Upper bound on IFDs followed, guarding against offset loops
+MAX_IFDS = 64
+
+JPEG_EXIF_HEADER = b'Exif\x00\x00'
+JPEG_XMP_HEADER = b'http://ns.adobe.com/xap/1.0/\x00'
+PHOTOSHOP_HEADER = b'Photoshop 3.0\x00'
+
+# Photoshop image resource holding IPTC-IIM records
+PHOTOSHOP_IPTC_RESOURCE = 0x0404
+
+# JPEG start-of-frame markers (every SOFn except DHT, JPG and DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+
+# (bit depth, colour type) -> Pillow mode
+PNG_MODES = {
+    (1, 0): "1", (2, 0): "L", (4, 0): "L", (8, 0): "L", (16, 0): "I;16",
+    (8, 2): "RGB", (16, 2): "RGB", (1, 3): "P", (2, 3): "P", (4, 3): "P", (8, 3): "P",
+    (8, 4): "LA", (16, 4): "RGBA", (8, 6): "RGBA", (16, 6): "RGBA",
+}
+PNG_XMP_KEYWORD = b'XML:com.adobe.xmp'
+
+GIF_XMP_APPLICATION = b'XMP DataXMP'
+
+# EXIF sub-IFD pointers, by the piexif.TAGS group their entries belong to
+EXIF_POINTERS = {34665: "Exif", 34853: "GPS", 40965: "Interop"}
+
+# TIFF tags that locate image data or embed whole files, not metadata
+EXIF_SKIPPED_TAGS = {273, 279, 288, 289, 324, 325, 330, 513, 514, 34675}
+
+# Baseline and extension tags describing a TIFF file's own pixels; every TIFF
+# has them, stripped or not, so they are kept apart from its metadata
+TIFF_STRUCTURE_TAGS = {
+    254, 255,                 # NewSubfileType, SubfileType
+    256, 257, 258, 259,       # ImageWidth, ImageLength, BitsPerSample, Compression
+    262, 263, 266,            # PhotometricInterpretation, Threshholding, FillOrder
+    274, 277, 278,            # Orientation, SamplesPerPixel, RowsPerStrip
+    280, 281, 282, 283, 284,  # Min/MaxSampleValue, X/YResolution, PlanarConfiguration
+    290, 291, 296, 297,       # GrayResponseUnit/Curve, ResolutionUnit, PageNumber
+    301, 317, 318, 319, 320,  # TransferFunction, Predictor, WhitePoint, PrimaryChromaticities, ColorMap
+    322, 323, 332, 338, 339,  # TileWidth, TileLength, InkSet, ExtraSamples, SampleFormat
+    340, 341, 347,            # S Min/MaxSampleValue, JPEGTables
+    529, 530, 531, 532,       # YCbCrCoefficients/SubSampling/Positioning, ReferenceBlackWhite
+}
+EXIF_XMP_TAG = 700
+EXIF_IPTC_TAG = 33723
+EXIF_PHOTOSHOP_TAG = 34377
+
+# Windows XP tags stored as UTF-16LE bytes
+EXIF_XP_TAGS = {40091, 40092, 40093, 40094, 40095}
+EXIF_USER_COMMENT = 37510
+EXIF_VERSION_TAGS = {36864, 40960, 2}
+
+EXIF_INT_FORMATS = {1: 'B', 3: 'H', 4: 'I', 6: 'b', 8: 'h', 9: 'i', 11: 'f', 12: 'd',
+                    13: 'I', 16: 'Q', 17: 'q', 18: 'Q'}
+
+# IPTC-IIM application record (2) datasets
+IPTC_NAMES = {
+    0: "RecordVersion", 3: "ObjectTypeReference", 4: "ObjectAttributeReference",
+    5: "ObjectName", 7: "EditStatus", 10: "Urgency", 12: "SubjectReference",
+    15: "Category", 20: "SupplementalCategories", 22: "FixtureIdentifier", 25: "Keywords",
+    26: "ContentLocationCode", 27: "ContentLocationName", 30: "ReleaseDate", 35: "ReleaseTime",
+    37: "ExpirationDate", 38: "ExpirationTime", 40: "SpecialInstructions", 45: "ReferenceService",
+    47: "ReferenceDate", 50: "ReferenceNumber", 55: "DateCreated", 60: "TimeCreated",
+    62: "DigitalCreationDate", 63: "DigitalCreationTime", 65: "OriginatingProgram",
+    70: "ProgramVersion", 75: "ObjectCycle", 80: "By-line", 85: "By-lineTitle", 90: "City",
+    92: "Sub-location", 95: "Province-State", 100: "Country-PrimaryLocationCode",
+    101: "Country-PrimaryLocationName", 103: "OriginalTransmissionReference", 105: "Headline",
+    110: "Credit", 115: "Source", 116: "CopyrightNotice", 118: "Contact", 120: "Caption-Abstract",
+    121: "LocalCaption", 122: "Writer-Editor", 130: "ImageType", 131: "ImageOrientation",
+    135: "LanguageIdentifier",
+}
+IPTC_REPEATABLE = {4, 12, 20, 25, 26, 27, 45, 47, 50, 80, 85, 118, 122}
+IPTC_UTF8 = b'\x1b%G'
+
+RDF_PREFIX = "{http://www.w3.org/1999/02/22-rdf-syntax-ns#}"
+RDF_ROOT = RDF_PREFIX + "RDF"
+RDF_DESCRIPTION = RDF_PREFIX + "Description"
+RDF_RESOURCE = RDF_PREFIX + "resource"
+XMP_ALT = RDF_PREFIX + "Alt"
+XMP_CONTAINERS = {RDF_PREFIX + "Bag", RDF_PREFIX + "Seq", XMP_ALT}
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+XMP_NAMESPACE_DECL = re.compile(rb'xmlns:([\w.-]+)\s*=\s*["\']([^"\']*)["\']')
+
+
+_MISSING = object()
+
+
+class Rational(Fraction):
+    """An EXIF rational; shown as "1/250" or "4" rather than Fraction(1, 250)."""
+
+    def __repr__(self):
+        return str(self)
+
+
+class LazyTags(Mapping):
+    """Name -> value mapping whose values are decoded on first access."""
+
+    def __init__(self, raw, decode):
+        self._raw = raw
+        self._decode = decode
+        self._values = {}
+
+    def __getitem__(self, name):
+        value = self._values.get(name, _MISSING)
+        if value is _MISSING:
+            value = self._values[name] = self._decode(self._raw[name])
+        return value
+
+    def __iter__(self):
+        return iter(self._raw)
+
+    def __len__(self):
+        return len(self._raw)
+
+    def __contains__(self, name):
+        return name in self._raw
+
+
+class _ExifEntry:
+    """One IFD entry with its value bytes, not yet decoded."""
+
+    __slots__ = ("tag", "type", "count", "raw", "endian")
+
+    def __init__(self, tag, type_, count, raw, endian):
+        self.tag = tag
+        self.type = type_
+        self.count = count
+        self.raw = raw
+        self.endian = endian
+
+
+def _index_tiff(read_at, structure=None):
+    """
+    Collect the metadata entries of IFD0 and its EXIF, GPS and Interop sub-IFDs.
+
+    Args:
+        read_at: Callable (offset, size) -> bytes over the TIFF structure
+        structure: Optional dict that receives IFD0's TIFF_STRUCTURE_TAGS
+                   instead of the entries, for TIFF files themselves
+
+    Returns:
+        tuple: (entries by tag name, XMP packets, IPTC blocks)
+    """
+    header = read_at(0, 16)
+    if header[:2] == b'II':
+        endian = '<'
+    elif header[:2] == b'MM':
+        endian = '>'
+    else:
+        raise ValueError("Not a TIFF structure")
+    magic = struct.unpack(endian + 'H', header[2:4])[0]
+    big = magic == 43
+    if big:
+        first = struct.unpack(endian + 'Q', header[8:16])[0]
+        count_fmt, entry_fmt, entry_size, inline = 'Q', 'HHQ', 20, 8
+    elif magic == 42:
+        first = struct.unpack(endian + 'I', header[4:8])[0]
+        count_fmt, entry_fmt, entry_size, inline = 'H', 'HHI', 12, 4
+    else:
+        raise ValueError("Not a TIFF structure")
+    count_size = struct.calcsize(count_fmt)
+    head_size = entry_size - inline
+
+    entries, xmp, iptc = {}, [], []
+    pending, seen = [("Image", first)], set()
+    while pending and len(seen) < MAX_IFDS:
+        group, offset = pending.pop(0)
+        if not offset or offset in seen:
+            continue
+        seen.add(offset)
+        count_bytes = read_at(offset, count_size)
+        if len(count_bytes) < count_size:
+            continue
+        count = struct.unpack(endian + count_fmt, count_bytes)[0]
+        body = read_at(offset + count_size, min(count, 0xFFFF) * entry_size)
+        names = piexif.TAGS[group]
+
+        for i in range(len(body) // entry_size):
+            raw_entry = body[i * entry_size:(i + 1) * entry_size]
+            tag, type_, value_count = struct.unpack(endian + entry_fmt, raw_entry[:head_size])
+            value_field = raw_entry[head_size:]
+            if tag in EXIF_SKIPPED_TAGS or type_ not in TYPE_SIZES:
+                continue
+            size = TYPE_SIZES[type_] * value_count
+            if size <= inline:
+                raw = value_field[:size]
+            elif size <= MAX_VALUE_SIZE:
+                raw = read_at(struct.unpack(endian + ('Q' if big else 'I'), value_field)[0], size)
+            else:
+                continue
+
+            if tag in EXIF_POINTERS and group in ("Image", "Exif"):
+                pointer = _decode_exif(group, _ExifEntry(tag, type_, value_count, raw, endian))
+                if isinstance(pointer, tuple):
+                    pointer = pointer[0] if pointer else 0
+                if isinstance(pointer, int):
+                    pending.append((EXIF_POINTERS[tag], pointer))
+            elif tag == EXIF_XMP_TAG and group == "Image":
+                xmp.append(bytes(raw))
+            elif tag == EXIF_IPTC_TAG and group == "Image":
+                iptc.append(bytes(raw))
+            elif tag == EXIF_PHOTOSHOP_TAG and group == "Image":
+                iptc.extend(_photoshop_iptc(raw))
+            else:
+                name = names.get(tag, {}).get("name", f"Tag_{tag}")
+                target = entries
+                if structure is not None and group == "Image" and tag in TIFF_STRUCTURE_TAGS:
+                    target = structure
+                target[name] = (group, _ExifEntry(tag, type_, value_count, raw, endian))
+    return entries, xmp, iptc
+
+
+def _rational(numerator, denominator):
+    return Rational(numerator, denominator) if denominator else None
+
+
+def _decode_exif(group, entry):
+    """Decode one EXIF entry into a str, int, float, Rational, bytes or a tuple of them."""
+    raw = bytes(entry.raw)
+    size = TYPE_SIZES[entry.type] * entry.count
+    if len(raw) < size:
+        return raw  # truncated
+
+    if entry.type == 2:  # ASCII
+        return raw.rstrip(b'\x00').decode('utf-8', errors='replace')
+    if entry.tag in EXIF_XP_TAGS and group == "Image":
+        return raw.decode('utf-16-le', errors='replace').rstrip('\x00')
+    if entry.type == 7:  # UNDEFINED
+        if entry.tag == EXIF_USER_COMMENT and group == "Exif":
+            prefix, text = raw[:8], raw[8:]
+            if prefix.startswith(b'UNICODE'):
+                codec = 'utf-16-be' if entry.endian == '>' else 'utf-16-le'
+                return text.decode(codec, errors='replace').rstrip('\x00')
+            return text.rstrip(b'\x00 ').decode('utf-8', errors='replace')
+        text = raw.rstrip(b'\x00')
+        if text.isascii() and (entry.tag in EXIF_VERSION_TAGS or text.decode('ascii').isprintable()):
+            return text.decode('ascii')
+        return raw
+
+    if entry.type in (5, 10):  # (signed) rational
+        fmt = 'I' if entry.type == 5 else 'i'
+        parts = struct.unpack(f"{entry.endian}{2 * entry.count}{fmt}", raw[:size])
+        values = tuple(_rational(parts[i], parts[i + 1]) for i in range(0, len(parts), 2))
+    else:
+        values = struct.unpack(f"{entry.endian}{entry.count}{EXIF_INT_FORMATS[entry.type]}", raw[:size])
+    return values[0] if entry.count == 1 else values
+
+
+def _decode_exif_pair(value):
+    group, entry = value
+    return _decode_exif(group, entry)
+
+
+def _photoshop_iptc(data):
+    """Return the IPTC-IIM blocks inside Photoshop image resources."""
+    blocks, pos = [], 0
+    data = bytes(data)
+    while pos + 12 <= len(data) and data[pos:pos + 4] == b'8BIM':
+        resource = struct.unpack('>H', data[pos + 4:pos + 6])[0]
+        name_length = data[pos + 6]
+        pos += 6 + ((name_length + 2) & ~1)  # Pascal string padded to even
+        if pos + 4 > len(data):
+            break
+        size = struct.unpack('>I', data[pos:pos + 4])[0]
+        pos += 4
+        if resource == PHOTOSHOP_IPTC_RESOURCE:
+            blocks.append(data[pos:pos + size])
+        pos += size + (size & 1)
+    return blocks
+
+
+def _parse_iptc(blocks):
+    """Decode the application record of IPTC-IIM blocks into named values."""
+    result = {}
+    for data in blocks:
+        utf8 = False
+        pos = 0
+        while pos + 5 <= len(data) and data[pos] == 0x1C:
+            record, dataset = data[pos + 1], data[pos + 2]
+            size = struct.unpack('>H', data[pos + 3:pos + 5])[0]
+            pos += 5
+            if size & 0x8000:  # extended dataset: the length follows
+                length_size = size & 0x7FFF
+                size = int.from_bytes(data[pos:pos + length_size], 'big')
+                pos += length_size
+            value = data[pos:pos + size]
+            pos += size
+
+            if record == 1 and dataset == 90:
+                utf8 = value == IPTC_UTF8
+            if record != 2:
+                continue
+            if dataset == 0 and len(value) == 2:
+                value = struct.unpack('>H', value)[0]
+            else:
+                try:
+                    value = value.decode('utf-8')
+                except UnicodeDecodeError:
+                    value = value.decode('utf-8' if utf8 else 'latin-1', errors='replace')
+            name = IPTC_NAMES.get(dataset, f"Dataset_{dataset}")
+            if dataset in IPTC_REPEATABLE:
+                result.setdefault(name, []).append(value)
+            else:
+                result[name] = value
+    return result
+
+
+class _XmpNames:
+    """Turns ElementTree '{uri}local' names into 'prefix:local', using the packet's prefixes."""
+
+    def __init__(self):
+        self.prefixes = {}
+        self._names = {}
+
+    def add_packet(self, packet):
+        for prefix, uri in XMP_NAMESPACE_DECL.findall(packet):
+            self.prefixes.setdefault(uri.decode('utf-8', 'replace'), prefix.decode('utf-8', 'replace'))
+
+    def __call__(self, tag):
+        name = self._names.get(tag)
+        if name is None:
+            if tag.startswith('{'):
+                uri, local = tag[1:].split('}', 1)
+                name = f"{self.prefixes.get(uri, uri)}:{local}"
+            else:
+                name = tag
+            self._names[tag] = name
+        return name
+
+
+def _xmp_value(element, names):
+    """Decode an XMP property element: text, list, language alternative or struct."""
+    if not len(element) and not element.attrib:
+        return (element.text or "").strip()
+    for child in element:
+        if child.tag in XMP_CONTAINERS:
+            items = [_xmp_value(item, names) for item in child]
+            if child.tag == XMP_ALT:
+                return items[0] if items else ""  # x-default comes first
+            return items
+
+    resource = element.get(RDF_RESOURCE)
+    if resource is not None:
+        return resource
+    fields = {names(name): value for name, value in element.attrib.items()
+              if not name.startswith(RDF_PREFIX) and name != XML_LANG}
+    for child in element:
+        if child.tag == RDF_DESCRIPTION:
+            fields.update(_xmp_value(child, names) or {})
+        else:
+            fields[names(child.tag)] = _xmp_value(child, names)
+    if fields:
+        return fields
+    return (element.text or "").strip()
+
+
+def _index_xmp(packets):
+    """
+    Parse XMP packets and index their top-level properties without decoding them.
+
+    Returns:
+        LazyTags: 'prefix:Property' -> value
+    """
+    names = _XmpNames()
+    properties = {}
+    for packet in packets:
+        names.add_packet(packet)
+        try:
+            root = ET.fromstring(packet.strip(b'\x00 \t\r\n'))
+        except ET.ParseError:
+            continue
+        for rdf in root.iter(RDF_ROOT):
+            for description in rdf.iterfind(RDF_DESCRIPTION):
+                for name, value in description.attrib.items():
+                    if not name.startswith(RDF_PREFIX) and name != XML_LANG:
+                        properties[names(name)] = value
+                for child in description:
+                    properties[names(child.tag)] = child
+
+    def decode(raw):
+        return raw if isinstance(raw, str) else _xmp_value(raw, names)
+
+    return LazyTags(properties, decode)
+
+
+def _decode_text(raw):
+    """Decode a text field recorded as (codec, data, compressed)."""
+    codec, data, compressed = raw
+    if compressed:
+        data = zlib.decompress(data)
+    return data.decode(codec, errors='replace')
+
+
+def _display(value):
+    """Replace binary values with a short description for reports and panels."""
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+class ImageMetadata:
+    """
+    Metadata of one image, as found in a single pass over its headers.
+
+    Only the raw segments are kept after reading; EXIF entries are decoded
+    one tag at a time on access, and IPTC and XMP when their category is
+    first used, so checking for metadata or reading a couple of tags never
+    pays for parsing everything.
+    """
+
+    def __init__(self, fmt, mode=None, size=None):
+        self.format = fmt
+        self.mode = mode
+        self.size = size  # (width, height)
+        self._exif_blobs = []   # TIFF structures from EXIF segments and chunks
+        self._exif_entries = {}
+        self._xmp_packets = []
+        self._iptc_blocks = []
+        self._text = {}         # name -> (codec, data, compressed)
+        self._exif = self._iptc = self._xmp = None
+
+    def _index(self):
+        """Index pending EXIF blobs; they may also carry XMP and IPTC."""
+        while self._exif_blobs:
+            blob = memoryview(self._exif_blobs.pop(0))
+            try:
+                entries, xmp, iptc = _index_tiff(lambda offset, size: blob[offset:offset + size])
+            except (ValueError, struct.error):
+                continue
+            self._exif_entries.update(entries)
+            self._xmp_packets.extend(xmp)
+            self._iptc_blocks.extend(iptc)
+
+    @property
+    def basic(self):
+        """Format, mode and size as shown in the Basic category."""
+        basic = {"Format": self.format}
+        if self.mode:
+            basic["Mode"] = self.mode
+        if self.size:
+            basic["Size"] = f"{self.size[0]}x{self.size[1]}"
+        return basic
+
+    @property
+    def exif(self):
+        """Tag name -> typed value for IFD0, EXIF, GPS and Interop tags."""
+        if self._exif is None:
+            self._index()
+            self._exif = LazyTags(self._exif_entries, _decode_exif_pair)
+        return self._exif
+
+    @property
+    def iptc(self):
+        """IPTC-IIM application record, by dataset name."""
+        if self._iptc is None:
+            self._index()
+            self._iptc = _parse_iptc(self._iptc_blocks)
+        return self._iptc
+
+    @property
+    def xmp(self):
+        """XMP properties as 'prefix:Property' -> value, decoded per property on access."""
+        if self._xmp is None:
+            self._index()
+            self._xmp = _index_xmp(self._xmp_packets)
+        return self._xmp
+
+    @property
+    def text(self):
+        """Comments and PNG text chunks, by keyword."""
+        return LazyTags(self._text, _decode_text)
+
+    @property
+    def has_gps(self):
+        exif = self.exif
+        return "GPSLatitude" in exif or "GPSLongitude" in exif
+
+    def has_metadata(self):
+        """Check for any metadata segment without decoding it."""
+        return bool(self._exif_blobs or self._exif_entries or self._xmp_packets
+                    or self._iptc_blocks or self._text)
+
+    def to_dict(self):
+        """
+        Decode everything into the category dict used by MetadataHandler.
+
+        Binary values are replaced by a "<N bytes>" placeholder; empty
+        categories are left out.
+        """
+        categories = {
+            "EXIF": {name: _display(value) for name, value in self.exif.items()},
+            "IPTC": self.iptc,
+            "XMP": {name: _display(value) for name, value in self.xmp.items()},
+            "Text": dict(self.text),
+            "Basic": self.basic,
+        }
+        return {name: fields for name, fields in categories.items() if fields}
+
+
+def _read_subblocks(f):
+    """Read a GIF sub-block chain; returns the blocks with their length bytes."""
+    blocks = []
+    while True:
+        size = f.read(1)
+        if not size or not size[0]:
+            return blocks
+        blocks.append(size + f.read(size[0]))
+
+
+def _skip_subblocks(f):
+    """Skip a GIF sub-block chain, walking it in buffers rather than seeking per block."""
+    while True:
+        start = f.tell()
+        data = f.read(GIF_SCAN_SIZE)
+        if not data:
+            return
+        pos = 0
+        while pos < len(data):
+            if not data[pos]:
+                f.seek(start + pos + 1)
+                return
+            pos += 1 + data[pos]
+        f.seek(start + pos)
+
+
+def _read_jpeg(f):
+    meta = ImageMetadata("JPEG")
+    f.seek(2, 1)
+    while True:
+        prefix = f.read(1)
+        if prefix != b'\xff':
+            break
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            break
+        marker = marker[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker in (0xD9, 0xDA):
+            break
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            break
+        length = struct.unpack('>H', length_bytes)[0] - 2
+
+        if marker in JPEG_SOF_MARKERS:
+            frame = f.read(length)
+            if len(frame) >= 6:
+                height, width = struct.unpack('>HH', frame[1:5])
+                meta.size = (width, height)
+                meta.mode = JPEG_MODES.get(frame[5])
+        elif marker == 0xE1:
+            payload = f.read(length)
+            if payload.startswith(JPEG_EXIF_HEADER):
+                meta._exif_blobs.append(payload[len(JPEG_EXIF_HEADER):])
+            elif payload.startswith(JPEG_XMP_HEADER):
+                meta._xmp_packets.append(payload[len(JPEG_XMP_HEADER):])
+        elif marker == 0xED:
+            payload = f.read(length)
+            if payload.startswith(PHOTOSHOP_HEADER):
+                meta._iptc_blocks.extend(_photoshop_iptc(payload[len(PHOTOSHOP_HEADER):]))
+        elif marker == 0xFE:
+            meta._text["Comment"] = ('utf-8', f.read(length), False)
+        else:
+            f.seek(length, 1)
+    return meta
+
+
+def _read_png(f):
+    meta = ImageMetadata("PNG")
+    f.seek(8, 1)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type == b'IEND':
+            break
+        if chunk_type not in (b'IHDR', b'eXIf', b'tEXt', b'zTXt', b'iTXt'):
+            f.seek(length + 4, 1)
+            continue
+
+        data = f.read(length)
+        f.seek(4, 1)  # CRC
+        if chunk_type == b'IHDR' and len(data) >= 10:
+            width, height, depth, color = struct.unpack('>IIBB', data[:10])
+            meta.size = (width, height)
+            meta.mode = PNG_MODES.get((depth, color))
+        elif chunk_type == b'eXIf':
+            meta._exif_blobs.append(data)
+        elif chunk_type == b'tEXt':
+            keyword, _, text = data.partition(b'\x00')
+            meta._text[keyword.decode('latin-1')] = ('latin-1', text, False)
+        elif chunk_type == b'zTXt':
+            keyword, _, rest = data.partition(b'\x00')
+            meta._text[keyword.decode('latin-1')] = ('latin-1', rest[1:], True)
+        elif chunk_type == b'iTXt':
+            keyword, _, rest = data.partition(b'\x00')
+            compressed = rest[:1] == b'\x01'
+            _, _, rest = rest[2:].partition(b'\x00')  # language tag
+            _, _, text = rest.partition(b'\x00')       # translated keyword
+            if keyword == PNG_XMP_KEYWORD:
+                try:
+                    meta._xmp_packets.append(zlib.decompress(text) if compressed else text)
+                except zlib.error:
+                    pass
+            else:
+                meta._text[keyword.decode('latin-1')] = ('utf-8', text, compressed)
+    return meta
+
+
+def _read_webp(f):
+    meta = ImageMetadata("WEBP", mode="RGB")
+    f.seek(12, 1)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        fourcc, length = struct.unpack('<4sI', header)
+        padded = length + (length & 1)
+        if fourcc == b'VP8X':
+            data = f.read(length)
+            f.seek(padded - length, 1)
+            if len(data) >= 10:
+                meta.size = (1 + int.from_bytes(data[4:7], 'little'),
+                             1 + int.from_bytes(data[7:10], 'little'))
+                if data[0] & 0x10:  # alpha
+                    meta.mode = "RGBA"
+        elif fourcc == b'VP8 ' and meta.size is None:
+            data = f.read(10)
+            f.seek(padded - len(data), 1)
+            if len(data) == 10:
+                width, height = struct.unpack('<HH', data[6:10])
+                meta.size = (width & 0x3FFF, height & 0x3FFF)
+        elif fourcc == b'VP8L' and meta.size is None:
+            data = f.read(5)
+            f.seek(padded - len(data), 1)
+            if len(data) == 5:
+                bits = int.from_bytes(data[1:5], 'little')
+                meta.size = ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+                if bits >> 28 & 1:
+                    meta.mode = "RGBA"
+        elif fourcc == b'EXIF':
+            data = f.read(length)
+            f.seek(padded - length, 1)
+            if data.startswith(JPEG_EXIF_HEADER):
+                data = data[len(JPEG_EXIF_HEADER):]
+            meta._exif_blobs.append(data)
+        elif fourcc == b'XMP ':
+            meta._xmp_packets.append(f.read(length))
+            f.seek(padded - length, 1)
+        else:
+            f.seek(padded, 1)
+    return meta
+
+
+def _read_gif(f):
+    header = f.read(13)
+    meta = ImageMetadata("GIF", mode="P", size=struct.unpack('<HH', header[6:10]))
+    if header[10] & 0x80:
+        palette = f.read(3 << ((header[10] & 0x07) + 1))
+        # Pillow opens GIFs whose palette is a plain grey ramp as "L"
+        if all(palette[i * 3:i * 3 + 3] == bytes((i, i, i)) for i in range(len(palette) // 3)):
+            meta.mode = "L"
+
+    while True:
+        introducer = f.read(1)
+        if introducer == b'\x2c':
+            descriptor = f.read(9)
+            if len(descriptor) < 9:
+                break
+            if descriptor[8] & 0x80:
+                f.seek(3 << ((descriptor[8] & 0x07) + 1), 1)
+            f.seek(1, 1)  # LZW minimum code size
+            _skip_subblocks(f)
+        elif introducer == b'\x21':
+            label = f.read(1)
+            if label == b'\xfe':
+                text = b''.join(block[1:] for block in _read_subblocks(f))
+                meta._text["Comment"] = ('latin-1', text, False)
+            elif label == b'\xff':
+                block_size = f.read(1)
+                identifier = f.read(block_size[0]) if block_size else b''
+                data = b''.join(_read_subblocks(f))
+                if identifier[:11] == GIF_XMP_APPLICATION:
+                    # XMP is stored raw, length bytes included, then a "magic trailer"
+                    end = data.find(b'<?xpacket end')
+                    end = data.find(b'?>', end) + 2 if end >= 0 else len(data)
+                    meta._xmp_packets.append(data[:end])
+            else:
+                _skip_subblocks(f)
+        else:
+            break  # trailer, or corrupt
+    return meta
+
+
+def _read_tiff(f):
+    base = f.tell()
+
+    def read_at(offset, size):
+        f.seek(base + offset)
+        return f.read(size)
+
+    meta = ImageMetadata("TIFF")
+    structure = {}
+    meta._exif_entries, meta._xmp_packets, meta._iptc_blocks = _index_tiff(read_at, structure)
+    # The mode depends on a dozen tags; let Pillow work it out from IFD0
+    f.seek(base)
+    try:
+        with Image.open(f) as img:
+            meta.mode, meta.size = img.mode, img.size
+    except (OSError, ValueError, SyntaxError):
+        tags = LazyTags(structure, _decode_exif_pair)
+        if "ImageWidth" in tags and "ImageLength" in tags:
+            meta.size = (tags["ImageWidth"], tags["ImageLength"])
+    return meta
+
+
+def _read_with_pil(f):
+    """Fallback for formats without a native reader: basic information only."""
+    with Image.open(f) as img:
+        return ImageMetadata(img.format, mode=img.mode, size=img.size)
+
+
+_READERS = {'JPEG': _read_jpeg, 'PNG': _read_png, 'WEBP': _read_webp, 'GIF': _read_gif,
+            'TIFF': _read_tiff}
+
+
+def read_metadata(source):
+    """
+    Read an image's metadata in one pass over its headers.
+
+    JPEG, PNG, WebP, GIF and TIFF are parsed directly; pixel data is
+    skipped over, never read. Other formats only get basic information.
+
+    Args:
+        source: File path, image bytes, or a binary stream
+
+    Returns:
+        ImageMetadata: The metadata, decoded lazily on access
+    """
+    with open_input(source, seekable=True) as f:
+        start = f.tell()
+        fmt = StreamStripper().detect_format(f.read(HEADER_SIZE))
+        f.seek(start)
+        return _READERS.get(fmt, _read_with_pil)(f)
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""CPU and I/O budgets for batches that share a machine with other work."""
+
+import ctypes
+import os
+import platform
+import sys
+import threading
+import time
+
+# ioprio classes and levels (see ioprio_set(2)); level 0 is the highest of 0-7
+IO_CLASSES = {
+    "normal": (2, 4),   # best-effort, the kernel default
+    "low": (2, 7),      # best-effort, lowest level
+    "idle": (3, 0),     # only served when the disk is otherwise idle
+}
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+
+# ioprio_set syscall numbers; Python has no wrapper for it
+IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251, "amd64": 251, "aarch64": 30, "arm64": 30,
+    "i386": 289, "i686": 289, "armv7l": 314, "ppc64le": 273, "ppc64": 273, "s390x": 282,
+}
+
+# Longest single sleep while throttled, so cancellation and profile changes are noticed
+MAX_THROTTLE_SLEEP = 0.1
+
+
+class QosProfile:
+    """
+    Resource limits for a batch.
+
+    Attributes:
+        name: Profile name shown in the UI
+        workers: Most files processed at once (None = one per worker thread)
+        nice: Niceness added to worker threads, 0-19 (Linux only)
+        io_class: Key of IO_CLASSES for worker and read-ahead threads (Linux only)
+        bytes_per_second: Input bytes started per second (None = unlimited)
+        files_per_second: Files started per second (None = unlimited)
+    """
+
+    def __init__(self, name="custom", workers=None, nice=0, io_class="normal",
+                 bytes_per_second=None, files_per_second=None):
+        if io_class not in IO_CLASSES:
+            raise ValueError(f"Unknown I/O class: {io_class}")
+        if not 0 <= nice <= 19:
+            raise ValueError("Niceness must be between 0 and 19")
+        if workers is not None and workers < 1:
+            raise ValueError("Workers must be at least 1")
+        if (bytes_per_second or 0) < 0 or (files_per_second or 0) < 0:
+            raise ValueError("Rate limits must be positive")
+        self.name = name
+        self.workers = workers
+        self.nice = nice
+        self.io_class = io_class
+        self.bytes_per_second = bytes_per_second
+        self.files_per_second = files_per_second
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def describe(self):
+        """Return a one-line human-readable description."""
+        parts = [f"{self.workers or 'all'} workers", f"nice {self.nice}", f"{self.io_class} I/O"]
+        if self.bytes_per_second:
+            parts.append(f"{self.bytes_per_second / (1024 * 1024):.1f} MB/s")
+        if self.files_per_second:
+            parts.append(f"{self.files_per_second:g} files/s")
+        return f"{self.name}: " + ", ".join(parts)
+
+
+PROFILES = {
+    "foreground": QosProfile("foreground"),
+    "background": QosProfile("background", workers=max(1, (os.cpu_count() or 1) // 4),
+                             nice=10, io_class="idle"),
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: rate tokens per second, holding at most burst.
+
+    A request larger than the burst is let through once the bucket is
+    full and leaves it in debt, so big files are slowed down, never stuck.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self._lock = threading.Lock()
+        self._rate = None
+        self._burst = 0.0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        """Change the rate (None = unlimited); burst defaults to one second's worth."""
+        with self._lock:
+            self._refill()
+            # A newly limited bucket starts full
+            full = self._rate is None
+            self._rate = rate or None
+            self._burst = float(burst or rate or 0)
+            self._tokens = self._burst if full else min(self._tokens, self._burst)
+
+    def try_acquire(self, amount):
+        """
+        Take amount tokens if they are available.
+
+        Returns:
+            float: 0.0 on success, otherwise seconds until enough tokens should be available
+        """
+        with self._lock:
+            if self._rate is None:
+                return 0.0
+            self._refill()
+            needed = min(amount, self._burst)
+            if self._tokens >= needed:
+                self._tokens -= amount
+                return 0.0
+            return (needed - self._tokens) / self._rate
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate is not None:
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class QosStats:
+    """Time workers spent held back by a QosController."""
+
+    def __init__(self):
+        self.slot_wait = 0.0   # seconds waiting for one of the profile's worker slots
+        self.rate_wait = 0.0   # seconds waiting on the bytes/s and files/s limits
+        self.throttled = 0     # files that had to wait at all
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def summary(self):
+        """Return a one-line human-readable summary."""
+        return (f"Throttling: {self.throttled} files held back, {self.slot_wait:.1f}s waiting "
+                f"for a worker slot, {self.rate_wait:.1f}s for the rate limits")
+
+
+class QosController:
+    """
+    Applies a QosProfile to a running batch; the profile can be swapped at any time.
+
+    Worker threads call acquire() before each file and release() after it.
+    That limits how many files are in progress to the profile's worker
+    count and paces starts with token buckets for bytes and files per
+    second. apply_to_thread() gives the calling thread the profile's
+    niceness and I/O class; it is cheap and is called before every file,
+    so a profile change reaches threads that are already running. Only
+    batch threads are changed, never the thread driving the UI.
+    """
+
+    def __init__(self, profile=None):
+        self.profile = profile or PROFILES["foreground"]
+        self.stats = QosStats()
+        self.generation = 0
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._bytes = TokenBucket()
+        self._files = TokenBucket()
+        self._local = threading.local()
+        self._set_buckets(self.profile)
+
+    def set_profile(self, profile):
+        """Switch to another profile; waiting and running workers pick it up on their next file."""
+        with self._cond:
+            self.profile = profile
+            self.generation += 1
+            self._set_buckets(profile)
+            self._cond.notify_all()
+
+    def reset_stats(self):
+        """Start counting throttling afresh, e.g. for a new batch."""
+        with self._cond:
+            self.stats = QosStats()
+
+    def _set_buckets(self, profile):
+        self._bytes.set_rate(profile.bytes_per_second)
+        # Allow a burst of at least one file so slow rates still start promptly
+        self._files.set_rate(profile.files_per_second,
+                             max(1.0, profile.files_per_second or 0))
+
+    def acquire(self, size=0, cancel=None):
+        """
+        Wait until the profile allows starting a file of size bytes.
+
+        Args:
+            size: Input size of the file, charged to the bytes/s budget
+            cancel: Optional threading.Event that aborts the wait
+
+        Returns:
+            bool: True with a worker slot held (call release()), False if cancelled
+        """
+        start = time.perf_counter()
+        with self._cond:
+            while self.profile.workers and self._active >= self.profile.workers:
+                if cancel is not None and cancel.is_set():
+                    return False
+                self._cond.wait(MAX_THROTTLE_SLEEP)
+            self._active += 1
+        slot_wait = time.perf_counter() - start
+
+        for bucket, amount in ((self._files, 1), (self._bytes, size or 0)):
+            while True:
+                delay = bucket.try_acquire(amount)
+                if not delay:
+                    break
+                if cancel is not None and cancel.is_set():
+                    self.release()
+                    return False
+                time.sleep(min(delay, MAX_THROTTLE_SLEEP))
+
+        waited = time.perf_counter() - start
+        with self._cond:
+            self.stats.slot_wait += slot_wait
+            self.stats.rate_wait += waited - slot_wait
+            if waited > 0.001:
+                self.stats.throttled += 1
+        return True
+
+    def release(self):
+        """Give back the worker slot taken by acquire()."""
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def apply_to_thread(self):
+        """Give the calling thread the current profile's niceness and I/O class."""
+        generation = self.generation
+        if getattr(self._local, "generation", None) == generation:
+            return
+        set_thread_nice(self.profile.nice)
+        set_thread_io_class(self.profile.io_class)
+        self._local.generation = generation
+
+
+def set_thread_nice(nice):
+    """
+    Set the calling thread's niceness, where the platform supports per-thread values.
+
+    Linux schedules threads individually, so this leaves the rest of the
+    process alone. Lowering the niceness again needs privileges and is
+    skipped silently when they are missing.
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+        return True
+    except OSError:
+        return False
+
+
+_syscall = None
+
+
+def set_thread_io_class(io_class):
+    """
+    Set the calling thread's I/O scheduling class via ioprio_set(2) on Linux.
+
+    Only schedulers that honour I/O priorities (BFQ, CFQ) act on it;
+    elsewhere it is harmless. Other platforms are skipped.
+    """
+    global _syscall
+    number = IOPRIO_SET_SYSCALLS.get(platform.machine().lower())
+    if not sys.platform.startswith("linux") or number is None:
+        return False
+    if _syscall is None:
+        try:
+            _syscall = ctypes.CDLL(None, use_errno=True).syscall
+        except (OSError, AttributeError):
+            _syscall = False
+    if not _syscall:
+        return False
+
+    io_prio_class, level = IO_CLASSES[io_class]
+    value = (io_prio_class << IOPRIO_CLASS_SHIFT) | level
+    return _syscall(number, IOPRIO_WHO_PROCESS, threading.get_native_id(), value) == 0
\ No newline at end of file
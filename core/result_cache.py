@@ -0,0 +1,331 @@
+"""Content-addressed cache for processed image results."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+from utils.fast_io import clone_file, reflink
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+from utils.helpers import fsync_path
+
+# Bump whenever an operation's output would change for the same input,
+# so stale entries are never handed back.
+CACHE_VERSION = 6
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Seconds between index writes while storing; flush() writes the rest
+INDEX_SAVE_INTERVAL = 5.0
+
+
+def hash_file(file_path):
+    """
+    Compute a fast content hash of a file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_operation(operation, params=()):
+    """
+    Build the canonical encoding of an operation and its parameters.
+
+    Args:
+        operation: Operation name (e.g. "strip", "resize")
+        params: Sequence of parameters
+
+    Returns:
+        str: Canonical form such as "resize(1920,1080,True)"
+    """
+    return f"{operation}({','.join(repr(p) for p in params)})"
+
+
+class ResultCache:
+    """
+    Opt-in cache of operation outputs keyed by input content.
+
+    Entries are stored as files under ``cache_dir/blobs`` and evicted in
+    least-recently-used order once ``max_bytes`` is exceeded. Outputs are
+    handed back with a reflink clone where the filesystem supports it, and
+    fall back to a plain copy. Hardlinks are only used with
+    ``allow_hardlink=True``, since a later in-place write to the linked
+    file would also change the cached entry.
+
+    The index is written at most every INDEX_SAVE_INTERVAL seconds while
+    results are stored; call flush() when a batch ends. Blobs the index
+    does not list (from an older CACHE_VERSION, an unreadable index or a
+    crash before the index was written) are deleted on load, but only
+    when no other process has the cache open and only if they predate the
+    index, so another process's not yet indexed results are never lost.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024, allow_hardlink=False):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.allow_hardlink = allow_hardlink
+
+        self._blob_dir = self.cache_dir / "blobs"
+        self._index_path = self.cache_dir / "index.json"
+        self._lock_file = None  # shared lock on cache_dir/.lock while this cache is open
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {"size": ..., "cost": ...}, LRU first
+        self._total_bytes = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self.seconds_saved = 0.0
+
+        self._blob_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def make_key(self, image_path, operation, params=()):
+        """
+        Build the cache key for running an operation on a file.
+
+        Args:
+            image_path: Path to the input file
+            operation: Operation name
+            params: Sequence of operation parameters
+
+        Returns:
+            str: Cache key
+        """
+        content = hash_file(image_path)
+        encoded = f"v{CACHE_VERSION}:{content}:{encode_operation(operation, params)}"
+        return hashlib.blake2b(encoded.encode('utf-8'), digest_size=20).hexdigest()
+
+    def fetch(self, key, dest_path):
+        """
+        Place the cached output for key at dest_path.
+
+        Returns:
+            bool: True on a cache hit, False on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False
+            self._entries.move_to_end(key)
+            self._dirty = True
+
+        blob = self._blob_dir / key
+        try:
+            self._place(blob, Path(dest_path))
+        except FileNotFoundError:
+            # Blob removed behind our back; treat as a miss
+            with self._lock:
+                self._drop(key)
+                self.misses += 1
+            return False
+
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += entry["size"]
+            self.seconds_saved += entry.get("cost", 0.0)
+        return True
+
+    def store(self, key, output_path, cost=0.0):
+        """
+        Store a processed output under key.
+
+        Args:
+            key: Cache key from make_key
+            output_path: Path to the processed output file
+            cost: Seconds spent computing the output
+        """
+        size = os.path.getsize(output_path)
+        if size > self.max_bytes:
+            return
+
+        blob = self._blob_dir / key
+        tmp = self._blob_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        clone_file(output_path, tmp)
+        os.replace(tmp, blob)
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key]["size"]
+            self._entries[key] = {"size": size, "cost": cost}
+            self._entries.move_to_end(key)
+            self._total_bytes += size
+            self._evict()
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= INDEX_SAVE_INTERVAL:
+                self._save_index()
+
+    def apply(self, image_path, operation, params, func):
+        """
+        Run an in-place operation through the cache.
+
+        Args:
+            image_path: Path to the file the operation rewrites in place
+            operation: Operation name
+            params: Sequence of operation parameters
+            func: Callable performing the operation on image_path
+
+        Returns:
+            bool: True if the result came from the cache
+        """
+        key = self.make_key(image_path, operation, params)
+        if self.fetch(key, image_path):
+            return True
+
+        start = time.perf_counter()
+        func()
+        self.store(key, image_path, time.perf_counter() - start)
+        return False
+
+    def get_stats(self):
+        """Return hit/miss statistics for the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "bytes_served": self.bytes_served,
+                "seconds_saved": self.seconds_saved,
+            }
+
+    def flush(self):
+        """Persist the index: entries stored and recency updates from cache hits."""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self._save_index()
+
+    def _place(self, blob, dest):
+        """Materialize a blob at dest, replacing it atomically."""
+        tmp = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            if not self.allow_hardlink:
+                clone_file(blob, tmp)
+            elif not reflink(blob, tmp):
+                try:
+                    os.link(blob, tmp)
+                except OSError:
+                    clone_file(blob, tmp)
+            fsync_path(tmp)
+            if dest.exists() and not self.allow_hardlink:
+                shutil.copymode(dest, tmp)
+            os.replace(tmp, dest)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _evict(self):
+        """Evict least recently used entries until under the size cap."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key):
+        """Forget an entry and delete its blob."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry["size"]
+        try:
+            os.unlink(self._blob_dir / key)
+        except OSError:
+            pass
+        self._dirty = True
+
+    def _load_index(self):
+        """Load the LRU index, dropping entries without a blob and blobs without an entry."""
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+
+        if data.get("version") != CACHE_VERSION:
+            data = {}
+
+        for key, entry in data.get("entries", []):
+            if (self._blob_dir / key).exists():
+                self._entries[key] = entry
+                self._total_bytes += entry["size"]
+
+        if self._open_exclusively():
+            self._sweep_blobs()
+        self._evict()
+
+    def _open_exclusively(self):
+        """
+        Take this cache's shared lock on the directory.
+
+        Returns:
+            bool: True if no other process had the cache open (always True without fcntl)
+        """
+        if fcntl is None:
+            return True
+        self._lock_file = open(self.cache_dir / ".lock", 'a+b')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            alone = True
+        except OSError:
+            alone = False
+        fcntl.flock(self._lock_file, fcntl.LOCK_SH)
+        return alone
+
+    def _sweep_blobs(self):
+        """Delete blobs the index does not list and that are older than the index."""
+        try:
+            index_mtime = os.stat(self._index_path).st_mtime
+        except OSError:
+            return  # nothing written yet; a store may be in progress
+        with os.scandir(self._blob_dir) as it:
+            for blob in it:
+                if blob.name.startswith(".") or blob.name in self._entries:
+                    continue  # temporary files belong to a store in progress
+                try:
+                    if blob.stat().st_mtime < index_mtime:
+                        os.unlink(blob.path)
+                except OSError:
+                    pass
+
+    def _save_index(self):
+        """Write the LRU index atomically."""
+        tmp = self._index_path.with_name(f".index.{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "entries": list(self._entries.items())}, f)
+        os.replace(tmp, self._index_path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
\ No newline at end of file
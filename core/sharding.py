@@ -0,0 +1,309 @@
+"""Deterministic sharding of batch runs and mergeable result manifests."""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+from core.result_cache import hash_file
+from utils.helpers import iter_image_files
+
+MANIFEST_VERSION = 1
+
+
+def parse_shard(text):
+    """
+    Parse a shard specification such as "2/8".
+
+    Shards are numbered from 1, so "1/8" through "8/8" cover the whole set.
+
+    Returns:
+        tuple: (index, count)
+    """
+    try:
+        index, count = (int(part) for part in str(text).split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard: {text} (expected INDEX/COUNT, e.g. 1/4)")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard: {text} (INDEX must be between 1 and COUNT)")
+    return index, count
+
+
+def shard_of(key, count):
+    """Return the 1-based shard a key belongs to; stable across hosts and Python runs."""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
+
+
+def iter_keyed_files(paths, recursive=False):
+    """
+    Yield (path, key) for the image files under paths.
+
+    The key is the file's path relative to the folder argument it was found
+    under (just its name for a file argument), so hosts that mount a shared
+    filesystem at different places still agree on every file's shard. With
+    several arguments the key starts with the argument's own name, so A/x.jpg
+    and B/x.jpg stay apart; arguments sharing a name are rejected.
+
+    Raises:
+        ValueError: If two arguments have the same name
+    """
+    roots = [Path(path) for path in paths]
+    prefixed = len(roots) > 1
+    if prefixed:
+        names = {}
+        for root in roots:
+            name = root.resolve().name
+            if name in names:
+                raise ValueError(f"{names[name]} and {root} have the same name, so their files "
+                                 f"would get the same shard keys; process them separately")
+            names[name] = root
+
+    for root in roots:
+        prefix = root.resolve().name + "/" if prefixed and root.is_dir() else ""
+        for path in iter_image_files([root], recursive=recursive):
+            key = path.relative_to(root).as_posix() if root.is_dir() else path.name
+            yield path.resolve(), prefix + key
+
+
+def select_shard(paths, index, count, recursive=False):
+    """
+    Return the files of one shard.
+
+    Returns:
+        list: (absolute path, key) pairs belonging to shard index of count
+    """
+    return [(path, key) for path, key in iter_keyed_files(paths, recursive)
+            if shard_of(key, count) == index]
+
+
+class ShardManifest:
+    """
+    Append-only JSONL record of what one shard did to each of its files.
+
+    The first line identifies the shard and the batch; then one entry per
+    processed file (key, path, status, input/output hashes and sizes,
+    seconds); an end record closes a completed run. A resumed run appends
+    to the same manifest, and later entries for a key replace earlier ones.
+    """
+
+    def __init__(self, path, keys):
+        self.path = Path(path)
+        self.keys = keys
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._counts = {"done": 0, "failed": 0}
+        self._start = time.perf_counter()
+
+    @classmethod
+    def create(cls, path, index, count, operation, params, keys, encode=None):
+        """
+        Start a manifest for a shard.
+
+        Args:
+            path: Manifest file to create
+            index: 1-based shard index
+            count: Number of shards
+            operation: Batch operation name
+            params: Operation parameters
+            keys: Dict of absolute path string -> shard key for the shard's files
+            encode: EncodeOptions.to_dict() of the run
+        """
+        with open(path, 'x', encoding='utf-8') as f:
+            f.write(json.dumps({"event": "shard", "version": MANIFEST_VERSION,
+                                "index": index, "count": count,
+                                "operation": operation, "params": list(params), "encode": encode,
+                                "items": len(keys), "host": socket.gethostname(),
+                                "pid": os.getpid(), "started": time.time()}) + "\n")
+        return cls(path, keys)
+
+    @classmethod
+    def reopen(cls, path, keys):
+        """Continue a manifest for a resumed run."""
+        manifest = cls(path, keys)
+        manifest._write({"event": "resume", "host": socket.gethostname(),
+                         "pid": os.getpid(), "time": time.time()})
+        return manifest
+
+    def wrap(self, func):
+        """
+        Return func with a manifest entry recorded around each call.
+
+        Exceptions are recorded and re-raised, so the batch runner still
+        sees the failure.
+        """
+        def recorded(path):
+            path = str(path)
+            entry = {"key": self.keys.get(path, Path(path).name), "path": path}
+            try:
+                entry["input_size"] = os.path.getsize(path)
+                entry["input_hash"] = hash_file(path)
+                start = time.perf_counter()
+                func(path)
+                entry["seconds"] = round(time.perf_counter() - start, 4)
+                entry["output_size"] = os.path.getsize(path)
+                entry["output_hash"] = hash_file(path)
+                entry["status"] = "done"
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+                self._write(entry)
+                raise
+            self._write(entry)
+
+        return recorded
+
+    def close(self, finished):
+        """Write the end record for a completed run and close the file."""
+        if finished:
+            self._write({"event": "end", "done": self._counts["done"],
+                         "failed": self._counts["failed"],
+                         "elapsed": round(time.perf_counter() - self._start, 3),
+                         "time": time.time()})
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def _write(self, record):
+        with self._lock:
+            if "status" in record:
+                self._counts[record["status"]] += 1
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+
+class MergeReport:
+    """The combined outcome of all shard manifests of a batch."""
+
+    def __init__(self, count):
+        self.count = count
+        self.items = {}       # shard index -> files the shard was given
+        self.recorded = {}    # shard index -> distinct keys with an entry
+        self.finished = set()
+        self.done = 0
+        self.failed = []      # (key, error)
+        self.misplaced = []   # keys found in a shard they do not hash to
+        self.missing = []     # expected keys without an entry (only with expect)
+
+    @property
+    def missing_shards(self):
+        return sorted(set(range(1, self.count + 1)) - set(self.items))
+
+    @property
+    def unfinished_shards(self):
+        return sorted(set(self.items) - self.finished)
+
+    @property
+    def gaps(self):
+        """Files a shard was given but has no entry for, summed over shards."""
+        return sum(max(0, self.items[index] - self.recorded.get(index, 0)) for index in self.items)
+
+    @property
+    def complete(self):
+        return not (self.missing_shards or self.unfinished_shards or self.gaps
+                    or self.failed or self.misplaced or self.missing)
+
+    def summary(self):
+        """Return a multi-line human-readable summary."""
+        lines = [f"{len(self.items)}/{self.count} shards reported, {len(self.finished)} finished",
+                 f"{self.done} done, {len(self.failed)} failed, {self.gaps} not processed"]
+        if self.missing_shards:
+            lines.append("Missing shards: " + ", ".join(map(str, self.missing_shards)))
+        if self.unfinished_shards:
+            lines.append("Unfinished shards: " + ", ".join(map(str, self.unfinished_shards)))
+        if self.misplaced:
+            lines.append(f"{len(self.misplaced)} entries in the wrong shard")
+        if self.missing:
+            lines.append(f"{len(self.missing)} expected files have no entry")
+        return "\n".join(lines)
+
+
+def _read_manifest(path):
+    """Return (header, entries by key, finished) for one manifest file."""
+    header, entries, finished = None, {}, False
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn by a crash
+            event = record.get("event")
+            if event == "shard":
+                header = record
+            elif event == "end":
+                finished = True
+            elif event == "resume":
+                finished = False
+            elif "key" in record:
+                entries[record["key"]] = record
+    if header is None or header.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Not a shard manifest: {path}")
+    return header, entries, finished
+
+
+def merge_manifests(manifest_paths, output=None, expect=None, recursive=False):
+    """
+    Combine the manifests of a sharded batch and find the gaps.
+
+    Shards are merged one at a time, so memory is bounded by the largest
+    shard rather than the whole batch. The exception is expect: checking it
+    keeps the key of every entry until the end (roughly 100 bytes per file).
+
+    Args:
+        manifest_paths: Manifest files (several per shard are allowed)
+        output: Optional writable text stream for the merged entries
+        expect: Optional original paths; every file under them must have an entry
+        recursive: Whether expect folders were walked recursively
+
+    Returns:
+        MergeReport: Totals, failures and gaps
+    """
+    headers = {}
+    for path in manifest_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+        if header.get("event") != "shard":
+            raise ValueError(f"Not a shard manifest: {path}")
+        headers[path] = header
+    if not headers:
+        raise ValueError("No manifests given")
+
+    first = next(iter(headers.values()))
+    for path, header in headers.items():
+        for field in ("count", "operation", "params"):
+            if header[field] != first[field]:
+                raise ValueError(f"{path} belongs to a different batch ({field} differs)")
+
+    report = MergeReport(first["count"])
+    seen = set() if expect is not None else None
+    for index in sorted({header["index"] for header in headers.values()}):
+        entries, finished = {}, False
+        for path in (p for p, header in headers.items() if header["index"] == index):
+            header, shard_entries, shard_finished = _read_manifest(path)
+            entries.update(shard_entries)
+            finished = finished or shard_finished
+            report.items[index] = max(report.items.get(index, 0), header["items"])
+        if finished:
+            report.finished.add(index)
+        report.recorded[index] = len(entries)
+
+        for key in sorted(entries):
+            entry = entries[key]
+            if shard_of(key, report.count) != index:
+                report.misplaced.append(key)
+            if entry["status"] == "done":
+                report.done += 1
+            else:
+                report.failed.append((key, entry.get("error", "")))
+            if seen is not None:
+                seen.add(key)
+            if output is not None:
+                output.write(json.dumps(dict(entry, shard=index)) + "\n")
+
+    if expect is not None:
+        report.missing = [key for _, key in iter_keyed_files(expect, recursive) if key not in seen]
+    return report
\ No newline at end of file
@@ -0,0 +1,315 @@
+"""Shared-memory pixel buffers that worker processes decode into and the UI reads in place."""
+
+import atexit
+import itertools
+import os
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+# Modes whose pixels Pillow can map from a buffer as-is; RGB is stored padded as RGBX
+SHARED_MODES = {"L": 1, "RGBX": 4, "RGBA": 4}
+
+
+class SlotHandle:
+    """Picklable address of one slot, sent to the worker process that fills it."""
+
+    __slots__ = ("name", "offset", "size")
+
+    def __init__(self, name, offset, size):
+        self.name = name
+        self.offset = offset
+        self.size = size
+
+    def __getstate__(self):
+        return (self.name, self.offset, self.size)
+
+    def __setstate__(self, state):
+        self.name, self.offset, self.size = state
+
+
+class BufferLease:
+    """
+    One slot of a SharedBufferPool, held until released.
+
+    Call release() when done with the slot. Images built with to_image()
+    read the slot in place, so from then on the slot belongs to the image
+    and returns to the pool only when the image is garbage collected;
+    release() never frees memory an image still shows.
+    """
+
+    def __init__(self, pool, index, owner):
+        self.pool = pool
+        self.index = index
+        self.owner = owner
+        self.handle = SlotHandle(pool.name, index * pool.slot_size, pool.slot_size)
+        self.acquired = time.monotonic()
+        self._released = False
+        self._images = 0
+
+    @property
+    def view(self):
+        """Writable memoryview of the whole slot."""
+        return self.pool._slot_view(self.index)
+
+    def to_image(self, mode, size):
+        """
+        Wrap the slot's pixels in a PIL image without copying them.
+
+        Args:
+            mode: One of SHARED_MODES
+            size: (width, height)
+
+        Returns:
+            PIL.Image: Read-only view; Pillow copies it before any in-place change
+        """
+        width, height = size
+        nbytes = width * height * SHARED_MODES[mode]
+        if nbytes > self.pool.slot_size:
+            raise ValueError(f"{width}x{height} {mode} does not fit a {self.pool.slot_size} byte slot")
+        img = Image.frombuffer(mode, size, self.view[:nbytes], "raw", mode, 0, 1)
+        with self.pool._lock:
+            self._images += 1
+        weakref.finalize(img, self._image_collected)
+        return img
+
+    def release(self):
+        """Give the slot back, or hand it to the images built from it. Safe to call twice."""
+        with self.pool._lock:
+            if self._released:
+                return
+            self._released = True
+            if self._images:
+                return
+        self.pool._free(self)
+
+    def _image_collected(self):
+        with self.pool._lock:
+            self._images -= 1
+            if self._images or not self._released:
+                return
+        self.pool._free(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def __repr__(self):
+        age = time.monotonic() - self.acquired
+        state = f"{self._images} images" if self._images else "no images"
+        return f"<BufferLease slot {self.index} owner={self.owner!r} age={age:.1f}s {state}>"
+
+
+class SharedBufferPool:
+    """
+    Fixed-size slots in one shared memory segment, handed out as BufferLeases.
+
+    The process that creates the pool owns it: only it acquires and frees
+    slots, so slot bookkeeping needs no cross-process locking. A worker
+    process receives a lease's handle, writes pixels into the slot with
+    write_shared_image() and returns just the mode and size; the owner
+    then builds the image from the slot with no copy and no pickling of
+    pixel data. close() reports every slot still held, so leaked leases
+    show up at shutdown instead of silently pinning memory.
+    """
+
+    def __init__(self, slot_size, slot_count):
+        """
+        Args:
+            slot_size: Bytes per slot (width * height * 4 for the largest RGBA image)
+            slot_count: Number of slots; acquire() returns None while all are held
+        """
+        self.slot_size = slot_size
+        self.slot_count = slot_count
+        self._shm = shared_memory.SharedMemory(create=True, size=slot_size * slot_count)
+        self.name = self._shm.name
+        self._buffer = memoryview(self._shm.buf)
+
+        # Reentrant: an image finalizer can return its slot from inside a locked section
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._free_slots = list(range(slot_count - 1, -1, -1))  # reuse recent, likely cached, slots
+        self._leases = {}  # index -> BufferLease
+        self._closed = False
+        self._owners = itertools.count()
+
+        self.acquired = 0
+        self.exhausted = 0   # acquire() calls that found no free slot in time
+        self.peak_in_use = 0
+
+    def acquire(self, owner=None, timeout=0):
+        """
+        Take a free slot.
+
+        Args:
+            owner: Label reported if the lease leaks (default: a sequence number)
+            timeout: Seconds to wait for a slot; 0 returns at once, None waits indefinitely
+
+        Returns:
+            BufferLease: The slot, or None if none became free or the pool is closed
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free_slots or self._closed, timeout):
+                self.exhausted += 1
+                return None
+            if self._closed:
+                return None
+            index = self._free_slots.pop()
+            lease = BufferLease(self, index, next(self._owners) if owner is None else owner)
+            self._leases[index] = lease
+            self.acquired += 1
+            self.peak_in_use = max(self.peak_in_use, len(self._leases))
+            return lease
+
+    @property
+    def in_use(self):
+        with self._lock:
+            return len(self._leases)
+
+    def get_stats(self):
+        """
+        Return pool statistics.
+
+        Returns:
+            dict: slot_size, slot_count, in_use, peak_in_use, acquired, exhausted
+        """
+        with self._lock:
+            return {
+                "slot_size": self.slot_size,
+                "slot_count": self.slot_count,
+                "in_use": len(self._leases),
+                "peak_in_use": self.peak_in_use,
+                "acquired": self.acquired,
+                "exhausted": self.exhausted,
+            }
+
+    def close(self):
+        """
+        Destroy the segment and report leases that were never given back.
+
+        Slots still shown by live images keep their mapping until those
+        images go away; the segment's name is removed either way, so the
+        memory is freed once the last mapping closes.
+
+        Returns:
+            list: BufferLease objects still held (empty when nothing leaked)
+        """
+        with self._cond:
+            if self._closed:
+                return []
+            self._closed = True
+            leaked = sorted(self._leases.values(), key=lambda lease: lease.index)
+            self._cond.notify_all()
+
+        try:
+            self._buffer.release()
+            self._shm.close()
+        except BufferError:
+            pass  # images built from leaked slots still map the segment
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        return leaked
+
+    def _slot_view(self, index):
+        start = index * self.slot_size
+        return self._buffer[start:start + self.slot_size]
+
+    def _free(self, lease):
+        with self._cond:
+            if self._closed or self._leases.get(lease.index) is not lease:
+                return
+            del self._leases[lease.index]
+            self._free_slots.append(lease.index)
+            self._cond.notify()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def available_shared_memory():
+    """
+    Return the bytes free for shared memory segments.
+
+    Segments are allocated as they are written, so a pool larger than
+    this fails only when filled (SIGBUS on Linux). Returns None where the
+    limit cannot be read, e.g. on Windows.
+    """
+    try:
+        stat = os.statvfs("/dev/shm")
+    except (OSError, AttributeError):
+        return None
+    return stat.f_bavail * stat.f_frsize
+
+
+# Segments attached by this (worker) process, by name
+_attached = {}
+_attach_lock = threading.Lock()
+
+
+def _attach(name):
+    with _attach_lock:
+        segment = _attached.get(name)
+        if segment is None:
+            try:
+                # Python 3.13+: the owning process alone tracks and unlinks the segment
+                shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                shm = shared_memory.SharedMemory(name=name)
+            segment = _attached[name] = (shm, memoryview(shm.buf))
+        return segment[1]
+
+
+@atexit.register
+def _detach_all():
+    """Unmap attached segments before exit, so SharedMemory.__del__ does not complain."""
+    with _attach_lock:
+        for shm, view in _attached.values():
+            try:
+                view.release()
+                shm.close()
+            except BufferError:
+                pass
+        _attached.clear()
+
+
+def write_shared_image(handle, img):
+    """
+    Copy an image's pixels into a slot from any process.
+
+    RGB and palette images are stored as RGBX and grayscale as L, the
+    modes Pillow can later map in place; anything else becomes RGBA.
+
+    Args:
+        handle: SlotHandle of a lease held by the owning process
+        img: PIL image that fits the slot
+
+    Returns:
+        tuple: (mode, size) to pass to BufferLease.to_image(), or None
+               if the image does not fit the slot
+    """
+    if img.mode in SHARED_MODES:
+        mode = img.mode
+    elif img.mode in ("RGB", "P", "1", "CMYK", "YCbCr") and "transparency" not in img.info:
+        mode = "RGBX" if img.mode != "1" else "L"
+    else:
+        mode = "RGBA"
+    nbytes = img.width * img.height * SHARED_MODES[mode]
+    if nbytes > handle.size:
+        return None
+    if img.mode != mode:
+        img = img.convert(mode)
+
+    # tobytes() packs rows exactly as to_image() maps them; the one extra
+    # copy happens in the worker, never in the process showing the image
+    _attach(handle.name)[handle.offset:handle.offset + nbytes] = img.tobytes("raw", mode)
+    return mode, img.size
\ No newline at end of file
@@ -0,0 +1,486 @@
+"""Byte-level metadata stripping that works on streams."""
+
+import io
+import re
+import struct
+
+from core.tiff_stripper import TiffStripper, is_tiff
+from utils.fast_io import copy_range, copy_rest
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Enough bytes to recognise every supported container
+HEADER_SIZE = 16
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Ancillary PNG chunks that affect how pixels are rendered. Every other
+# ancillary chunk (tEXt, zTXt, iTXt, eXIf, tIME, private chunks) is dropped.
+PNG_KEEP_CHUNKS = {
+    b'tRNS', b'gAMA', b'cHRM', b'sRGB', b'iCCP', b'sBIT', b'bKGD', b'pHYs',
+    b'hIST', b'cICP', b'mDCV', b'cLLI',
+    b'acTL', b'fcTL', b'fdAT',  # APNG animation
+}
+
+# RIFF chunks that make up the WebP bitstream. EXIF, XMP and unknown
+# chunks are dropped.
+WEBP_KEEP_CHUNKS = {b'VP8 ', b'VP8L', b'VP8X', b'ALPH', b'ANIM', b'ANMF', b'ICCP'}
+
+# VP8X flag bits announcing EXIF and XMP chunks
+WEBP_EXIF_FLAG = 0x08
+WEBP_XMP_FLAG = 0x04
+
+# GIF application extensions that carry no metadata: animation looping
+# and the embedded colour profile
+GIF_KEEP_APPLICATIONS = {b'NETSCAPE2.0', b'ANIMEXTS1.0', b'ICCRGBG1012'}
+
+# Sub-block chains are scanned in buffers of this size
+GIF_SCAN_SIZE = 64 * 1024
+
+# JPEG markers without a length field
+JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+
+# A marker that ends entropy-coded data: 0xFF not followed by a stuffed
+# zero, a restart marker or another 0xFF fill byte
+JPEG_SEGMENT_END = re.compile(rb'\xff[^\x00\xd0-\xd7\xff]')
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when a stream has no byte-level stripping path."""
+
+
+def _is_seekable(f):
+    """Check whether a stream supports seek/tell."""
+    try:
+        return bool(f.seekable())
+    except (AttributeError, ValueError, OSError):
+        return False
+
+
+class _Reader:
+    """Sequential reader over a stream whose first bytes were already read."""
+
+    def __init__(self, src, head=b''):
+        self.src = src
+        self.head = head
+        self.changed = False  # set once the output can no longer equal the input
+
+    def read(self, size):
+        """Read up to size bytes."""
+        if self.head:
+            data, self.head = self.head[:size], self.head[size:]
+            if len(data) < size:
+                data += self.src.read(size - len(data)) or b''
+            return data
+        return self.src.read(size) or b''
+
+    def read_exact(self, size):
+        """Read exactly size bytes or raise EOFError."""
+        data = self.read(size)
+        while len(data) < size:
+            more = self.src.read(size - len(data))
+            if not more:
+                raise EOFError("Unexpected end of image data")
+            data += more
+        return data
+
+    def _drain_head(self, dst, size):
+        """Write up to size bytes of the already-read head to dst; return how many."""
+        if not self.head:
+            return 0
+        data, self.head = self.head[:size], self.head[size:]
+        dst.write(data)
+        return len(data)
+
+    def copy(self, dst, size):
+        """Copy exactly size bytes to dst, letting the kernel move them where it can."""
+        size -= self._drain_head(dst, size)
+        if size > 0:
+            copy_range(self.src, dst, size)
+
+    def skip(self, size):
+        """Discard exactly size bytes."""
+        while size > 0:
+            chunk = self.read(min(size, COPY_CHUNK_SIZE))
+            if not chunk:
+                raise EOFError("Unexpected end of image data")
+            size -= len(chunk)
+
+    def sub_blocks(self, dst=None):
+        """
+        Copy (or with no dst, skip) a GIF sub-block chain up to and including its terminator.
+
+        Lengths are walked inside large buffers rather than reading each
+        sub-block separately, which keeps long LZW streams fast.
+        """
+        while True:
+            buf = self.read(GIF_SCAN_SIZE)
+            if not buf:
+                raise EOFError("Unexpected end of image data")
+
+            pos = 0
+            while pos < len(buf):
+                size = buf[pos]
+                if size == 0:
+                    end = pos + 1
+                    if dst is not None:
+                        dst.write(buf[:end])
+                    self.head = buf[end:] + self.head
+                    return
+                pos += size + 1
+
+            # The last sub-block runs past the buffer
+            if dst is not None:
+                dst.write(buf)
+                self.copy(dst, pos - len(buf))
+            else:
+                self.skip(pos - len(buf))
+
+    def copy_entropy(self, dst):
+        """
+        Copy JPEG entropy-coded data up to (not including) the marker that ends it.
+
+        Returns:
+            bool: True if a marker follows, False if the stream ended first
+        """
+        while True:
+            buf = self.read(COPY_CHUNK_SIZE)
+            if not buf:
+                return False
+            match = JPEG_SEGMENT_END.search(buf)
+            if match is not None:
+                dst.write(buf[:match.start()])
+                self.head = buf[match.start():] + self.head
+                return True
+            # A trailing 0xFF may start a marker; decide with the next chunk
+            if buf.endswith(b'\xff') and len(buf) > 1:
+                dst.write(buf[:-1])
+                self.head = b'\xff' + self.head
+            else:
+                dst.write(buf)
+
+    def copy_rest(self, dst):
+        """Copy everything up to end of stream to dst."""
+        self._drain_head(dst, len(self.head))
+        copy_rest(self.src, dst)
+
+
+class StreamStripper:
+    """
+    Removes metadata by rewriting container structures, never pixel data.
+
+    Each format is handled in a single sequential pass over the input with
+    memory bounded by the largest metadata segment, so it works on pipes,
+    archive members and other non-seekable streams. TIFF is the exception:
+    its IFDs can live anywhere in the file, so a non-seekable TIFF source
+    is buffered in memory first. GIF animations keep every frame, since
+    the LZW image data is copied through untouched.
+    """
+
+    def detect_format(self, head):
+        """
+        Identify the container format from the first bytes of a file.
+
+        Args:
+            head: At least HEADER_SIZE bytes from the start of the file
+
+        Returns:
+            str: Format name, or None if no byte-level path exists
+        """
+        if head.startswith(b'\xff\xd8\xff'):
+            return 'JPEG'
+        if head.startswith(PNG_SIGNATURE):
+            return 'PNG'
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'WEBP'
+        if is_tiff(head):
+            return 'TIFF'
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return 'GIF'
+        return None
+
+    def can_strip(self, head):
+        """Check whether a byte-level path exists for this file header."""
+        return self.detect_format(head) is not None
+
+    def strip(self, src, dst, head=None):
+        """
+        Copy src to dst without metadata.
+
+        Args:
+            src: Readable binary stream positioned at the start of the image
+                 (or just after head, if head is given)
+            dst: Writable binary stream
+            head: Bytes already consumed from src
+
+        Returns:
+            str: Detected format name
+        """
+        if head is None:
+            head = src.read(HEADER_SIZE)
+        fmt = self.detect_format(head)
+        if fmt is None:
+            raise UnsupportedFormatError("No byte-level stripper for this format")
+
+        return self.strip_file(src, dst, head)[0]
+
+    def strip_file(self, src, dst, head=None):
+        """
+        Copy src to dst without metadata and report whether anything was removed.
+
+        Args:
+            src: Readable binary stream positioned at the start of the image
+                 (or just after head, if head is given)
+            dst: Writable binary stream
+            head: Bytes already consumed from src
+
+        Returns:
+            tuple: (format name, whether the output differs from the input)
+        """
+        if head is None:
+            head = src.read(HEADER_SIZE)
+        fmt = self.detect_format(head)
+        if fmt is None:
+            raise UnsupportedFormatError("No byte-level stripper for this format")
+
+        reader = _Reader(src, head)
+        getattr(self, f"_strip_{fmt.lower()}")(reader, dst)
+        return fmt, reader.changed
+
+    def _strip_jpeg(self, reader, dst):
+        """
+        Drop APPn (except JFIF, ICC and Adobe) and COM segments, up to the primary image's EOI.
+
+        The entropy-coded data after each SOS is scanned for the next
+        marker, so segments between progressive scans are filtered too.
+        Anything after the EOI, such as the secondary images phones append
+        (MPF previews, gain and depth maps, each with its own EXIF), is
+        dropped.
+        """
+        dst.write(reader.read_exact(2))  # SOI
+
+        while True:
+            byte = reader.read_exact(1)
+            if byte != b'\xff':
+                raise ValueError("Corrupt JPEG: expected marker")
+            marker = reader.read_exact(1)[0]
+            while marker == 0xFF:  # fill bytes
+                reader.changed = True
+                marker = reader.read_exact(1)[0]
+
+            if marker in JPEG_STANDALONE_MARKERS:
+                dst.write(bytes((0xFF, marker)))
+                continue
+            if marker == 0xD9:  # EOI
+                dst.write(b'\xff\xd9')
+                if reader.read(1):
+                    reader.changed = True  # trailing data and appended images are dropped
+                return
+
+            length_bytes = reader.read_exact(2)
+            length = struct.unpack('>H', length_bytes)[0] - 2
+            if length < 0:
+                raise ValueError("Corrupt JPEG: bad segment length")
+
+            if marker == 0xDA:  # SOS: entropy-coded data follows
+                dst.write(bytes((0xFF, marker)) + length_bytes)
+                reader.copy(dst, length)
+                if not reader.copy_entropy(dst):
+                    return  # truncated file: keep what there is
+                continue
+
+            if 0xE0 <= marker <= 0xEF or marker == 0xFE:
+                original = reader.read_exact(length)
+                payload = self._filter_jpeg_app(marker, original)
+                if payload != original:
+                    reader.changed = True
+                if payload is not None:
+                    dst.write(bytes((0xFF, marker)) + struct.pack('>H', len(payload) + 2))
+                    dst.write(payload)
+            else:
+                dst.write(bytes((0xFF, marker)) + length_bytes)
+                reader.copy(dst, length)
+
+    def _filter_jpeg_app(self, marker, payload):
+        """Return the payload to keep for an APPn/COM segment, or None to drop it."""
+        if marker == 0xE0 and payload.startswith(b'JFIF\x00') and len(payload) >= 14:
+            # Keep the JFIF header but drop any embedded thumbnail
+            return payload[:12] + b'\x00\x00'
+        if marker == 0xE2 and payload.startswith(b'ICC_PROFILE\x00'):
+            return payload
+        if marker == 0xEE and payload.startswith(b'Adobe'):
+            return payload
+        return None
+
+    def _strip_png(self, reader, dst):
+        """Drop text, EXIF, time and unknown ancillary chunks."""
+        dst.write(reader.read_exact(len(PNG_SIGNATURE)))
+
+        while True:
+            header = reader.read_exact(8)
+            length, chunk_type = struct.unpack('>I4s', header)
+            critical = chunk_type[0:1].isupper()
+
+            if critical or chunk_type in PNG_KEEP_CHUNKS:
+                dst.write(header)
+                reader.copy(dst, length + 4)  # data + CRC
+            else:
+                reader.skip(length + 4)
+                reader.changed = True
+
+            if chunk_type == b'IEND':
+                return
+
+    def _strip_webp(self, reader, dst):
+        """Drop EXIF, XMP and unknown RIFF chunks, fixing up VP8X flags and the RIFF size."""
+        header = reader.read_exact(12)
+        remaining = struct.unpack('<I', header[4:8])[0] - 4
+
+        def riff_header(size):
+            return header[:4] + struct.pack('<I', size) + header[8:]
+
+        # The RIFF size precedes the chunks, so it has to be known up front:
+        # patch it afterwards if dst can seek, else pre-scan chunk headers
+        # if src can seek, else stage the chunks in memory.
+        if _is_seekable(dst):
+            start = dst.tell()
+            dst.write(header)
+            size = self._copy_webp_chunks(reader, dst, remaining)
+            end = dst.tell()
+            dst.seek(start + 4)
+            dst.write(struct.pack('<I', size))
+            dst.seek(end)
+            return
+
+        size = self._prescan_webp(reader, remaining)
+        if size is not None:
+            dst.write(riff_header(size))
+            self._copy_webp_chunks(reader, dst, remaining)
+            return
+
+        buffer = io.BytesIO()
+        size = self._copy_webp_chunks(reader, buffer, remaining)
+        dst.write(riff_header(size))
+        dst.write(buffer.getvalue())
+
+    def _copy_webp_chunks(self, reader, dst, remaining):
+        """
+        Copy the kept chunks of a WebP body to dst.
+
+        Returns:
+            int: New RIFF size (the 'WEBP' tag plus every chunk written)
+        """
+        size = 4
+        while remaining >= 8:
+            chunk_header = reader.read_exact(8)
+            fourcc, length = struct.unpack('<4sI', chunk_header)
+            padded = length + (length & 1)
+            remaining -= 8 + padded
+
+            if fourcc not in WEBP_KEEP_CHUNKS:
+                reader.skip(length)
+                reader.read(length & 1)
+                reader.changed = True
+                continue
+
+            dst.write(chunk_header)
+            if fourcc == b'VP8X' and length >= 1:
+                payload = reader.read_exact(length)
+                flags = payload[0] & ~(WEBP_EXIF_FLAG | WEBP_XMP_FLAG)
+                if flags != payload[0]:
+                    reader.changed = True
+                dst.write(bytes((flags,)) + payload[1:])
+            else:
+                reader.copy(dst, length)
+            if length & 1:
+                # Some encoders omit the final pad byte; always write one
+                if reader.read(1) != b'\x00':
+                    reader.changed = True
+                dst.write(b'\x00')
+            size += 8 + padded
+        if remaining:
+            reader.changed = True  # trailing bytes that do not form a chunk
+        return size
+
+    def _prescan_webp(self, reader, remaining):
+        """
+        Compute the stripped RIFF size by seeking over chunk headers.
+
+        Returns:
+            int: New RIFF size, or None if the source cannot seek
+        """
+        src = reader.src
+        if not _is_seekable(src):
+            return None
+
+        resume = src.tell()
+        src.seek(resume - len(reader.head))
+        size = 4
+        try:
+            while remaining >= 8:
+                chunk_header = src.read(8)
+                if len(chunk_header) < 8:
+                    break
+                fourcc, length = struct.unpack('<4sI', chunk_header)
+                padded = length + (length & 1)
+                if fourcc in WEBP_KEEP_CHUNKS:
+                    size += 8 + padded
+                src.seek(padded, io.SEEK_CUR)
+                remaining -= 8 + padded
+        finally:
+            src.seek(resume)
+        return size
+
+    def _strip_tiff(self, reader, dst):
+        """Drop metadata tags from every IFD, leaving image data in place."""
+        src = reader.src
+        if _is_seekable(src):
+            start = src.tell() - len(reader.head)
+        else:
+            src = io.BytesIO(reader.head + src.read())
+            start = 0
+        if TiffStripper().strip(src, start, dst):
+            reader.changed = True
+
+    def _strip_gif(self, reader, dst):
+        """Drop comment, XMP and unknown application extensions; copy image data as-is."""
+        header = reader.read_exact(13)  # signature + logical screen descriptor
+        dst.write(header)
+        if header[10] & 0x80:
+            reader.copy(dst, 3 << ((header[10] & 0x07) + 1))  # global color table
+
+        while True:
+            introducer = reader.read_exact(1)
+
+            if introducer == b'\x3b':  # trailer
+                dst.write(introducer)
+                return
+
+            if introducer == b'\x2c':  # image descriptor
+                descriptor = reader.read_exact(9)
+                dst.write(introducer + descriptor)
+                if descriptor[8] & 0x80:
+                    reader.copy(dst, 3 << ((descriptor[8] & 0x07) + 1))  # local color table
+                dst.write(reader.read_exact(1))  # LZW minimum code size
+                reader.sub_blocks(dst)
+                continue
+
+            if introducer != b'\x21':
+                raise ValueError("Corrupt GIF: unknown block")
+
+            label = reader.read_exact(1)
+            if label == b'\xff':  # application extension
+                block_size = reader.read_exact(1)
+                identifier = reader.read_exact(block_size[0])
+                if identifier[:11] in GIF_KEEP_APPLICATIONS:
+                    dst.write(introducer + label + block_size + identifier)
+                    reader.sub_blocks(dst)
+                else:
+                    reader.sub_blocks()
+                    reader.changed = True
+            elif label == b'\xfe':  # comment
+                reader.sub_blocks()
+                reader.changed = True
+            else:  # graphic control, plain text
+                dst.write(introducer + label)
+                reader.sub_blocks(dst)
\ No newline at end of file
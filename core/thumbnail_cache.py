@@ -0,0 +1,153 @@
+"""Bounded in-memory cache of thumbnails at several sizes."""
+
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+# Edge length of the master thumbnail every display size is derived from
+MASTER_SIZE = 300
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def image_bytes(img):
+    """Approximate the memory held by a decoded image."""
+    return img.width * img.height * len(img.getbands())
+
+
+class ThumbnailCache:
+    """
+    Keeps a master thumbnail per image plus the sizes derived from it.
+
+    Masters are decoded once at MASTER_SIZE; any smaller size is produced
+    by downscaling the master in memory, so changing the display size never
+    reads the file again. All variants of an image are evicted together,
+    least recently used first, once the total exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, master_size=MASTER_SIZE):
+        self.max_bytes = max_bytes
+        self.master_size = master_size
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> {size: image}, master under None
+        self._sizes = {}  # key -> bytes held by all variants
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def put(self, key, master, hot=True):
+        """
+        Store the master thumbnail for key.
+
+        Args:
+            key: Cache key, usually the image path
+            master: PIL image no larger than master_size
+            hot: Insert as most recently used; cold entries (background
+                 prefetch) go to the eviction end so they never push out
+                 thumbnails the user is looking at
+        """
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = {None: master}
+            self._sizes[key] = image_bytes(master)
+            self.total_bytes += self._sizes[key]
+            if not hot:
+                self._entries.move_to_end(key, last=False)
+            self._evict(keep=key if hot else None)
+
+    def get(self, key, size):
+        """
+        Return the thumbnail for key scaled to fit size x size.
+
+        Returns:
+            PIL.Image: The thumbnail, or None if key is not cached
+        """
+        with self._lock:
+            variants = self._entries.get(key)
+            if variants is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+            img = variants.get(size)
+            if img is not None:
+                return img
+
+            master = variants[None]
+            if size >= max(master.size):
+                return master
+
+            img = master.copy()
+            img.thumbnail((size, size), Image.Resampling.BILINEAR)
+            variants[size] = img
+            self._sizes[key] += image_bytes(img)
+            self.total_bytes += image_bytes(img)
+            self._evict(keep=key)
+            return img
+
+    def discard(self, key):
+        """Forget key, e.g. after the image was modified."""
+        with self._lock:
+            self._remove(key)
+
+    def drop_variants(self, keep_size=None):
+        """Release derived sizes other than keep_size, keeping the masters."""
+        with self._lock:
+            for key, variants in self._entries.items():
+                for size in [s for s in variants if s is not None and s != keep_size]:
+                    freed = image_bytes(variants.pop(size))
+                    self._sizes[key] -= freed
+                    self.total_bytes -= freed
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def get_stats(self):
+        """
+        Return cache statistics.
+
+        Returns:
+            dict: entries, total_bytes, max_bytes, hits, misses, evictions
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key):
+        """Drop key; caller holds the lock."""
+        if self._entries.pop(key, None) is not None:
+            self.total_bytes -= self._sizes.pop(key)
+
+    def _evict(self, keep=None):
+        """Evict least recently used entries until within budget; caller holds the lock."""
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            if key == keep:
+                if len(self._entries) == 1:
+                    return
+                self._entries.move_to_end(key)
+                continue
+            self._remove(key)
+            self.evictions += 1
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""Background thumbnail decoding with viewport-first scheduling."""
+
+import heapq
+import itertools
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from core.shm_buffer_pool import write_shared_image
+
+# Scheduling tiers, most urgent first
+PRIORITY_VISIBLE = 0
+PRIORITY_PREFETCH = 1
+PRIORITY_BACKGROUND = 2
+
+
+class ThumbnailResult:
+    """
+    A decoded thumbnail as a raw pixel buffer, ready to hand to Tk.
+
+    The pixels are either in data or, when decoded by a worker process,
+    in a shared memory slot held by lease.
+    """
+
+    __slots__ = ("key", "generation", "mode", "size", "data", "error", "lease")
+
+    def __init__(self, key, generation, mode=None, size=None, data=None, error=None, lease=None):
+        self.key = key
+        self.generation = generation
+        self.mode = mode
+        self.size = size
+        self.data = data
+        self.error = error
+        self.lease = lease
+
+    def to_image(self):
+        """Wrap the buffer in a PIL image; a shared slot is mapped in place and then belongs to it."""
+        if self.lease is not None:
+            img = self.lease.to_image(self.mode, self.size)
+            self.release()
+            return img
+        return Image.frombuffer(self.mode, self.size, self.data, "raw", self.mode, 0, 1)
+
+    def release(self):
+        """Return the shared slot of a result that will not be shown."""
+        if self.lease is not None:
+            self.lease.release()
+            self.lease = None
+
+
+class ThumbnailService:
+    """
+    Decodes thumbnails on a pool of worker threads, most urgent first.
+
+    Jobs sit in a priority queue keyed by tier (visible, prefetch,
+    background). Re-prioritising a job pushes a fresh heap entry and the
+    stale one is skipped when popped, so demoting thousands of off-screen
+    jobs on scroll is cheap. Workers only produce raw RGB/RGBA buffers;
+    building Tk images is left to the caller on the Tk thread, which
+    collects finished results in batches with take_results().
+
+    With processes=True each worker thread hands its decodes to a process
+    pool, so decoding is not limited by the GIL. Given a SharedBufferPool,
+    the worker process writes the pixels into a slot of it and only the
+    mode and size travel back; results not shown must then be given back
+    with ThumbnailResult.release(), which the service does for results it
+    drops itself.
+    """
+
+    def __init__(self, workers=None, processes=False, buffer_pool=None):
+        """
+        Args:
+            workers: Decoding threads, or worker processes with processes=True
+                     (default: CPU count, at most 8)
+            processes: Decode in worker processes instead of threads
+            buffer_pool: SharedBufferPool for process results; without one, or
+                         while all its slots are in use, pixels are pickled back
+        """
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.processes = processes
+        self.buffer_pool = buffer_pool
+        self._executor = ProcessPoolExecutor(max_workers=self.workers) if processes else None
+
+        self._cond = threading.Condition()
+        self._heap = []  # (priority, seq, key)
+        self._jobs = {}  # key -> [path, size, priority]
+        self._seq = itertools.count()
+        self._results = deque()
+        self._active = 0
+        self._generation = 0
+        self._running = True
+
+        self._threads = [
+            threading.Thread(target=self._worker, daemon=True, name=f"thumbnail-{i}")
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def generation(self):
+        """Counter bumped by cancel_all(); results from older generations are stale."""
+        return self._generation
+
+    def request(self, key, path, size, priority=PRIORITY_BACKGROUND):
+        """
+        Queue a thumbnail for decoding, or re-prioritise it if already queued.
+
+        Args:
+            key: Identifier returned with the result
+            path: Image file path
+            size: Maximum thumbnail edge in pixels
+            priority: One of the PRIORITY_* tiers
+        """
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is not None and job[2] <= priority:
+                return
+            self._jobs[key] = [path, size, priority]
+            heapq.heappush(self._heap, (priority, next(self._seq), key))
+            self._cond.notify()
+
+    def set_priorities(self, priorities):
+        """
+        Move queued jobs to new tiers.
+
+        Args:
+            priorities: Mapping of key -> PRIORITY_* tier; keys not queued are ignored
+        """
+        with self._cond:
+            for key, priority in priorities.items():
+                job = self._jobs.get(key)
+                if job is not None and job[2] != priority:
+                    job[2] = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), key))
+            self._compact()
+            self._cond.notify_all()
+
+    def cancel(self, keys):
+        """Drop queued jobs that have not started yet."""
+        with self._cond:
+            for key in keys:
+                self._jobs.pop(key, None)
+            self._compact()
+
+    def cancel_all(self):
+        """Drop every queued job and invalidate results still in flight."""
+        with self._cond:
+            self._jobs.clear()
+            self._heap.clear()
+            self._release_results()
+            self._generation += 1
+
+    def pending(self):
+        """Return the number of queued, running and undelivered thumbnails."""
+        with self._cond:
+            return len(self._jobs) + self._active + len(self._results)
+
+    def take_results(self, limit=64):
+        """
+        Collect finished thumbnails from the current generation.
+
+        Args:
+            limit: Maximum number of results to return
+
+        Returns:
+            list: ThumbnailResult objects
+        """
+        results = []
+        with self._cond:
+            while self._results and len(results) < limit:
+                result = self._results.popleft()
+                if result.generation == self._generation:
+                    results.append(result)
+                else:
+                    result.release()
+        return results
+
+    def shutdown(self):
+        """Stop the worker threads and processes, returning undelivered shared slots."""
+        with self._cond:
+            self._running = False
+            self._jobs.clear()
+            self._heap.clear()
+            self._release_results()
+            self._cond.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release_results(self):
+        """Drop undelivered results; caller holds the lock."""
+        while self._results:
+            self._results.popleft().release()
+
+    def _compact(self):
+        """Rebuild the heap once stale entries dominate it."""
+        if len(self._heap) > 4 * len(self._jobs) + 64:
+            self._heap = [(job[2], next(self._seq), key) for key, job in self._jobs.items()]
+            heapq.heapify(self._heap)
+
+    def _next_job(self):
+        """Block until a live job is available; return it or None on shutdown."""
+        with self._cond:
+            while self._running:
+                while self._heap:
+                    priority, _, key = heapq.heappop(self._heap)
+                    job = self._jobs.get(key)
+                    if job is not None and job[2] == priority:
+                        del self._jobs[key]
+                        self._active += 1
+                        return key, job[0], job[1], self._generation
+                self._cond.wait()
+            return None
+
+    def _worker(self):
+        """Decode jobs until shutdown."""
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            key, path, size, generation = job
+            if self._executor is None:
+                result = decode_thumbnail(key, path, size, generation)
+            else:
+                result = self._decode_in_process(key, path, size, generation)
+            with self._cond:
+                self._active -= 1
+                if generation == self._generation and self._running:
+                    self._results.append(result)
+                    continue
+            result.release()
+
+    def _decode_in_process(self, key, path, size, generation):
+        """Decode in the process pool, into a shared slot when one is free."""
+        lease = None
+        if self.buffer_pool is not None and size * size * 4 <= self.buffer_pool.slot_size:
+            lease = self.buffer_pool.acquire(owner=key)
+        try:
+            mode, dims, data = self._executor.submit(
+                decode_thumbnail_shared, path, size, lease.handle if lease else None).result()
+        except Exception as e:
+            if lease is not None:
+                lease.release()
+            return ThumbnailResult(key, generation, error=e)
+
+        if data is not None and lease is not None:
+            lease.release()
+            lease = None
+        return ThumbnailResult(key, generation, mode, dims, data, lease=lease)
+
+
+def load_thumbnail(path, size):
+    """Decode an image scaled to fit size x size, as RGB or RGBA."""
+    with Image.open(path) as img:
+        # Let JPEG decode at a reduced scale instead of full size
+        img.draft("RGB", (size, size))
+        img.thumbnail((size, size))
+        mode = "RGBA" if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info else "RGB"
+        return img.convert(mode)
+
+
+def decode_thumbnail(key, path, size, generation=0):
+    """
+    Decode a thumbnail into a raw RGB or RGBA buffer.
+
+    Returns:
+        ThumbnailResult: The buffer, or the error if decoding failed
+    """
+    try:
+        img = load_thumbnail(path, size)
+        return ThumbnailResult(key, generation, img.mode, img.size, img.tobytes())
+    except Exception as e:
+        return ThumbnailResult(key, generation, error=e)
+
+
+def decode_thumbnail_shared(path, size, handle=None):
+    """
+    Process pool entry point: decode a thumbnail, into a shared slot when given one.
+
+    Returns:
+        tuple: (mode, size, data); data is None when the pixels were written
+               to the slot, otherwise the raw buffer to pickle back
+    """
+    img = load_thumbnail(path, size)
+    if handle is not None:
+        shared = write_shared_image(handle, img)
+        if shared is not None:
+            return shared + (None,)
+    return img.mode, img.size, img.tobytes()
\ No newline at end of file
@@ -0,0 +1,369 @@
+"""IFD-level metadata stripping for classic TIFF and BigTIFF."""
+
+import struct
+
+from utils.fast_io import copy_range, copy_rest
+
+# Upper bound on IFDs followed, guarding against offset loops
+MAX_IFDS = 4096
+
+# Field type -> size in bytes of one value
+TYPE_SIZES = {
+    1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8,
+    11: 4, 12: 8, 13: 4, 16: 8, 17: 8, 18: 8,
+}
+
+# Pointers to metadata sub-IFDs; the whole sub-IFD is wiped
+METADATA_IFD_TAGS = {
+    34665,  # ExifIFD
+    34853,  # GPSIFD
+    40965,  # InteroperabilityIFD
+}
+
+# Tags dropped from every image IFD
+REMOVED_TAGS = METADATA_IFD_TAGS | {
+    269,    # DocumentName
+    270,    # ImageDescription
+    271,    # Make
+    272,    # Model
+    285,    # PageName
+    305,    # Software
+    306,    # DateTime
+    315,    # Artist
+    316,    # HostComputer
+    700,    # XMP
+    18246,  # Rating
+    18249,  # RatingPercent
+    33432,  # Copyright
+    33723,  # IPTC-NAA
+    34377,  # Photoshop image resources
+    36867,  # DateTimeOriginal
+    36868,  # DateTimeDigitized
+    37510,  # UserComment
+    37724,  # ImageSourceData (Photoshop layers)
+    40091, 40092, 40093, 40094, 40095,  # XPTitle/Comment/Author/Keywords/Subject
+    42016,  # ImageUniqueID
+    42032,  # CameraOwnerName
+    42033,  # BodySerialNumber
+    42034,  # LensSpecification
+    42035,  # LensMake
+    42036,  # LensModel
+    42037,  # LensSerialNumber
+    50341,  # PrintImageMatching
+}
+
+# (offsets tag, byte counts tag) pairs locating image data
+DATA_TAG_PAIRS = ((273, 279), (324, 325), (288, 289), (513, 514))
+
+SUB_IFDS_TAG = 330
+
+
+def is_tiff(head):
+    """Check for a classic or BigTIFF header in either byte order."""
+    return head[:4] in (b'II*\x00', b'MM\x00*', b'II+\x00', b'MM\x00+')
+
+
+class _Entry:
+    """One IFD entry with its raw value field."""
+
+    def __init__(self, tag, type_, count, raw):
+        self.tag = tag
+        self.type = type_
+        self.count = count
+        self.raw = raw
+
+
+class TiffStripper:
+    """
+    Removes metadata tags from a TIFF without touching strips or tiles.
+
+    The IFD chain (and any SubIFDs) is parsed from the input, then the file
+    is copied through sequentially while a small set of patches is applied
+    on the fly: each affected IFD is rewritten in place with the metadata
+    entries removed, and the bytes that held the removed values (EXIF/GPS
+    sub-IFDs, XMP packets, IPTC and Photoshop blobs, ...) are zeroed. Image
+    data and every offset stay where they were, so the compression is
+    untouched and the output is exactly the size of the input.
+    """
+
+    def strip(self, src, start, dst):
+        """
+        Copy a TIFF from src to dst with metadata removed.
+
+        Args:
+            src: Seekable binary stream containing the TIFF
+            start: Offset of the TIFF header within src
+            dst: Writable binary stream (need not be seekable)
+
+        Returns:
+            bool: Whether anything was removed
+        """
+        self.src = src
+        self.start = start
+
+        src.seek(0, 2)
+        self.size = src.tell() - start
+        src.seek(start)
+        header = src.read(16)
+        self._parse_header(header)
+
+        self.kept = [(0, 16 if self.big else 8)]  # (offset, length) ranges that must survive
+        self.removed = []   # (offset, length) ranges holding removed values
+        self.rewrites = []  # (offset, bytes) replacement IFD blocks
+
+        self._walk_chain(self.first_ifd)
+
+        patches = self._build_patches()
+        src.seek(start)
+        self._copy_with_patches(dst, patches)
+        return bool(patches)
+
+    def data_ranges(self, src, start=0):
+        """
+        Locate the strips and tiles of every image in a TIFF without copying anything.
+
+        Args:
+            src: Seekable binary stream containing the TIFF
+            start: Offset of the TIFF header within src
+
+        Returns:
+            list: (offset, length) ranges relative to start, in IFD order
+        """
+        self.src = src
+        self.start = start
+        src.seek(start)
+        self._parse_header(src.read(16))
+
+        ranges = []
+        self._collect_data(self.first_ifd, ranges, set())
+        return ranges
+
+    def _collect_data(self, offset, ranges, seen):
+        """Append the image data ranges of an IFD chain and its SubIFDs."""
+        while offset and offset not in seen and len(seen) < MAX_IFDS:
+            seen.add(offset)
+            entries, offset, _ = self._read_ifd(offset)
+            by_tag = {entry.tag: entry for entry in entries}
+            for offsets_tag, counts_tag in DATA_TAG_PAIRS:
+                if offsets_tag in by_tag and counts_tag in by_tag:
+                    ranges.extend(zip(self._values(by_tag[offsets_tag]),
+                                      self._values(by_tag[counts_tag])))
+            if SUB_IFDS_TAG in by_tag:
+                for pointer in self._values(by_tag[SUB_IFDS_TAG]):
+                    self._collect_data(pointer, ranges, seen)
+
+    def _parse_header(self, header):
+        """Read byte order, variant and first IFD offset."""
+        if header[:2] == b'II':
+            self.endian = '<'
+        elif header[:2] == b'MM':
+            self.endian = '>'
+        else:
+            raise ValueError("Not a TIFF file")
+
+        magic = struct.unpack(self.endian + 'H', header[2:4])[0]
+        if magic == 42:
+            self.big = False
+            self.first_ifd = struct.unpack(self.endian + 'I', header[4:8])[0]
+        elif magic == 43:
+            self.big = True
+            self.first_ifd = struct.unpack(self.endian + 'Q', header[8:16])[0]
+        else:
+            raise ValueError("Not a TIFF file")
+
+        self.count_fmt = 'Q' if self.big else 'H'
+        self.offset_fmt = 'Q' if self.big else 'I'
+        self.entry_size = 20 if self.big else 12
+        self.inline_size = 8 if self.big else 4
+
+    def _read_at(self, offset, size):
+        """Read size bytes at a TIFF-relative offset."""
+        self.src.seek(self.start + offset)
+        data = self.src.read(size)
+        if len(data) < size:
+            raise ValueError("Corrupt TIFF: offset beyond end of file")
+        return data
+
+    def _read_ifd(self, offset):
+        """
+        Parse one IFD.
+
+        Returns:
+            tuple: (entries, next_ifd_offset, ifd_byte_length)
+        """
+        count_size = 8 if self.big else 2
+        count = struct.unpack(self.endian + self.count_fmt, self._read_at(offset, count_size))[0]
+        if count > 0xFFFF:
+            raise ValueError("Corrupt TIFF: implausible IFD entry count")
+
+        body = self._read_at(offset + count_size, count * self.entry_size + self.inline_size)
+        entry_fmt = self.endian + ('HHQ' if self.big else 'HHI')
+        head_size = 12 if self.big else 8
+
+        entries = []
+        for i in range(count):
+            raw_entry = body[i * self.entry_size:(i + 1) * self.entry_size]
+            tag, type_, value_count = struct.unpack(entry_fmt, raw_entry[:head_size])
+            entries.append(_Entry(tag, type_, value_count, raw_entry[head_size:]))
+
+        next_offset = struct.unpack(self.endian + self.offset_fmt, body[-self.inline_size:])[0]
+        length = count_size + count * self.entry_size + self.inline_size
+        return entries, next_offset, length
+
+    def _value_range(self, entry):
+        """Return (offset, length) of an out-of-line value, or None if inline."""
+        size = TYPE_SIZES.get(entry.type, 1) * entry.count
+        if size <= self.inline_size:
+            return None
+        offset = struct.unpack(self.endian + self.offset_fmt, entry.raw)[0]
+        return offset, size
+
+    def _values(self, entry):
+        """Decode an integer-valued entry (offsets, counts, IFD pointers)."""
+        fmt = {1: 'B', 3: 'H', 4: 'I', 13: 'I', 16: 'Q', 18: 'Q'}.get(entry.type)
+        if fmt is None:
+            return []
+        size = TYPE_SIZES[entry.type] * entry.count
+        rng = self._value_range(entry)
+        data = entry.raw[:size] if rng is None else self._read_at(*rng)
+        return list(struct.unpack(f"{self.endian}{entry.count}{fmt}", data))
+
+    def _walk_chain(self, offset):
+        """Process an IFD chain starting at offset."""
+        seen = set()
+        while offset and offset not in seen and len(seen) < MAX_IFDS:
+            seen.add(offset)
+            offset = self._process_ifd(offset)
+
+    def _process_ifd(self, offset):
+        """Strip one image IFD; return the offset of the next IFD."""
+        entries, next_offset, length = self._read_ifd(offset)
+        self.kept.append((offset, length))
+
+        kept_entries = []
+        by_tag = {entry.tag: entry for entry in entries}
+        for entry in entries:
+            rng = self._value_range(entry)
+            if entry.tag in REMOVED_TAGS:
+                if rng:
+                    self.removed.append(rng)
+                if entry.tag in METADATA_IFD_TAGS:
+                    for pointer in self._values(entry):
+                        self._wipe_ifd(pointer, set())
+                continue
+
+            kept_entries.append(entry)
+            if rng:
+                self.kept.append(rng)
+
+        # Image data referenced by this IFD
+        for offsets_tag, counts_tag in DATA_TAG_PAIRS:
+            if offsets_tag in by_tag and counts_tag in by_tag:
+                offsets = self._values(by_tag[offsets_tag])
+                counts = self._values(by_tag[counts_tag])
+                self.kept.extend(zip(offsets, counts))
+
+        if SUB_IFDS_TAG in by_tag:
+            for pointer in self._values(by_tag[SUB_IFDS_TAG]):
+                self._walk_chain(pointer)
+
+        if len(kept_entries) != len(entries):
+            self.rewrites.append((offset, self._encode_ifd(kept_entries, next_offset, length)))
+
+        return next_offset
+
+    def _wipe_ifd(self, offset, seen):
+        """Mark a metadata sub-IFD and everything it references as removed."""
+        if not offset or offset in seen or len(seen) >= MAX_IFDS:
+            return
+        seen.add(offset)
+        try:
+            entries, _, length = self._read_ifd(offset)
+        except (ValueError, struct.error):
+            return
+
+        self.removed.append((offset, length))
+        for entry in entries:
+            rng = self._value_range(entry)
+            if rng:
+                self.removed.append(rng)
+            if entry.tag in METADATA_IFD_TAGS:
+                for pointer in self._values(entry):
+                    self._wipe_ifd(pointer, seen)
+
+    def _encode_ifd(self, entries, next_offset, length):
+        """Encode an IFD, zero-padded to its original length."""
+        entry_fmt = self.endian + ('HHQ' if self.big else 'HHI')
+        parts = [struct.pack(self.endian + self.count_fmt, len(entries))]
+        for entry in entries:
+            parts.append(struct.pack(entry_fmt, entry.tag, entry.type, entry.count) + entry.raw)
+        parts.append(struct.pack(self.endian + self.offset_fmt, next_offset))
+        data = b''.join(parts)
+        return data + b'\x00' * (length - len(data))
+
+    def _build_patches(self):
+        """
+        Combine IFD rewrites and zeroed ranges into sorted, non-overlapping patches.
+
+        Returns:
+            list: (offset, length, data) where data is None for zero fill
+        """
+        kept = _merge_ranges(self.kept)
+        removed = [(offset, min(length, self.size - offset))
+                   for offset, length in self.removed if offset < self.size]
+        zeroed = _subtract_ranges(_merge_ranges(removed), kept)
+
+        patches = [(offset, len(data), data) for offset, data in self.rewrites]
+        patches += [(offset, length, None) for offset, length in zeroed]
+        patches.sort(key=lambda patch: patch[0])
+        return patches
+
+    def _copy_with_patches(self, dst, patches):
+        """Stream src to dst, substituting patched ranges as they pass by."""
+        position = 0
+        for offset, length, data in patches:
+            self._copy(dst, offset - position)
+            if data is None:
+                data = b'\x00' * length
+            self._skip(length)
+            dst.write(data)
+            position = offset + length
+
+        copy_rest(self.src, dst)
+
+    def _copy(self, dst, size):
+        """Copy size bytes from the current src position."""
+        if size > 0:
+            copy_range(self.src, dst, size)
+
+    def _skip(self, size):
+        """Advance src by size bytes."""
+        self.src.seek(size, 1)
+
+
+def _merge_ranges(ranges):
+    """Merge (offset, length) ranges into sorted, disjoint (start, end) pairs."""
+    merged = []
+    for start, end in sorted((o, o + n) for o, n in ranges if n > 0):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _subtract_ranges(ranges, holes):
+    """Return (offset, length) parts of ranges not covered by holes (both merged)."""
+    result = []
+    for start, end in ranges:
+        for hole_start, hole_end in holes:
+            if hole_end <= start or hole_start >= end:
+                continue
+            if hole_start > start:
+                result.append((start, hole_start - start))
+            start = max(start, hole_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end - start))
+    return result
\ No newline at end of file
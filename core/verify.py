@@ -0,0 +1,366 @@
+"""Post-write checks that stripping metadata left the image data untouched."""
+
+import hashlib
+import math
+import struct
+import threading
+
+from PIL import Image
+
+from core.stream_stripper import (GIF_KEEP_APPLICATIONS, HEADER_SIZE, JPEG_SEGMENT_END,
+                                  JPEG_STANDALONE_MARKERS, PNG_SIGNATURE, StreamStripper)
+from core.tiff_stripper import TiffStripper
+from utils.fast_io import MappedFile, open_mapped
+from utils.helpers import is_path_like
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# PNG chunks that define the pixels (every other chunk may legitimately be dropped)
+PNG_PAYLOAD_CHUNKS = {b'IHDR', b'PLTE', b'tRNS', b'IDAT', b'acTL', b'fcTL', b'fdAT'}
+
+# WebP chunks holding the bitstream (VP8X is excluded: its metadata flags change)
+WEBP_PAYLOAD_CHUNKS = {b'VP8 ', b'VP8L', b'ALPH', b'ANIM', b'ANMF'}
+
+# Pixels compared for re-encoded outputs, on an even grid
+SAMPLE_POINTS = 64
+
+# Largest per-channel difference accepted between sampled pixels; covers
+# rounding in lossy encoders and colour conversions
+PIXEL_TOLERANCE = 2
+
+# Verification modes
+MODES = ("payload", "pixels")
+
+
+class VerificationError(ValueError):
+    """Raised when an output's image data does not match its input."""
+
+
+def _update(h, f, size):
+    """Feed the next size bytes of f to h; return how many there were."""
+    if isinstance(f, MappedFile):
+        pos = f.tell()
+        size = max(0, min(size, len(f) - pos))
+        with f.view(pos, size) as view:
+            h.update(view)
+        f.seek(pos + size)
+        return size
+    done = 0
+    while done < size:
+        chunk = f.read(min(HASH_CHUNK_SIZE, size - done))
+        if not chunk:
+            break
+        h.update(chunk)
+        done += len(chunk)
+    return done
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) < size:
+        raise ValueError("Unexpected end of image data")
+    return data
+
+
+def _hash_jpeg(f, h):
+    """
+    Hash the tables, frame and scan headers and the entropy-coded data up to EOI.
+
+    APPn and COM segments are skipped wherever they appear, including
+    between the scans of a progressive JPEG, as the stripper drops them.
+    """
+    f.seek(2)
+    while True:
+        if _read_exact(f, 1) != b'\xff':
+            raise ValueError("Corrupt JPEG: expected marker")
+        marker = _read_exact(f, 1)[0]
+        while marker == 0xFF:
+            marker = _read_exact(f, 1)[0]
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == 0xD9:
+            return
+
+        length_bytes = _read_exact(f, 2)
+        length = struct.unpack('>H', length_bytes)[0] - 2
+        if 0xE0 <= marker <= 0xEF or marker == 0xFE:
+            f.seek(length, 1)
+            continue
+        h.update(bytes((0xFF, marker)) + length_bytes)
+        _update(h, f, length)
+        if marker == 0xDA and not _hash_entropy(f, h):
+            return
+
+
+def _hash_entropy(f, h):
+    """
+    Hash entropy-coded data, RST markers included, up to the marker that ends it.
+
+    Returns:
+        bool: True with f at that marker, False if the file ended first
+    """
+    while True:
+        pos = f.tell()
+        chunk = f.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            return False
+        # A trailing FF may start a marker; take its next byte along
+        while chunk.endswith(b'\xff'):
+            extra = f.read(1)
+            if not extra:
+                break
+            chunk += extra
+        match = JPEG_SEGMENT_END.search(chunk)
+        if match is not None:
+            h.update(chunk[:match.start()])
+            f.seek(pos + match.start())
+            return True
+        h.update(chunk)
+
+
+def _hash_png(f, h):
+    """Hash the header, palette, transparency, animation and IDAT chunks."""
+    f.seek(len(PNG_SIGNATURE))
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        length, chunk_type = struct.unpack('>I4s', header)
+        if chunk_type in PNG_PAYLOAD_CHUNKS:
+            h.update(header)
+            _update(h, f, length)
+            f.seek(4, 1)  # CRC
+        else:
+            f.seek(length + 4, 1)
+        if chunk_type == b'IEND':
+            return
+
+
+def _hash_webp(f, h):
+    """Hash the VP8/VP8L bitstreams, alpha and animation frames."""
+    f.seek(12)
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        fourcc, length = struct.unpack('<4sI', header)
+        if fourcc in WEBP_PAYLOAD_CHUNKS:
+            h.update(header)
+            _update(h, f, length)
+            f.seek(length & 1, 1)
+        else:
+            f.seek(length + (length & 1), 1)
+
+
+def _hash_tiff(f, h):
+    """Hash every strip and tile, in IFD order."""
+    for offset, length in TiffStripper().data_ranges(f):
+        f.seek(offset)
+        h.update(struct.pack('<QQ', offset, length))
+        _update(h, f, length)
+
+
+def _hash_sub_blocks(f, h=None):
+    """Hash (or skip, without h) a GIF sub-block chain."""
+    while True:
+        size = _read_exact(f, 1)
+        if h is not None:
+            h.update(size)
+        if not size[0]:
+            return
+        if h is not None:
+            _update(h, f, size[0])
+        else:
+            f.seek(size[0], 1)
+
+
+def _hash_gif(f, h):
+    """Hash the screen descriptor, colour tables, frames and animation control."""
+    f.seek(0)
+    header = _read_exact(f, 13)
+    h.update(header)
+    if header[10] & 0x80:
+        _update(h, f, 3 << ((header[10] & 0x07) + 1))
+
+    while True:
+        introducer = _read_exact(f, 1)
+        if introducer == b'\x3b':
+            return
+        if introducer == b'\x2c':
+            descriptor = _read_exact(f, 9)
+            h.update(introducer + descriptor)
+            if descriptor[8] & 0x80:
+                _update(h, f, 3 << ((descriptor[8] & 0x07) + 1))
+            h.update(_read_exact(f, 1))  # LZW minimum code size
+            _hash_sub_blocks(f, h)
+            continue
+        if introducer != b'\x21':
+            raise ValueError("Corrupt GIF: unknown block")
+
+        label = _read_exact(f, 1)
+        if label == b'\xff':
+            block_size = _read_exact(f, 1)
+            identifier = _read_exact(f, block_size[0])
+            if identifier[:11] in GIF_KEEP_APPLICATIONS:
+                h.update(introducer + label + block_size + identifier)
+                _hash_sub_blocks(f, h)
+            else:
+                _hash_sub_blocks(f)
+        elif label == b'\xfe':
+            _hash_sub_blocks(f)
+        else:
+            h.update(introducer + label)
+            _hash_sub_blocks(f, h)
+
+
+_HASHERS = {'JPEG': _hash_jpeg, 'PNG': _hash_png, 'WEBP': _hash_webp, 'TIFF': _hash_tiff,
+            'GIF': _hash_gif}
+
+
+def payload_digest(source):
+    """
+    Hash the parts of an image that carry its pixels, without decoding it.
+
+    Metadata segments, padding and container sizes are left out, so the
+    digest of a stripped file equals the digest of its original.
+
+    Args:
+        source: File path or seekable binary stream
+
+    Returns:
+        tuple: (format name, hex digest), or (None, None) for formats
+               without a byte-level layout
+    """
+    if is_path_like(source):
+        with open_mapped(source) as f:
+            return payload_digest(f)
+
+    source.seek(0)
+    fmt = StreamStripper().detect_format(source.read(HEADER_SIZE))
+    if fmt is None:
+        return None, None
+    h = hashlib.blake2b(digest_size=16)
+    h.update(fmt.encode('ascii'))
+    _HASHERS[fmt](source, h)
+    return fmt, h.hexdigest()
+
+
+def sample_pixels(source, points=SAMPLE_POINTS):
+    """
+    Decode an image and read its pixels at an even grid of points.
+
+    Returns:
+        tuple: ((width, height), [RGBA pixel, ...])
+    """
+    with Image.open(source) as img:
+        rgba = img.convert('RGBA')
+    width, height = rgba.size
+    side = max(1, math.isqrt(points))
+    coords = [((2 * i + 1) * width // (2 * side), (2 * j + 1) * height // (2 * side))
+              for j in range(side) for i in range(side)]
+    return rgba.size, [rgba.getpixel(xy) for xy in coords]
+
+
+def compare_samples(before, after, tolerance=PIXEL_TOLERANCE):
+    """
+    Compare two sample_pixels results.
+
+    Returns:
+        str: Description of the first difference, or None if they match
+    """
+    if before[0] != after[0]:
+        return f"size changed from {before[0][0]}x{before[0][1]} to {after[0][0]}x{after[0][1]}"
+    worst = max((abs(a - b) for p, q in zip(before[1], after[1]) for a, b in zip(p, q)), default=0)
+    if worst > tolerance:
+        return f"sampled pixels differ by up to {worst}"
+    return None
+
+
+class Verifier:
+    """
+    Checks that each file an operation rewrites keeps its image data.
+
+    Formats stripped at the byte level are checked by comparing payload
+    digests taken before and after the write; this reads only the image
+    data (usually still in the page cache) and decodes nothing. Files that
+    are decoded and re-encoded are compared on sampled pixels in "pixels"
+    mode and counted as unchecked otherwise.
+
+    The check runs after the file has been replaced, so a mismatch is
+    reported as a failure of that file rather than prevented.
+    """
+
+    def __init__(self, mode="payload", points=SAMPLE_POINTS, tolerance=PIXEL_TOLERANCE):
+        """
+        Args:
+            mode: "payload" or "pixels" (payload, plus sampled pixels for re-encodes)
+            points: Pixels sampled per re-encoded image
+            tolerance: Largest accepted per-channel difference between samples
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown verification mode: {mode}")
+        self.mode = mode
+        self.points = points
+        self.tolerance = tolerance
+        self.payload = 0    # files whose payload digest matched
+        self.pixels = 0     # re-encoded files whose sampled pixels matched
+        self.unchecked = 0  # files with no payload layout, in payload mode
+        self.failed = []    # (path, message)
+        self._lock = threading.Lock()
+
+    def wrap(self, func):
+        """
+        Return func with a verification around each call.
+
+        A mismatch raises VerificationError, so the batch records the file
+        as failed.
+        """
+        def verified(path):
+            path = str(path)
+            try:
+                fmt, before = payload_digest(path)
+            except (ValueError, EOFError, struct.error):
+                fmt, before = None, None  # unparseable; the operation may still cope
+            sample = None
+            if before is None and self.mode == "pixels":
+                sample = sample_pixels(path, self.points)
+
+            func(path)
+
+            if before is not None:
+                try:
+                    after = payload_digest(path)[1]
+                except (ValueError, EOFError, struct.error) as e:
+                    self._fail(path, f"output unreadable: {e}")
+                if after != before:
+                    self._fail(path, f"{fmt} image data changed")
+                kind = "payload"
+            elif sample is not None:
+                problem = compare_samples(sample, sample_pixels(path, self.points), self.tolerance)
+                if problem:
+                    self._fail(path, problem)
+                kind = "pixels"
+            else:
+                kind = "unchecked"
+            with self._lock:
+                setattr(self, kind, getattr(self, kind) + 1)
+
+        return verified
+
+    def _fail(self, path, message):
+        with self._lock:
+            self.failed.append((path, message))
+        raise VerificationError(f"Verification failed: {message}")
+
+    def to_dict(self):
+        return {"mode": self.mode, "payload": self.payload, "pixels": self.pixels,
+                "unchecked": self.unchecked, "failed": [list(item) for item in self.failed]}
+
+    def summary(self):
+        """Return a one-line human-readable summary."""
+        text = f"Verified: {self.payload} by payload hash"
+        if self.mode == "pixels":
+            text += f", {self.pixels} by sampled pixels"
+        if self.unchecked:
+            text += f", {self.unchecked} not checkable (re-encoded)"
+        return text + f", {len(self.failed)} mismatched"
\ No newline at end of file
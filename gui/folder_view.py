@@ -1,430 +1,960 @@
-"""Folder view for batch image operations."""
-
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import os
-from pathlib import Path
-from PIL import Image, ImageTk
-from core.image_processor import ImageProcessor
-from core.metadata_handler import MetadataHandler
-from utils.helpers import get_file_size_str, is_image_file
-import threading
-
-
-class FolderView:
-    """Manages the folder view interface."""
-
-    def __init__(self, parent):
-        self.parent = parent
-        self.current_folder = None
-        self.images = []
-        self.selected_images = set()
-        self.view_mode = "grid"  # grid or list
-        self.thumbnails = {}
-        self.thumbnail_frames = []  # Keep track of thumbnail frames
-        self.thumbnail_size = 150
-        self.grid_padding = 10
-
-        self.processor = ImageProcessor()
-        self.metadata_handler = MetadataHandler()
-
-        self._setup_ui()
-
-    def _setup_ui(self):
-        """Set up the folder view UI."""
-        # Configure grid
-        self.parent.grid_rowconfigure(1, weight=1)
-        self.parent.grid_columnconfigure(0, weight=1)
-        self.parent.grid_columnconfigure(1, weight=0)
-
-        # Toolbar
-        toolbar = ttk.Frame(self.parent)
-        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
-
-        ttk.Button(toolbar, text="Open Folder", command=self.open_folder).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Toggle View", command=self.toggle_view_mode).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Select All", command=self.select_all).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Clear Selection", command=self.clear_selection).pack(side=tk.LEFT, padx=2)
-
-        # Thumbnail size control
-        ttk.Label(toolbar, text="Thumbnail Size:").pack(side=tk.LEFT, padx=(20, 5))
-        self.size_var = tk.IntVar(value=150)
-        size_spinbox = ttk.Spinbox(toolbar, from_=50, to=300, increment=25,
-                                   textvariable=self.size_var, width=8,
-                                   command=self._on_thumbnail_size_change)
-        size_spinbox.pack(side=tk.LEFT, padx=2)
-
-        # Main content area with scrollbar
-        self.content_frame = ttk.Frame(self.parent)
-        self.content_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
-        self.content_frame.grid_rowconfigure(0, weight=1)
-        self.content_frame.grid_columnconfigure(0, weight=1)
-
-        # Canvas and scrollbars for grid view
-        self.canvas = tk.Canvas(self.content_frame, bg="white")
-        self.v_scrollbar = ttk.Scrollbar(self.content_frame, orient="vertical", command=self.canvas.yview)
-        self.h_scrollbar = ttk.Scrollbar(self.content_frame, orient="horizontal", command=self.canvas.xview)
-
-        self.scrollable_frame = ttk.Frame(self.canvas)
-
-        self.canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-
-        # Configure canvas scrolling
-        self.canvas.configure(
-            yscrollcommand=self.v_scrollbar.set,
-            xscrollcommand=self.h_scrollbar.set
-        )
-
-        # Bind canvas resize event
-        self.canvas.bind('<Configure>', self._on_canvas_configure)
-        self.scrollable_frame.bind('<Configure>', self._on_frame_configure)
-
-        # Treeview for list view
-        self.tree = ttk.Treeview(self.content_frame, columns=("size", "dimensions", "metadata"),
-                                 show="tree headings", selectmode="extended")
-        self.tree.heading("#0", text="Filename")
-        self.tree.heading("size", text="Size")
-        self.tree.heading("dimensions", text="Dimensions")
-        self.tree.heading("metadata", text="Has Metadata")
-
-        self.tree.column("#0", width=300)
-        self.tree.column("size", width=100)
-        self.tree.column("dimensions", width=150)
-        self.tree.column("metadata", width=100)
-
-        self.tree_scrollbar = ttk.Scrollbar(self.content_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=self.tree_scrollbar.set)
-
-        # Bind tree selection
-        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
-
-        # Side panel for operations
-        side_panel = ttk.LabelFrame(self.parent, text="Operations", padding=10)
-        side_panel.grid(row=1, column=1, sticky="ns", padx=5, pady=5)
-
-        # Metadata operations
-        ttk.Label(side_panel, text="Metadata Operations", font=("Arial", 10, "bold")).pack(pady=(0, 5))
-        ttk.Button(side_panel, text="Remove Metadata from Selected",
-                   command=self.remove_metadata_batch).pack(fill=tk.X, pady=2)
-
-        # Resize operations
-        ttk.Separator(side_panel, orient="horizontal").pack(fill=tk.X, pady=10)
-        ttk.Label(side_panel, text="Resize Operations", font=("Arial", 10, "bold")).pack(pady=(0, 5))
-
-        resize_frame = ttk.Frame(side_panel)
-        resize_frame.pack(fill=tk.X, pady=5)
-
-        ttk.Label(resize_frame, text="Max Width:").grid(row=0, column=0, sticky="w")
-        self.max_width_var = tk.StringVar(value="1920")
-        ttk.Entry(resize_frame, textvariable=self.max_width_var, width=10).grid(row=0, column=1, padx=5)
-
-        ttk.Label(resize_frame, text="Max Height:").grid(row=1, column=0, sticky="w")
-        self.max_height_var = tk.StringVar(value="1080")
-        ttk.Entry(resize_frame, textvariable=self.max_height_var, width=10).grid(row=1, column=1, padx=5)
-
-        ttk.Button(side_panel, text="Resize Selected",
-                   command=self.resize_batch).pack(fill=tk.X, pady=2)
-
-        # Crop operations
-        ttk.Separator(side_panel, orient="horizontal").pack(fill=tk.X, pady=10)
-        ttk.Label(side_panel, text="Crop Operations", font=("Arial", 10, "bold")).pack(pady=(0, 5))
-
-        crop_frame = ttk.Frame(side_panel)
-        crop_frame.pack(fill=tk.X, pady=5)
-
-        ttk.Label(crop_frame, text="Width:").grid(row=0, column=0, sticky="w")
-        self.crop_width_var = tk.StringVar(value="800")
-        ttk.Entry(crop_frame, textvariable=self.crop_width_var, width=10).grid(row=0, column=1, padx=5)
-
-        ttk.Label(crop_frame, text="Height:").grid(row=1, column=0, sticky="w")
-        self.crop_height_var = tk.StringVar(value="600")
-        ttk.Entry(crop_frame, textvariable=self.crop_height_var, width=10).grid(row=1, column=1, padx=5)
-
-        ttk.Button(side_panel, text="Crop Selected (Center)",
-                   command=self.crop_batch).pack(fill=tk.X, pady=2)
-
-        # Status label
-        self.status_label = ttk.Label(side_panel, text="No folder selected")
-        self.status_label.pack(side=tk.BOTTOM, pady=10)
-
-        # Show grid view by default
-        self._show_grid_view()
-
-    def _on_canvas_configure(self, event):
-        """Handle canvas resize event."""
-        if self.view_mode == "grid" and self.images:
-            # Recalculate grid layout when canvas is resized
-            self._reorganize_grid()
-
-    def _on_frame_configure(self, event):
-        """Handle scrollable frame resize event."""
-        # Update scroll region
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
-    def _on_thumbnail_size_change(self):
-        """Handle thumbnail size change."""
-        self.thumbnail_size = self.size_var.get()
-        if self.images and self.view_mode == "grid":
-            # Reload with new size
-            self._load_images()
-
-    def _show_grid_view(self):
-        """Show the grid view."""
-        self.tree.grid_forget()
-        self.tree_scrollbar.grid_forget()
-        self.canvas.grid(row=0, column=0, sticky="nsew")
-        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
-        self.h_scrollbar.grid(row=1, column=0, sticky="ew")
-
-    def _show_list_view(self):
-        """Show the list view."""
-        self.canvas.grid_forget()
-        self.v_scrollbar.grid_forget()
-        self.h_scrollbar.grid_forget()
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        self.tree_scrollbar.grid(row=0, column=1, sticky="ns")
-
-    def toggle_view_mode(self):
-        """Toggle between grid and list view."""
-        if self.view_mode == "grid":
-            self.view_mode = "list"
-            self._show_list_view()
-        else:
-            self.view_mode = "grid"
-            self._show_grid_view()
-            if self.images:
-                self._reorganize_grid()
-
-    def open_folder(self):
-        """Open a folder and load images."""
-        folder_path = filedialog.askdirectory(title="Select Folder")
-        if folder_path:
-            self.current_folder = Path(folder_path)
-            self._load_images()
-
-    def _calculate_columns(self):
-        """Calculate number of columns based on canvas width."""
-        canvas_width = self.canvas.winfo_width()
-        if canvas_width <= 1:  # Canvas not yet rendered
-            canvas_width = 800  # Default width
-
-        # Calculate columns based on thumbnail size and padding
-        thumb_total_width = self.thumbnail_size + (self.grid_padding * 2)
-        columns = max(1, canvas_width // thumb_total_width)
-        return columns
-
-    def _load_images(self):
-        """Load images from the current folder."""
-        if not self.current_folder:
-            return
-
-        self.images = []
-        self.selected_images.clear()
-        self.thumbnails.clear()
-        self.thumbnail_frames = []
-
-        # Clear existing views
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        self.tree.delete(*self.tree.get_children())
-
-        # Find all image files
-        for file_path in self.current_folder.iterdir():
-            if file_path.is_file() and is_image_file(str(file_path)):
-                self.images.append(file_path)
-
-        self.images.sort()
-        self.status_label.config(text=f"Found {len(self.images)} images")
-
-        # Load images in a thread to avoid blocking
-        threading.Thread(target=self._load_thumbnails, daemon=True).start()
-
-    def _load_thumbnails(self):
-        """Load thumbnails for all images."""
-        for i, image_path in enumerate(self.images):
-            try:
-                # Create thumbnail
-                img = Image.open(image_path)
-                img.thumbnail((self.thumbnail_size, self.thumbnail_size))
-                photo = ImageTk.PhotoImage(img)
-                self.thumbnails[str(image_path)] = photo
-
-                # Update UI in main thread
-                self.parent.after(0, self._add_image_to_view, image_path, i)
-
-            except Exception as e:
-                print(f"Error loading {image_path}: {e}")
-
-    def _add_image_to_view(self, image_path, index):
-        """Add an image to both grid and list views."""
-        # Create frame for thumbnail
-        frame = ttk.Frame(self.scrollable_frame, relief=tk.RAISED, borderwidth=1)
-
-        # Thumbnail
-        if str(image_path) in self.thumbnails:
-            label = tk.Label(frame, image=self.thumbnails[str(image_path)])
-            label.pack(padx=5, pady=5)
-
-        # Filename
-        filename_label = tk.Label(frame, text=image_path.name[:25], wraplength=self.thumbnail_size)
-        filename_label.pack(pady=(0, 5))
-
-        # Make clickable
-        frame.bind("<Button-1>", lambda e, p=image_path: self._on_thumbnail_click(p))
-        for child in frame.winfo_children():
-            child.bind("<Button-1>", lambda e, p=image_path: self._on_thumbnail_click(p))
-
-        # Store references
-        frame.image_path = image_path
-        self.thumbnail_frames.append(frame)
-
-        # Add to tree
-        try:
-            img = Image.open(image_path)
-            size_str = get_file_size_str(image_path)
-            dimensions = f"{img.width}x{img.height}"
-            has_metadata = "Yes" if self.metadata_handler.has_metadata(str(image_path)) else "No"
-
-            self.tree.insert("", "end", text=image_path.name,
-                             values=(size_str, dimensions, has_metadata),
-                             tags=(str(image_path),))
-        except Exception as e:
-            print(f"Error adding {image_path} to tree: {e}")
-
-        # Reorganize grid if this is the last image
-        if index == len(self.images) - 1:
-            self.parent.after(0, self._reorganize_grid)
-
-    def _reorganize_grid(self):
-        """Reorganize grid layout based on current canvas width."""
-        if not self.thumbnail_frames:
-            return
-
-        columns = self._calculate_columns()
-
-        # Rearrange all frames in the grid
-        for i, frame in enumerate(self.thumbnail_frames):
-            row = i // columns
-            col = i % columns
-            frame.grid(row=row, column=col, padx=self.grid_padding // 2, pady=self.grid_padding // 2)
-
-        # Update scroll region
-        self.scrollable_frame.update_idletasks()
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-
-    def _on_thumbnail_click(self, image_path):
-        """Handle thumbnail click."""
-        if image_path in self.selected_images:
-            self.selected_images.remove(image_path)
-        else:
-            self.selected_images.add(image_path)
-        self._update_selection_display()
-
-    def _on_tree_select(self, event):
-        """Handle tree selection change."""
-        self.selected_images.clear()
-        for item in self.tree.selection():
-            tags = self.tree.item(item, "tags")
-            if tags:
-                self.selected_images.add(Path(tags[0]))
-        self._update_selection_display()
-
-    def _update_selection_display(self):
-        """Update the visual display of selected items."""
-        # Update grid view
-        for frame in self.thumbnail_frames:
-            if hasattr(frame, 'image_path'):
-                if frame.image_path in self.selected_images:
-                    frame.config(relief=tk.SUNKEN, borderwidth=3)
-                    # Highlight background
-                    frame.config(style='Selected.TFrame')
-                else:
-                    frame.config(relief=tk.RAISED, borderwidth=1)
-                    frame.config(style='TFrame')
-
-        # Update status
-        self.status_label.config(text=f"Selected {len(self.selected_images)} of {len(self.images)} images")
-
-    def select_all(self):
-        """Select all images."""
-        self.selected_images = set(self.images)
-        self._update_selection_display()
-
-        # Update tree selection
-        self.tree.selection_set(self.tree.get_children())
-
-    def clear_selection(self):
-        """Clear selection."""
-        self.selected_images.clear()
-        self._update_selection_display()
-
-        # Clear tree selection
-        self.tree.selection_remove(self.tree.get_children())
-
-    def remove_metadata_batch(self):
-        """Remove metadata from selected images."""
-        if not self.selected_images:
-            messagebox.showwarning("No Selection", "Please select images first.")
-            return
-
-        if messagebox.askyesno("Confirm", f"Remove metadata from {len(self.selected_images)} images?"):
-            success_count = 0
-            for image_path in self.selected_images:
-                try:
-                    self.metadata_handler.remove_all_metadata(str(image_path))
-                    success_count += 1
-                except Exception as e:
-                    print(f"Error processing {image_path}: {e}")
-
-            messagebox.showinfo("Complete", f"Removed metadata from {success_count} images.")
-            self._load_images()  # Reload to update metadata status
-
-    def resize_batch(self):
-        """Resize selected images."""
-        if not self.selected_images:
-            messagebox.showwarning("No Selection", "Please select images first.")
-            return
-
-        try:
-            max_width = int(self.max_width_var.get())
-            max_height = int(self.max_height_var.get())
-        except ValueError:
-            messagebox.showerror("Invalid Input", "Please enter valid dimensions.")
-            return
-
-        if messagebox.askyesno("Confirm", f"Resize {len(self.selected_images)} images?"):
-            success_count = 0
-            for image_path in self.selected_images:
-                try:
-                    self.processor.resize_image(str(image_path), max_width, max_height)
-                    success_count += 1
-                except Exception as e:
-                    print(f"Error resizing {image_path}: {e}")
-
-            messagebox.showinfo("Complete", f"Resized {success_count} images.")
-            self._load_images()  # Reload to show new dimensions
-
-    def crop_batch(self):
-        """Crop selected images."""
-        if not self.selected_images:
-            messagebox.showwarning("No Selection", "Please select images first.")
-            return
-
-        try:
-            width = int(self.crop_width_var.get())
-            height = int(self.crop_height_var.get())
-        except ValueError:
-            messagebox.showerror("Invalid Input", "Please enter valid dimensions.")
-            return
-
-        if messagebox.askyesno("Confirm", f"Crop {len(self.selected_images)} images to {width}x{height}?"):
-            success_count = 0
-            for image_path in self.selected_images:
-                try:
-                    self.processor.crop_center(str(image_path), width, height)
-                    success_count += 1
-                except Exception as e:
-                    print(f"Error cropping {image_path}: {e}")
-
-            messagebox.showinfo("Complete", f"Cropped {success_count} images.")
-            self._load_images()  # Reload to show new dimensions
\ No newline at end of file
+"""Folder view for batch image operations."""
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, simpledialog
+import fnmatch
+import os
+from pathlib import Path
+from PIL import ImageTk
+from core.batch_journal import BatchJournal, new_journal_path
+from core.batch_planner import BatchPlanner
+from core.batch_runner import BatchRunner, make_operation
+from core.image_processor import ImageProcessor
+from core.metadata_handler import MetadataHandler
+from core.metadata_reader import read_metadata
+from core.qos import IO_CLASSES, PROFILES as QOS_PROFILES, QosController, QosProfile
+from core.result_cache import ResultCache
+from core.shm_buffer_pool import SharedBufferPool, available_shared_memory
+from core.thumbnail_cache import ThumbnailCache, MASTER_SIZE
+from core.verify import Verifier
+from gui.selection_model import SelectionModel
+from core.thumbnail_service import (ThumbnailService, PRIORITY_VISIBLE,
+                                    PRIORITY_PREFETCH, PRIORITY_BACKGROUND)
+from utils.helpers import format_duration, format_size, get_cache_dir, is_image_file
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import gc
+
+# Rows above and below the viewport decoded ahead of scrolling
+PREFETCH_ROWS = 4
+
+# Delay between polls for finished thumbnails, and the Tk time spent per poll
+THUMBNAIL_POLL_MS = 30
+THUMBNAIL_BATCH_SECONDS = 0.02
+
+# Minimum interval between batch progress updates on the Tk thread
+BATCH_PROGRESS_SECONDS = 0.1
+
+# List view rows computed past the bottom of the viewport, and rows per worker job
+LIST_LOOKAHEAD_ROWS = 50
+LIST_BATCH_ROWS = 25
+
+
+class FolderView:
+    """Manages the folder view interface."""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.current_folder = None
+        self.images = []
+        self.selection = SelectionModel(on_change=self._on_selection_change)
+        self._index_of = {}  # str(path) -> index into self.images
+        self._selecting_from_tree = False
+        self.view_mode = "grid"  # grid or list
+        self.thumbnails = {}  # str(path) -> PhotoImage, only for thumbnails near the viewport
+        self.thumbnail_frames = []  # Keep track of thumbnail frames
+        self.thumbnail_labels = {}  # str(path) -> image label
+        self.thumbnail_cache = ThumbnailCache()
+        self._thumbnail_errors = set()
+        self.thumbnail_size = 150
+        self.grid_padding = 10
+        self.columns = 1
+
+        self.thumbnail_service = ThumbnailService()
+        self.buffer_pool = None  # shared memory masters are decoded into by worker processes
+        self._near_viewport = set()
+        self._viewport_update_pending = False
+        self._poll_id = None
+        self._placeholder = None
+        self._tree_generation = 0
+        self._tree_order = []  # iids in display order
+        self._row_info = {}  # iid -> (size_bytes, (width, height), has_metadata)
+        self._row_jobs = {}  # iid -> future computing it
+        self._row_executor = ThreadPoolExecutor(max_workers=2)
+        self._sort_column = None
+        self._sort_reverse = False
+
+        self.processor = ImageProcessor()
+        self.metadata_handler = MetadataHandler()
+        self.result_cache = None
+        self.qos = QosController()
+        self.batch_runner = BatchRunner(qos=self.qos)
+        self._batch_cancel = None  # threading.Event while a batch is planned or running
+
+        self._setup_ui()
+
+    def _setup_ui(self):
+        """Set up the folder view UI."""
+        # Configure grid
+        self.parent.grid_rowconfigure(1, weight=1)
+        self.parent.grid_columnconfigure(0, weight=1)
+        self.parent.grid_columnconfigure(1, weight=0)
+
+        # Toolbar
+        toolbar = ttk.Frame(self.parent)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
+
+        ttk.Button(toolbar, text="Open Folder", command=self.open_folder).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Toggle View", command=self.toggle_view_mode).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Select All", command=self.select_all).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Clear Selection", command=self.clear_selection).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Invert Selection", command=self.invert_selection).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="Select by Filter...", command=self.select_by_filter).pack(side=tk.LEFT, padx=2)
+
+        # Thumbnail size control
+        ttk.Label(toolbar, text="Thumbnail Size:").pack(side=tk.LEFT, padx=(20, 5))
+        self.size_var = tk.IntVar(value=150)
+        size_spinbox = ttk.Spinbox(toolbar, from_=50, to=300, increment=25,
+                                   textvariable=self.size_var, width=8,
+                                   command=self._on_thumbnail_size_change)
+        size_spinbox.pack(side=tk.LEFT, padx=2)
+
+        # Main content area with scrollbar
+        self.content_frame = ttk.Frame(self.parent)
+        self.content_frame.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+        self.content_frame.grid_rowconfigure(0, weight=1)
+        self.content_frame.grid_columnconfigure(0, weight=1)
+
+        # Canvas and scrollbars for grid view
+        self.canvas = tk.Canvas(self.content_frame, bg="white")
+        self.v_scrollbar = ttk.Scrollbar(self.content_frame, orient="vertical", command=self.canvas.yview)
+        self.h_scrollbar = ttk.Scrollbar(self.content_frame, orient="horizontal", command=self.canvas.xview)
+
+        self.scrollable_frame = ttk.Frame(self.canvas)
+
+        self.canvas_window = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+
+        # Configure canvas scrolling
+        self.canvas.configure(
+            yscrollcommand=self._on_canvas_yscroll,
+            xscrollcommand=self.h_scrollbar.set
+        )
+
+        # Bind canvas resize event
+        self.canvas.bind('<Configure>', self._on_canvas_configure)
+        self.scrollable_frame.bind('<Configure>', self._on_frame_configure)
+
+        # Treeview for list view
+        self.tree = ttk.Treeview(self.content_frame, columns=("size", "dimensions", "metadata"),
+                                 show="tree headings", selectmode="extended")
+        self.tree.heading("#0", text="Filename", command=lambda: self._sort_by_column("#0"))
+        self.tree.heading("size", text="Size", command=lambda: self._sort_by_column("size"))
+        self.tree.heading("dimensions", text="Dimensions",
+                          command=lambda: self._sort_by_column("dimensions"))
+        self.tree.heading("metadata", text="Has Metadata",
+                          command=lambda: self._sort_by_column("metadata"))
+
+        self.tree.column("#0", width=300)
+        self.tree.column("size", width=100)
+        self.tree.column("dimensions", width=150)
+        self.tree.column("metadata", width=100)
+
+        self.tree_scrollbar = ttk.Scrollbar(self.content_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_yscroll)
+
+        # Bind tree selection
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+
+        # Side panel for operations
+        side_panel = ttk.LabelFrame(self.parent, text="Operations", padding=10)
+        side_panel.grid(row=1, column=1, sticky="ns", padx=5, pady=5)
+
+        # Metadata operations
+        ttk.Label(side_panel, text="Metadata Operations", font=("Arial", 10, "bold")).pack(pady=(0, 5))
+        ttk.Button(side_panel, text="Remove Metadata from Selected",
+                   command=self.remove_metadata_batch).pack(fill=tk.X, pady=2)
+        self.verify_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(side_panel, text="Verify image data afterwards",
+                        variable=self.verify_var).pack(anchor="w")
+
+        # Resize operations
+        ttk.Separator(side_panel, orient="horizontal").pack(fill=tk.X, pady=10)
+        ttk.Label(side_panel, text="Resize Operations", font=("Arial", 10, "bold")).pack(pady=(0, 5))
+
+        resize_frame = ttk.Frame(side_panel)
+        resize_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(resize_frame, text="Max Width:").grid(row=0, column=0, sticky="w")
+        self.max_width_var = tk.StringVar(value="1920")
+        ttk.Entry(resize_frame, textvariable=self.max_width_var, width=10).grid(row=0, column=1, padx=5)
+
+        ttk.Label(resize_frame, text="Max Height:").grid(row=1, column=0, sticky="w")
+        self.max_height_var = tk.StringVar(value="1080")
+        ttk.Entry(resize_frame, textvariable=self.max_height_var, width=10).grid(row=1, column=1, padx=5)
+
+        ttk.Button(side_panel, text="Resize Selected",
+                   command=self.resize_batch).pack(fill=tk.X, pady=2)
+
+        # Crop operations
+        ttk.Separator(side_panel, orient="horizontal").pack(fill=tk.X, pady=10)
+        ttk.Label(side_panel, text="Crop Operations", font=("Arial", 10, "bold")).pack(pady=(0, 5))
+
+        crop_frame = ttk.Frame(side_panel)
+        crop_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(crop_frame, text="Width:").grid(row=0, column=0, sticky="w")
+        self.crop_width_var = tk.StringVar(value="800")
+        ttk.Entry(crop_frame, textvariable=self.crop_width_var, width=10).grid(row=0, column=1, padx=5)
+
+        ttk.Label(crop_frame, text="Height:").grid(row=1, column=0, sticky="w")
+        self.crop_height_var = tk.StringVar(value="600")
+        ttk.Entry(crop_frame, textvariable=self.crop_height_var, width=10).grid(row=1, column=1, padx=5)
+
+        ttk.Button(side_panel, text="Crop Selected (Center)",
+                   command=self.crop_batch).pack(fill=tk.X, pady=2)
+
+        # Result cache
+        ttk.Separator(side_panel, orient="horizontal").pack(fill=tk.X, pady=10)
+        self.use_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(side_panel, text="Reuse cached results",
+                        variable=self.use_cache_var,
+                        command=self._on_cache_toggle).pack(anchor="w")
+
+        # Batch priority; changes also apply to a batch that is already running
+        ttk.Separator(side_panel, orient="horizontal").pack(fill=tk.X, pady=10)
+        ttk.Label(side_panel, text="Batch Priority", font=("Arial", 10, "bold")).pack(pady=(0, 5))
+
+        self.qos_profile_var = tk.StringVar(value=self.qos.profile.name)
+        profile_box = ttk.Combobox(side_panel, textvariable=self.qos_profile_var, state="readonly",
+                                   values=list(QOS_PROFILES) + ["custom"])
+        profile_box.pack(fill=tk.X, pady=2)
+        profile_box.bind("<<ComboboxSelected>>", self._on_qos_profile_selected)
+
+        qos_frame = ttk.Frame(side_panel)
+        qos_frame.pack(fill=tk.X, pady=5)
+        self.qos_vars = {}
+        fields = (("workers", "Workers:"), ("nice", "Niceness:"), ("io_class", "I/O class:"),
+                  ("mb_per_second", "MB/s:"), ("files_per_second", "Files/s:"))
+        for row, (key, label) in enumerate(fields):
+            ttk.Label(qos_frame, text=label).grid(row=row, column=0, sticky="w")
+            var = self.qos_vars[key] = tk.StringVar()
+            if key == "io_class":
+                field = ttk.Combobox(qos_frame, textvariable=var, state="readonly",
+                                     values=list(IO_CLASSES), width=8)
+            else:
+                field = ttk.Entry(qos_frame, textvariable=var, width=10)
+            field.grid(row=row, column=1, padx=5)
+        self._show_qos_profile(self.qos.profile)
+
+        ttk.Button(side_panel, text="Apply Priority",
+                   command=self.apply_qos).pack(fill=tk.X, pady=2)
+
+        ttk.Button(side_panel, text="Cancel Batch",
+                   command=self.cancel_batch).pack(fill=tk.X, pady=(10, 2))
+
+        # Status label
+        self.status_label = ttk.Label(side_panel, text="No folder selected")
+        self.status_label.pack(side=tk.BOTTOM, pady=10)
+
+        # Show grid view by default
+        self._show_grid_view()
+
+    def _on_canvas_configure(self, event):
+        """Handle canvas resize event."""
+        if self.view_mode == "grid" and self.images:
+            # Recalculate grid layout when canvas is resized
+            self._reorganize_grid()
+
+    def _on_canvas_yscroll(self, first, last):
+        """Track scrolling so the thumbnails in view are decoded first."""
+        self.v_scrollbar.set(first, last)
+        self._schedule_viewport_update()
+
+    def _on_frame_configure(self, event):
+        """Handle scrollable frame resize event."""
+        # Update scroll region
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    def _on_thumbnail_size_change(self):
+        """Handle thumbnail size change."""
+        self.thumbnail_size = self.size_var.get()
+        if not self.thumbnail_frames:
+            return
+
+        # Every size is derived from the cached masters, so nothing is re-read
+        self._placeholder.configure(width=self.thumbnail_size, height=self.thumbnail_size)
+        for key in list(self.thumbnails):
+            self._hide_thumbnail(key)
+        self._near_viewport = set()
+        self.thumbnail_cache.drop_variants()
+        for frame in self.thumbnail_frames:
+            frame.filename_label.config(wraplength=self.thumbnail_size)
+        self._reorganize_grid()
+
+    def _on_cache_toggle(self):
+        """Enable or disable the content-addressed result cache."""
+        if self.use_cache_var.get():
+            if self.result_cache is None:
+                self.result_cache = ResultCache(get_cache_dir() / "results")
+            cache = self.result_cache
+        else:
+            cache = None
+        self.processor.cache = cache
+        self.metadata_handler.cache = cache
+
+    def _show_qos_profile(self, profile):
+        """Fill the batch priority fields from a profile; empty means no limit."""
+        values = {"workers": profile.workers, "nice": profile.nice, "io_class": profile.io_class,
+                  "mb_per_second": (profile.bytes_per_second / (1024 * 1024)
+                                    if profile.bytes_per_second else None),
+                  "files_per_second": profile.files_per_second}
+        for key, value in values.items():
+            self.qos_vars[key].set("" if value is None else
+                                   f"{value:g}" if isinstance(value, float) else str(value))
+
+    def _on_qos_profile_selected(self, event=None):
+        """Switch to a preset priority profile."""
+        profile = QOS_PROFILES.get(self.qos_profile_var.get())
+        if profile is None:
+            return  # "custom" takes effect with Apply Priority
+        self._show_qos_profile(profile)
+        self.qos.set_profile(profile)
+        self.status_label.config(text=f"Priority: {profile.describe()}")
+
+    def apply_qos(self):
+        """Apply the batch priority fields as a custom profile."""
+        def number(key, kind):
+            text = self.qos_vars[key].get().strip()
+            return kind(text) if text else None
+
+        try:
+            mb_per_second = number("mb_per_second", float)
+            profile = QosProfile("custom", workers=number("workers", int),
+                                 nice=number("nice", int) or 0,
+                                 io_class=self.qos_vars["io_class"].get(),
+                                 bytes_per_second=(int(mb_per_second * 1024 * 1024)
+                                                   if mb_per_second else None),
+                                 files_per_second=number("files_per_second", float))
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", f"Invalid batch priority: {e}")
+            return
+        self.qos_profile_var.set("custom")
+        self.qos.set_profile(profile)
+        self.status_label.config(text=f"Priority: {profile.describe()}")
+
+    def _cache_summary(self):
+        """Return a short cache statistics line for completion messages."""
+        if self.processor.cache is None:
+            return ""
+        self.result_cache.flush()
+        stats = self.result_cache.get_stats()
+        return (f"\n\nCache: {stats['hits']} hits, {stats['misses']} misses, "
+                f"~{stats['seconds_saved']:.1f}s saved")
+
+    def _show_grid_view(self):
+        """Show the grid view."""
+        self.tree.grid_forget()
+        self.tree_scrollbar.grid_forget()
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.h_scrollbar.grid(row=1, column=0, sticky="ew")
+
+    def _show_list_view(self):
+        """Show the list view."""
+        self.canvas.grid_forget()
+        self.v_scrollbar.grid_forget()
+        self.h_scrollbar.grid_forget()
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.tree_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.parent.after_idle(self._request_visible_rows)
+
+    def toggle_view_mode(self):
+        """Toggle between grid and list view."""
+        if self.view_mode == "grid":
+            self.view_mode = "list"
+            self._show_list_view()
+        else:
+            self.view_mode = "grid"
+            self._show_grid_view()
+            if self.images:
+                self._reorganize_grid()
+
+    def open_folder(self):
+        """Open a folder and load images."""
+        folder_path = filedialog.askdirectory(title="Select Folder")
+        if folder_path:
+            self.current_folder = Path(folder_path)
+            self.thumbnail_cache.clear()
+            self._load_images()
+
+    def _calculate_columns(self):
+        """Calculate number of columns based on canvas width."""
+        canvas_width = self.canvas.winfo_width()
+        if canvas_width <= 1:  # Canvas not yet rendered
+            canvas_width = 800  # Default width
+
+        # Calculate columns based on thumbnail size and padding
+        thumb_total_width = self.thumbnail_size + (self.grid_padding * 2)
+        columns = max(1, canvas_width // thumb_total_width)
+        return columns
+
+    def _load_images(self):
+        """Load images from the current folder."""
+        if not self.current_folder:
+            return
+
+        self.images = []
+        self.selection.reset(0)
+        self.thumbnails.clear()
+        self.thumbnail_frames = []
+        self.thumbnail_labels = {}
+        self._thumbnail_errors = set()
+        self._near_viewport = set()
+        self.thumbnail_service.cancel_all()
+
+        # Clear existing views
+        for widget in self.scrollable_frame.winfo_children():
+            widget.destroy()
+        self.tree.delete(*self.tree.get_children())
+
+        # Find all image files
+        for file_path in self.current_folder.iterdir():
+            if file_path.is_file() and is_image_file(str(file_path)):
+                self.images.append(file_path)
+
+        self.images.sort()
+        self._index_of = {str(image_path): i for i, image_path in enumerate(self.images)}
+        self.selection.reset(len(self.images))
+        self.status_label.config(text=f"Found {len(self.images)} images")
+
+        # Lay out placeholders right away; thumbnails fill in as they decode
+        self._placeholder = tk.PhotoImage(width=self.thumbnail_size, height=self.thumbnail_size)
+        for index, image_path in enumerate(self.images):
+            self._add_image_to_view(image_path, index)
+        self._reorganize_grid()
+
+        self._request_masters()
+        self._update_viewport_priorities()
+        self._start_thumbnail_polling()
+
+        # List view rows start with just the filename; the other columns
+        # are filled in as rows come into view
+        self._reset_tree_rows()
+        for image_path in self.images:
+            self.tree.insert("", "end", iid=str(image_path), text=image_path.name,
+                             values=("", "", ""), tags=(str(image_path),))
+        self._tree_order = [str(image_path) for image_path in self.images]
+        self._request_visible_rows()
+
+    def _add_image_to_view(self, image_path, index):
+        """Add a placeholder thumbnail frame to the grid view."""
+        # Create frame for thumbnail
+        frame = ttk.Frame(self.scrollable_frame, relief=tk.RAISED, borderwidth=1)
+
+        # Thumbnail, shown blank until decoded
+        label = tk.Label(frame, image=self._placeholder)
+        label.pack(padx=5, pady=5)
+        self.thumbnail_labels[str(image_path)] = label
+
+        # Filename
+        filename_label = tk.Label(frame, text=image_path.name[:25], wraplength=self.thumbnail_size)
+        filename_label.pack(pady=(0, 5))
+        frame.filename_label = filename_label
+
+        # Make clickable; Shift+Click extends from the last clicked thumbnail
+        for widget in (frame, *frame.winfo_children()):
+            widget.bind("<Button-1>", lambda e, i=index: self.selection.toggle(i))
+            widget.bind("<Shift-Button-1>", lambda e, i=index: self.selection.select_range(i))
+
+        # Store references
+        frame.image_path = image_path
+        self.thumbnail_frames.append(frame)
+
+    def _reset_tree_rows(self):
+        """Forget computed list view columns and cancel queued row jobs."""
+        self._tree_generation += 1
+        for future in self._row_jobs.values():
+            future.cancel()
+        self._row_jobs = {}
+        self._row_info = {}
+        self._sort_column = None
+
+    def _on_tree_yscroll(self, first, last):
+        """Track list view scrolling so the rows in view get their columns."""
+        self.tree_scrollbar.set(first, last)
+        self._request_visible_rows()
+
+    def _request_visible_rows(self):
+        """Queue column computation for visible rows plus a small look-ahead."""
+        if self.view_mode != "list" or not self._tree_order:
+            return
+
+        count = len(self._tree_order)
+        top, bottom = self.tree.yview()
+        first = int(float(top) * count)
+        last = min(count, int(float(bottom) * count) + 1 + LIST_LOOKAHEAD_ROWS)
+        wanted = set(self._tree_order[first:last])
+
+        # Rows that scrolled away before their job started are dropped
+        for iid, future in list(self._row_jobs.items()):
+            if iid not in wanted and future.cancel():
+                del self._row_jobs[iid]
+
+        missing = [iid for iid in self._tree_order[first:last]
+                   if iid not in self._row_info and iid not in self._row_jobs]
+        for i in range(0, len(missing), LIST_BATCH_ROWS):
+            self._submit_rows(missing[i:i + LIST_BATCH_ROWS])
+
+    def _submit_rows(self, iids, then_sort=None):
+        """Compute columns for iids on the row worker."""
+        future = self._row_executor.submit(self._compute_rows, iids, self._tree_generation, then_sort)
+        # The bulk sort pass is not tracked per row, so scrolling never cancels it
+        if then_sort is None:
+            for iid in iids:
+                self._row_jobs[iid] = future
+
+    def _compute_rows(self, iids, generation, then_sort):
+        """Read size, dimensions and metadata presence for a batch of rows."""
+        rows = []
+        for iid in iids:
+            if generation != self._tree_generation:
+                return
+            try:
+                size = os.path.getsize(iid)
+                # One header pass gives both the dimensions and metadata presence
+                meta = read_metadata(iid)
+                if meta.size is None:
+                    raise ValueError("Unknown dimensions")
+                rows.append((iid, (size, meta.size, meta.has_metadata())))
+            except Exception as e:
+                print(f"Error reading {iid}: {e}")
+                rows.append((iid, None))
+
+        # Update UI in main thread, one call per batch
+        self.parent.after(0, self._fill_tree_rows, rows, generation, then_sort)
+
+    def _fill_tree_rows(self, rows, generation, then_sort):
+        """Show computed columns, unless the folder has been reloaded since."""
+        if generation != self._tree_generation:
+            return
+
+        for iid, info in rows:
+            self._row_jobs.pop(iid, None)
+            self._row_info[iid] = info
+            if info is not None:
+                size, (width, height), has_metadata = info
+                self.tree.item(iid, values=(format_size(size), f"{width}x{height}",
+                                            "Yes" if has_metadata else "No"))
+
+        if then_sort is not None:
+            self._apply_sort(then_sort)
+
+    def _sort_by_column(self, column):
+        """Sort the list view, reading the headers of rows not yet computed."""
+        if column == self._sort_column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column = column
+            self._sort_reverse = False
+
+        missing = [iid for iid in self._tree_order if iid not in self._row_info]
+        if column == "#0" or not missing:
+            self._apply_sort(column)
+            return
+
+        # One bulk pass over the remaining rows, then sort
+        self.status_label.config(text=f"Reading {len(missing)} image headers to sort...")
+        self._submit_rows(missing, then_sort=column)
+
+    def _apply_sort(self, column):
+        """Reorder the list view rows by column."""
+        def key(iid):
+            if column == "#0":
+                return Path(iid).name.lower()
+            info = self._row_info.get(iid)
+            if info is None:
+                return -1
+            size, (width, height), has_metadata = info
+            if column == "size":
+                return size
+            if column == "dimensions":
+                return width * height
+            return int(has_metadata)
+
+        self._tree_order.sort(key=key, reverse=self._sort_reverse)
+        for index, iid in enumerate(self._tree_order):
+            self.tree.move(iid, "", index)
+        self._update_status()
+        self._request_visible_rows()
+
+    def _schedule_viewport_update(self):
+        """Coalesce scroll and resize events into one priority update."""
+        if not self._viewport_update_pending:
+            self._viewport_update_pending = True
+            self.parent.after_idle(self._update_viewport_priorities)
+
+    def _visible_range(self):
+        """Return (first, last) indices of the thumbnails in the viewport."""
+        count = len(self.thumbnail_frames)
+        rows = (count + self.columns - 1) // self.columns
+        top, bottom = self.canvas.yview()
+        first_row = int(top * rows)
+        last_row = min(rows - 1, int(bottom * rows))
+        return first_row * self.columns, min(count, (last_row + 1) * self.columns) - 1
+
+    def _update_viewport_priorities(self):
+        """Serve the viewport first, then nearby rows; demote everything else."""
+        self._viewport_update_pending = False
+        if not self.thumbnail_frames:
+            return
+
+        first, last = self._visible_range()
+        prefetch = PREFETCH_ROWS * self.columns
+        start = max(0, first - prefetch)
+        end = min(len(self.images), last + prefetch + 1)
+
+        near = {}
+        for index in range(start, end):
+            key = str(self.images[index])
+            near[key] = PRIORITY_VISIBLE if first <= index <= last else PRIORITY_PREFETCH
+
+        # Thumbnails that scrolled away give back their Tk images
+        departed = self._near_viewport - near.keys()
+        for key in departed:
+            self._hide_thumbnail(key)
+        self.thumbnail_service.set_priorities(dict.fromkeys(departed, PRIORITY_BACKGROUND))
+
+        # Show what the cache already has; decode the rest
+        for key, priority in near.items():
+            if key in self.thumbnails or key in self._thumbnail_errors:
+                continue
+            if not self._show_thumbnail(key):
+                self.thumbnail_service.request(key, key, MASTER_SIZE, priority)
+
+        self._near_viewport = set(near)
+        self._start_thumbnail_polling()
+
+    def set_decode_processes(self, enabled):
+        """
+        Decode thumbnails in worker processes that write into shared memory, or in threads.
+
+        The shared pool is sized like the thumbnail cache, since cached
+        masters keep their slots, but never beyond half the free shared
+        memory. Queued thumbnails are requested again from the new service.
+        """
+        if enabled == self.thumbnail_service.processes:
+            return
+        if enabled and self.buffer_pool is None:
+            slot_size = MASTER_SIZE * MASTER_SIZE * 4
+            budget = self.thumbnail_cache.max_bytes
+            available = available_shared_memory()
+            if available is not None:
+                budget = min(budget, available // 2)
+            if budget >= slot_size:
+                self.buffer_pool = SharedBufferPool(slot_size, budget // slot_size)
+
+        self.thumbnail_service.shutdown()
+        self.thumbnail_service = ThumbnailService(processes=enabled,
+                                                  buffer_pool=self.buffer_pool if enabled else None)
+        self._request_masters()
+        self._near_viewport = set()
+        self._update_viewport_priorities()
+
+    def _request_masters(self):
+        """Prefetch as many masters as the cache can hold."""
+        prefetch_count = self.thumbnail_cache.max_bytes // (MASTER_SIZE * MASTER_SIZE * 3)
+        for image_path in self.images[:prefetch_count]:
+            key = str(image_path)
+            if key not in self.thumbnail_cache and key not in self._thumbnail_errors:
+                self.thumbnail_service.request(key, key, MASTER_SIZE, PRIORITY_BACKGROUND)
+
+    def shutdown(self):
+        """
+        Stop background work and free the shared thumbnail buffers.
+
+        Returns:
+            list: BufferLeases that were still held, i.e. leaked
+        """
+        self.thumbnail_service.shutdown()
+        self._row_executor.shutdown(wait=False, cancel_futures=True)
+        if self._batch_cancel is not None:
+            self._batch_cancel.set()
+        if self.result_cache is not None:
+            self.result_cache.flush()
+        if self.buffer_pool is None:
+            return []
+        # Masters built from shared slots give them back once collected
+        self.thumbnails.clear()
+        self.thumbnail_cache.clear()
+        gc.collect()
+        return self.buffer_pool.close()
+
+    def _show_thumbnail(self, key):
+        """Display key from the thumbnail cache; return False if it is not cached."""
+        img = self.thumbnail_cache.get(key, self.thumbnail_size)
+        if img is None:
+            return False
+        photo = ImageTk.PhotoImage(img)
+        self.thumbnails[key] = photo
+        self.thumbnail_labels[key].config(image=photo)
+        return True
+
+    def _hide_thumbnail(self, key):
+        """Swap a thumbnail back to the placeholder and release its Tk image."""
+        if self.thumbnails.pop(key, None) is not None:
+            self.thumbnail_labels[key].config(image=self._placeholder)
+
+    def _start_thumbnail_polling(self):
+        """Begin collecting decoded thumbnails on the Tk thread."""
+        if self._poll_id is None:
+            self._poll_id = self.parent.after(THUMBNAIL_POLL_MS, self._poll_thumbnails)
+
+    def _poll_thumbnails(self):
+        """Cache a batch of decoded masters and show those in view, then poll again."""
+        self._poll_id = None
+        deadline = time.perf_counter() + THUMBNAIL_BATCH_SECONDS
+        while time.perf_counter() < deadline:
+            results = self.thumbnail_service.take_results(limit=16)
+            if not results:
+                break
+            for result in results:
+                if result.error is not None:
+                    print(f"Error loading {result.key}: {result.error}")
+                    self._thumbnail_errors.add(result.key)
+                    continue
+                # Background prefetches go in cold so they never evict what is on screen
+                hot = result.key in self._near_viewport
+                self.thumbnail_cache.put(result.key, result.to_image(), hot=hot)
+                if hot and result.key not in self.thumbnails and result.key in self.thumbnail_labels:
+                    self._show_thumbnail(result.key)
+
+        if self.thumbnail_service.pending():
+            self._start_thumbnail_polling()
+
+    def _reorganize_grid(self):
+        """Reorganize grid layout based on current canvas width."""
+        if not self.thumbnail_frames:
+            return
+
+        columns = self._calculate_columns()
+        self.columns = columns
+
+        # Rearrange all frames in the grid
+        for i, frame in enumerate(self.thumbnail_frames):
+            row = i // columns
+            col = i % columns
+            frame.grid(row=row, column=col, padx=self.grid_padding // 2, pady=self.grid_padding // 2)
+
+        # Update scroll region
+        self.scrollable_frame.update_idletasks()
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self._schedule_viewport_update()
+
+    @property
+    def selected_images(self):
+        """Paths of the selected images, in folder order."""
+        return [self.images[index] for index in self.selection]
+
+    def _on_tree_select(self, event):
+        """Handle tree selection change."""
+        indices = [self._index_of[iid] for iid in self.tree.selection() if iid in self._index_of]
+        self._selecting_from_tree = True
+        try:
+            self.selection.set_indices(indices)
+        finally:
+            self._selecting_from_tree = False
+
+    def _on_selection_change(self, added, removed):
+        """Repaint only the items whose selection state changed."""
+        # Update grid view
+        for index in added:
+            self.thumbnail_frames[index].config(relief=tk.SUNKEN, borderwidth=3,
+                                                style='Selected.TFrame')
+        for index in removed:
+            self.thumbnail_frames[index].config(relief=tk.RAISED, borderwidth=1, style='TFrame')
+
+        # Mirror the change in the list view, unless it came from there
+        if not self._selecting_from_tree:
+            if added:
+                self.tree.selection_add([str(self.images[index]) for index in added])
+            if removed:
+                self.tree.selection_remove([str(self.images[index]) for index in removed])
+
+        self._update_status()
+
+    def _update_status(self):
+        """Show the selection count."""
+        self.status_label.config(text=f"Selected {len(self.selection)} of {len(self.images)} images")
+
+    def select_all(self):
+        """Select all images."""
+        self.selection.select_all()
+
+    def clear_selection(self):
+        """Clear selection."""
+        self.selection.clear()
+
+    def invert_selection(self):
+        """Select the unselected images and deselect the rest."""
+        self.selection.invert()
+
+    def select_by_filter(self):
+        """Select images whose filename matches a wildcard pattern."""
+        pattern = simpledialog.askstring("Select by Filter", "Filename pattern (e.g. *.png or IMG_*):",
+                                         parent=self.parent)
+        if not pattern:
+            return
+        pattern = pattern.lower()
+        self.selection.select_matching(
+            lambda index: fnmatch.fnmatchcase(self.images[index].name.lower(), pattern))
+
+    def _start_batch(self, operation, params, func, question, done_message, verifier=None):
+        """Plan a batch in the background, confirm it with a summary, then run it."""
+        if self._batch_cancel is not None:
+            messagebox.showwarning("Busy", "A batch operation is already running.")
+            return
+
+        paths = self.selected_images
+        self._batch_cancel = threading.Event()
+        self.status_label.config(text=f"Scanning {len(paths)} images...")
+
+        def plan():
+            try:
+                planner = BatchPlanner(workers=self.batch_runner.workers)
+                batch_plan = planner.plan(paths, operation, params)
+            except Exception as e:
+                self.parent.after(0, self._finish_batch, None, f"Could not plan batch: {e}")
+                return
+            self.parent.after(0, self._confirm_batch, batch_plan, func, question, done_message,
+                              verifier)
+
+        threading.Thread(target=plan, daemon=True).start()
+
+    def _confirm_batch(self, plan, func, question, done_message, verifier=None):
+        """Show the pre-run summary and start the batch if confirmed."""
+        confirmed = messagebox.askyesno("Confirm", f"{question}\n\n{plan.summary()}")
+        if not confirmed or self._batch_cancel.is_set():
+            self._batch_cancel = None
+            self._update_status()
+            return
+
+        cancel = self._batch_cancel
+        last_update = [0.0]
+
+        def progress(snapshot):
+            # Coalesce updates so large batches do not flood the Tk event queue
+            now = time.perf_counter()
+            if now - last_update[0] >= BATCH_PROGRESS_SECONDS or snapshot.done == snapshot.total:
+                last_update[0] = now
+                self.parent.after(0, self._show_batch_progress, snapshot)
+
+        def run():
+            # Journal the batch so an interrupted run can be finished with "resume"
+            try:
+                journal = BatchJournal.create(new_journal_path(), plan.operation, plan.params,
+                                              [item.path for item in plan.items],
+                                              encode=self.processor.encode_options.to_dict(),
+                                              verify=verifier.mode if verifier else None)
+            except OSError as e:
+                self.parent.after(0, self._finish_batch, None, f"Could not create batch journal: {e}")
+                return
+            report = self.batch_runner.run(plan, func, progress=progress, cancel=cancel,
+                                           journal=journal)
+            journal.close(finished=not report["cancelled"])
+            report["journal"] = journal.path
+            report["verify"] = verifier
+            self.parent.after(0, self._finish_batch, report, done_message)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _show_batch_progress(self, snapshot):
+        """Show batch progress and the refined ETA."""
+        text = f"Processed {snapshot.done} of {snapshot.total}"
+        if snapshot.failed:
+            text += f" ({snapshot.failed} failed)"
+        if snapshot.done < snapshot.total:
+            text += f"\nabout {format_duration(snapshot.eta)} left"
+        self.status_label.config(text=text)
+
+    def _finish_batch(self, report, done_message):
+        """Report the outcome of a batch and reload the folder."""
+        self._batch_cancel = None
+        if report is None:
+            messagebox.showerror("Error", done_message)
+            self._update_status()
+            return
+
+        for path, error in report["failed"]:
+            print(f"Error processing {path}: {error}")
+
+        message = done_message.format(count=report["succeeded"])
+        if report["failed"]:
+            message += f" {len(report['failed'])} failed."
+        if report["cancelled"]:
+            message = ("Batch cancelled. " + message +
+                       f"\n\nFinish it later with: just-de-pic resume {report['journal']}")
+        message += f"\n\nTook {format_duration(report['elapsed'])}."
+        if report.get("prefetch") is not None:
+            message += f"\n{report['prefetch'].summary()}"
+        if report.get("verify") is not None:
+            message += f"\n{report['verify'].summary()}"
+        if report.get("qos") is not None and report["qos"].throttled:
+            message += f"\n{report['qos'].summary()}"
+        messagebox.showinfo("Complete", message + self._cache_summary())
+        self._load_images()  # Reload to show updated files
+
+    def cancel_batch(self):
+        """Stop starting new items in the running batch."""
+        if self._batch_cancel is not None:
+            self._batch_cancel.set()
+
+    def remove_metadata_batch(self):
+        """Remove metadata from selected images."""
+        if not self.selected_images:
+            messagebox.showwarning("No Selection", "Please select images first.")
+            return
+
+        verifier = Verifier("pixels") if self.verify_var.get() else None
+        strip = make_operation("strip", (), metadata_handler=self.metadata_handler,
+                               verifier=verifier)
+        self._start_batch("strip", (), strip,
+                          f"Remove metadata from {len(self.selection)} images?",
+                          "Removed metadata from {count} images.", verifier)
+
+    def resize_batch(self):
+        """Resize selected images."""
+        if not self.selected_images:
+            messagebox.showwarning("No Selection", "Please select images first.")
+            return
+
+        try:
+            max_width = int(self.max_width_var.get())
+            max_height = int(self.max_height_var.get())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter valid dimensions.")
+            return
+
+        params = (max_width, max_height, True)
+        resize = make_operation("resize", params, processor=self.processor)
+
+        def resize_and_forget(image_path):
+            resize(image_path)
+            self.thumbnail_cache.discard(str(image_path))
+
+        self._start_batch("resize", params, resize_and_forget,
+                          f"Resize {len(self.selection)} images?",
+                          "Resized {count} images.")
+
+    def crop_batch(self):
+        """Crop selected images."""
+        if not self.selected_images:
+            messagebox.showwarning("No Selection", "Please select images first.")
+            return
+
+        try:
+            width = int(self.crop_width_var.get())
+            height = int(self.crop_height_var.get())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter valid dimensions.")
+            return
+
+        crop = make_operation("crop_center", (width, height), processor=self.processor)
+
+        def crop_and_forget(image_path):
+            crop(image_path)
+            self.thumbnail_cache.discard(str(image_path))
+
+        self._start_batch("crop_center", (width, height), crop_and_forget,
+                          f"Crop {len(self.selection)} images to {width}x{height}?",
+                          "Cropped {count} images.")
\ No newline at end of file
@@ -1,76 +1,164 @@
-"""Main window and application controller for Just De Pic."""
-
-import tkinter as tk
-from tkinter import ttk
-from gui.folder_view import FolderView
-from gui.single_image_view import SingleImageView
-
-
-class JustDePicApp:
-    """Main application class."""
-    
-    def __init__(self):
-        self.root = tk.Tk()
-        self.root.title("Just De Pic - Image Metadata Tool")
-        self.root.geometry("1200x800")
-        
-        # Configure grid weight
-        self.root.grid_rowconfigure(0, weight=1)
-        self.root.grid_columnconfigure(0, weight=1)
-        
-        # Create notebook for tabs
-        self.notebook = ttk.Notebook(self.root)
-        self.notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-        
-        # Create folder view tab
-        self.folder_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.folder_frame, text="Folder Mode")
-        self.folder_view = FolderView(self.folder_frame)
-        
-        # Create single image view tab
-        self.single_frame = ttk.Frame(self.notebook)
-        self.notebook.add(self.single_frame, text="Single Image Mode")
-        self.single_view = SingleImageView(self.single_frame)
-        
-        # Set up menu bar
-        self._create_menu()
-        
-    def _create_menu(self):
-        """Create the application menu bar."""
-        menubar = tk.Menu(self.root)
-        self.root.config(menu=menubar)
-        
-        # File menu
-        file_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Open Folder", command=self.folder_view.open_folder)
-        file_menu.add_command(label="Open Image", command=self.single_view.open_image)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
-        
-        # View menu
-        view_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="View", menu=view_menu)
-        view_menu.add_command(label="Toggle View Mode", command=self.folder_view.toggle_view_mode)
-        
-        # Help menu
-        help_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Help", menu=help_menu)
-        help_menu.add_command(label="About", command=self._show_about)
-    
-    def _show_about(self):
-        """Show about dialog."""
-        about_window = tk.Toplevel(self.root)
-        about_window.title("About Just De Pic")
-        about_window.geometry("400x200")
-        about_window.transient(self.root)
-        
-        tk.Label(about_window, text="Just De Pic", font=("Arial", 16, "bold")).pack(pady=10)
-        tk.Label(about_window, text="Image Metadata Removal and Editing Tool").pack()
-        tk.Label(about_window, text="Version 1.0").pack()
-        tk.Label(about_window, text="\nRemove metadata, resize, and crop images\nwith ease!").pack(pady=10)
-        tk.Button(about_window, text="OK", command=about_window.destroy).pack(pady=10)
-    
-    def run(self):
-        """Start the application."""
+"""Main window and application controller for Just De Pic."""
+
+import threading
+import tkinter as tk
+from pathlib import Path
+from tkinter import ttk, filedialog, messagebox
+from core.archive_stripper import ArchiveStripper
+from core.metadata_export import export_metadata
+from gui.folder_view import FolderView
+from gui.single_image_view import SingleImageView
+from utils.helpers import iter_image_files
+
+
+class JustDePicApp:
+    """Main application class."""
+    
+    def __init__(self):
+        self.root = tk.Tk()
+        self.root.title("Just De Pic - Image Metadata Tool")
+        self.root.geometry("1200x800")
+        
+        # Configure grid weight
+        self.root.grid_rowconfigure(0, weight=1)
+        self.root.grid_columnconfigure(0, weight=1)
+        
+        # Create notebook for tabs
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        
+        # Create folder view tab
+        self.folder_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.folder_frame, text="Folder Mode")
+        self.folder_view = FolderView(self.folder_frame)
+        
+        # Create single image view tab
+        self.single_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.single_frame, text="Single Image Mode")
+        self.single_view = SingleImageView(self.single_frame)
+        
+        # Set up menu bar
+        self._create_menu()
+        self.root.protocol("WM_DELETE_WINDOW", self._quit)
+        
+    def _create_menu(self):
+        """Create the application menu bar."""
+        menubar = tk.Menu(self.root)
+        self.root.config(menu=menubar)
+        
+        # File menu
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="Open Folder", command=self.folder_view.open_folder)
+        file_menu.add_command(label="Open Image", command=self.single_view.open_image)
+        file_menu.add_command(label="Strip Metadata in Archive...", command=self._strip_archive)
+        file_menu.add_command(label="Export Metadata Report...", command=self._export_metadata)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self._quit)
+        
+        # View menu
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Toggle View Mode", command=self.folder_view.toggle_view_mode)
+        self.decode_processes_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Decode Images in Worker Processes",
+                                  variable=self.decode_processes_var,
+                                  command=self._toggle_decode_processes)
+        
+        # Help menu
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Help", menu=help_menu)
+        help_menu.add_command(label="About", command=self._show_about)
+    
+    def _toggle_decode_processes(self):
+        """Move thumbnail and preview decoding into worker processes, or back to threads."""
+        enabled = self.decode_processes_var.get()
+        self.folder_view.set_decode_processes(enabled)
+        self.single_view.set_decode_processes(enabled)
+        
+    def _quit(self):
+        """Stop background decoding, report leaked shared buffers and close the window."""
+        for view in (self.folder_view, self.single_view):
+            for lease in view.shutdown():
+                print(f"Shared image buffer still in use at exit: {lease}")
+        self.root.destroy()
+    
+    def _strip_archive(self):
+        """Write a copy of a ZIP/TAR archive with metadata stripped from its images."""
+        src_path = filedialog.askopenfilename(
+            title="Select Archive",
+            filetypes=[
+                ("Archives", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz"),
+                ("All files", "*.*")
+            ]
+        )
+        if not src_path:
+            return
+            
+        dst_path = filedialog.asksaveasfilename(title="Save Stripped Archive As",
+                                                initialfile="stripped_" + Path(src_path).name)
+        if not dst_path:
+            return
+            
+        def worker():
+            try:
+                stats = ArchiveStripper().strip_archive(src_path, dst_path)
+            except Exception as e:
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to process archive: {e}"))
+                return
+                
+            message = (f"Stripped {stats['stripped']} images, "
+                       f"copied {stats['copied']} other files.")
+            if stats["failed"]:
+                message += f"\n\n{len(stats['failed'])} images could not be processed and were left out."
+            self.root.after(0, lambda: messagebox.showinfo("Complete", message))
+            
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _export_metadata(self):
+        """Write a CSV or JSONL metadata report for every image under a folder."""
+        folder = filedialog.askdirectory(title="Select Folder to Report On")
+        if not folder:
+            return
+            
+        dst_path = filedialog.asksaveasfilename(
+            title="Save Metadata Report As",
+            initialfile="metadata_report.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("All files", "*.*")]
+        )
+        if not dst_path:
+            return
+        fmt = "jsonl" if dst_path.lower().endswith(".jsonl") else "csv"
+        
+        def worker():
+            try:
+                with open(dst_path, 'w', encoding='utf-8', newline='') as stream:
+                    stats = export_metadata(iter_image_files([folder]), stream, fmt)
+            except Exception as e:
+                self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to export metadata: {e}"))
+                return
+                
+            message = f"Exported metadata for {stats['records']} images."
+            if stats["errors"]:
+                message += f"\n\n{stats['errors']} files could not be read; see the error column."
+            self.root.after(0, lambda: messagebox.showinfo("Complete", message))
+            
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _show_about(self):
+        """Show about dialog."""
+        about_window = tk.Toplevel(self.root)
+        about_window.title("About Just De Pic")
+        about_window.geometry("400x200")
+        about_window.transient(self.root)
+        
+        tk.Label(about_window, text="Just De Pic", font=("Arial", 16, "bold")).pack(pady=10)
+        tk.Label(about_window, text="Image Metadata Removal and Editing Tool").pack()
+        tk.Label(about_window, text="Version 1.0").pack()
+        tk.Label(about_window, text="\nRemove metadata, resize, and crop images\nwith ease!").pack(pady=10)
+        tk.Button(about_window, text="OK", command=about_window.destroy).pack(pady=10)
+    
+    def run(self):
+        """Start the application."""
         self.root.mainloop()
\ No newline at end of file
@@ -0,0 +1,372 @@
+"""Local HTTP service exposing strip, resize, crop and metadata info."""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from core.encode_options import EncodeOptions, parse_size
+from core.image_processor import ImageProcessor
+from core.metadata_handler import MetadataHandler
+from server.metrics import ServiceMetrics
+
+DEFAULT_PORT = 8765
+MAX_BODY_SIZE = 256 * 1024 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+MAX_HEADER_COUNT = 100
+
+# Routes recorded in metrics under their own label; anything else is "other"
+ENDPOINTS = ('/strip', '/resize', '/crop', '/info', '/metrics')
+
+CONTENT_TYPES = (
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+    (b'BM', 'image/bmp'),
+)
+
+
+# Worker entry points. These run in the process pool, so they must be
+# module-level functions that only take and return picklable values.
+
+def _run_strip(data, encode):
+    return MetadataHandler(encode_options=EncodeOptions.from_dict(encode)).remove_all_metadata(data)
+
+
+def _run_resize(data, width, height, exact, encode):
+    processor = ImageProcessor(encode_options=EncodeOptions.from_dict(encode))
+    return processor.resize_image(data, width, height, maintain_aspect=not exact)
+
+
+def _run_crop(data, width, height, encode):
+    return ImageProcessor(encode_options=EncodeOptions.from_dict(encode)).crop_center(data, width, height)
+
+
+def _run_info(data):
+    metadata = MetadataHandler().get_all_metadata(data)
+    return json.dumps(metadata, default=str).encode('utf-8')
+
+
+def _guess_content_type(data):
+    """Guess an image MIME type from its leading bytes."""
+    for magic, content_type in CONTENT_TYPES:
+        if data.startswith(magic):
+            return content_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+class HttpError(Exception):
+    """An error that maps directly onto an HTTP response."""
+
+    def __init__(self, status, message=None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+class ImageService:
+    """
+    Minimal HTTP/1.1 server for image operations, bound to localhost or a Unix socket.
+
+    Endpoints (POST the image bytes as the request body):
+        /strip                          -> image without metadata
+        /resize?width=W&height=H[&exact=1]  -> resized image
+        /crop?width=W&height=H          -> center-cropped image
+        /info                           -> metadata as JSON
+        GET /metrics                    -> Prometheus text metrics
+
+    CPU work runs in a process pool. At most ``workers`` jobs run at once
+    and at most ``queue_size`` more wait for a slot; beyond that requests
+    are answered with 503 before their body is read.
+    """
+
+    def __init__(self, workers=None, queue_size=64, max_body_size=MAX_BODY_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.max_body_size = max_body_size
+        self.metrics = ServiceMetrics()
+
+        self._executor = None
+        self._slots = None
+        self._admitted = 0
+        self._server = None
+
+    async def start(self, port=DEFAULT_PORT, unix_path=None, host="127.0.0.1"):
+        """Start listening on a localhost TCP port or a Unix socket."""
+        self._executor = self._new_executor()
+        self._slots = asyncio.Semaphore(self.workers)
+
+        if unix_path:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    def _new_executor(self):
+        """
+        Create the worker pool.
+
+        Workers start on demand, while client connections are open. Forked
+        workers would inherit those sockets and keep them from closing, so
+        they are started from a clean forkserver (or spawned) instead.
+        """
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    async def stop(self):
+        """Stop accepting connections and shut down the worker pool."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def run(self, port=DEFAULT_PORT, unix_path=None):
+        """Run the service until interrupted."""
+        async def main():
+            server = await self.start(port=port, unix_path=unix_path)
+            where = unix_path or f"http://127.0.0.1:{port}"
+            print(f"Listening on {where} with {self.workers} workers")
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                await self.stop()
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
+
+    async def _handle_connection(self, reader, writer):
+        """Serve requests on one connection until it closes."""
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request_head(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except (ValueError, asyncio.LimitOverrunError):
+                    # StreamReader.readline reports an overlong line as ValueError
+                    raise HttpError(400, "Request line or header too long")
+                if request is None:
+                    break
+                keep_alive = await self._handle_request(reader, writer, *request)
+        except HttpError as e:
+            await self._send(writer, e.status, str(e).encode('utf-8'), 'text/plain', False)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request_head(self, reader):
+        """Read the request line and headers; return None on a clean close."""
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode('latin-1').split()
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+
+        headers = {}
+        for _ in range(MAX_HEADER_COUNT):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HttpError(431)
+
+        return method.upper(), target, version, headers
+
+    async def _handle_request(self, reader, writer, method, target, version, headers):
+        """Handle one request; return whether the connection stays open."""
+        start = time.perf_counter()
+        url = urlsplit(target)
+        endpoint = url.path.rstrip('/') or '/'
+        keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+        bytes_in = 0
+        body_read = False
+
+        try:
+            if endpoint == '/metrics' and method == 'GET':
+                body, content_type = self.metrics.render().encode('utf-8'), 'text/plain; version=0.0.4'
+            else:
+                job = self._make_job(method, endpoint, parse_qs(url.query))
+
+                # Backpressure: refuse before reading the upload
+                if self._admitted >= self.workers + self.queue_size:
+                    raise HttpError(503, "Server busy, retry later")
+
+                self._admitted += 1
+                try:
+                    data = await self._read_body(reader, headers)
+                    body_read = True
+                    bytes_in = len(data)
+                    body = await self._run_job(job, data)
+                finally:
+                    self._admitted -= 1
+                content_type = 'application/json' if endpoint == '/info' else _guess_content_type(body)
+            status = 200
+        except HttpError as e:
+            status, body, content_type = e.status, str(e).encode('utf-8'), 'text/plain'
+            # An unread request body leaves the connection unusable
+            keep_alive = keep_alive and body_read
+
+        await self._send(writer, status, body, content_type, keep_alive,
+                         retry_after=1 if status == 503 else None)
+        # Client-chosen paths must not become label values
+        label = endpoint if endpoint in ENDPOINTS else 'other'
+        self.metrics.record_request(label, status, time.perf_counter() - start,
+                                    bytes_in, len(body))
+        return keep_alive
+
+    def _make_job(self, method, endpoint, query):
+        """Validate the route and parameters; return (func, extra_args)."""
+        if endpoint == '/metrics':
+            raise HttpError(405)
+        if endpoint not in ('/strip', '/resize', '/crop', '/info'):
+            raise HttpError(404)
+        if method != 'POST':
+            raise HttpError(405)
+
+        def int_param(name):
+            try:
+                value = int(query[name][0])
+            except (KeyError, ValueError):
+                raise HttpError(400, f"Query parameter '{name}' must be an integer")
+            if value <= 0:
+                raise HttpError(400, f"Query parameter '{name}' must be positive")
+            return value
+
+        def bool_param(name):
+            return query.get(name, ['0'])[0].lower() in ('1', 'true', 'yes')
+
+        def encode_params():
+            options = EncodeOptions(optimize=bool_param('optimize'),
+                                    progressive=bool_param('progressive'))
+            if 'quality' in query:
+                options.quality = int_param('quality')
+                if options.quality > 95:
+                    raise HttpError(400, "Query parameter 'quality' must be at most 95")
+            if 'png_level' in query:
+                try:
+                    options.png_compress_level = int(query['png_level'][0])
+                except ValueError:
+                    options.png_compress_level = -1
+                if not 0 <= options.png_compress_level <= 9:
+                    raise HttpError(400, "Query parameter 'png_level' must be 0-9")
+            if 'target_size' in query:
+                try:
+                    options.target_size = parse_size(query['target_size'][0])
+                except ValueError as e:
+                    raise HttpError(400, str(e))
+            return options.to_dict()
+
+        if endpoint == '/info':
+            return _run_info, ()
+        if endpoint == '/strip':
+            return _run_strip, (encode_params(),)
+        if endpoint == '/resize':
+            return _run_resize, (int_param('width'), int_param('height'), bool_param('exact'),
+                                 encode_params())
+        return _run_crop, (int_param('width'), int_param('height'), encode_params())
+
+    async def _read_body(self, reader, headers):
+        """Read the request body, turning a truncated or malformed one into a 400."""
+        try:
+            return await self._read_body_data(reader, headers)
+        except asyncio.IncompleteReadError:
+            raise HttpError(400, "Request body ended early")
+        except (ValueError, asyncio.LimitOverrunError):
+            raise HttpError(400, "Malformed chunked body")
+
+    async def _read_body_data(self, reader, headers):
+        """Read the request body in chunks, enforcing the size limit."""
+        body = bytearray()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size_line = await reader.readline()
+                try:
+                    size = int(size_line.split(b';')[0].strip(), 16)
+                except ValueError:
+                    raise HttpError(400, "Malformed chunk size")
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                if len(body) + size > self.max_body_size:
+                    raise HttpError(413)
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)  # CRLF after each chunk
+        else:
+            try:
+                remaining = int(headers.get('content-length', '0'))
+            except ValueError:
+                raise HttpError(400, "Invalid Content-Length")
+            if remaining > self.max_body_size:
+                raise HttpError(413)
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, READ_CHUNK_SIZE))
+                if not chunk:
+                    raise HttpError(400, "Request body ended early")
+                body += chunk
+                remaining -= len(chunk)
+
+        if not body:
+            raise HttpError(400, "Request body must contain an image")
+        return bytes(body)
+
+    async def _run_job(self, job, data):
+        """Wait for a worker slot and run the job in the process pool."""
+        func, args = job
+        loop = asyncio.get_running_loop()
+
+        self.metrics.queue_depth += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.metrics.queue_depth -= 1
+
+        self.metrics.in_flight += 1
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, func, data, *args)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed for memory); later requests get a fresh pool
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = self._new_executor()
+            raise HttpError(422, f"Could not process image: {e}")
+        except Exception as e:
+            raise HttpError(422, f"Could not process image: {e}")
+        finally:
+            self.metrics.in_flight -= 1
+            self._slots.release()
+
+    async def _send(self, writer, status, body, content_type, keep_alive, retry_after=None):
+        """Write a complete response."""
+        head = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if retry_after is not None:
+            head.append(f"Retry-After: {retry_after}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1'))
+        writer.write(body)
+        await writer.drain()
\ No newline at end of file
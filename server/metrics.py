@@ -0,0 +1,109 @@
+"""Request metrics for the HTTP service, rendered in Prometheus text format."""
+
+import threading
+
+# Upper bounds in seconds; the last bucket is +Inf
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Record one observation."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        """Render as Prometheus histogram lines."""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class ServiceMetrics:
+    """Counters, gauges and latency histograms for the image service."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}  # (endpoint, status) -> count
+        self.latency = {}  # endpoint -> Histogram
+        self.rejected = 0
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def record_request(self, endpoint, status, seconds, bytes_in=0, bytes_out=0):
+        """
+        Record a completed request.
+
+        endpoint becomes a label value, so callers should pass one of a
+        fixed set of routes rather than the raw request path.
+        """
+        with self._lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(endpoint, Histogram()).observe(seconds)
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            if status == 503:
+                self.rejected += 1
+
+    def render(self):
+        """Render all metrics in Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                "# HELP jdp_requests_total Requests handled, by endpoint and status.",
+                "# TYPE jdp_requests_total counter",
+            ]
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'jdp_requests_total{{endpoint="{_label(endpoint)}",'
+                             f'status="{_label(status)}"}} {count}')
+
+            lines += [
+                "# HELP jdp_request_seconds Request latency including queueing.",
+                "# TYPE jdp_request_seconds histogram",
+            ]
+            for endpoint, histogram in sorted(self.latency.items()):
+                lines += histogram.render("jdp_request_seconds", f'endpoint="{_label(endpoint)}"')
+
+            lines += [
+                "# HELP jdp_rejected_total Requests rejected because the queue was full.",
+                "# TYPE jdp_rejected_total counter",
+                f"jdp_rejected_total {self.rejected}",
+                "# HELP jdp_queue_depth Jobs waiting for a worker.",
+                "# TYPE jdp_queue_depth gauge",
+                f"jdp_queue_depth {self.queue_depth}",
+                "# HELP jdp_in_flight Jobs currently running in a worker.",
+                "# TYPE jdp_in_flight gauge",
+                f"jdp_in_flight {self.in_flight}",
+                "# TYPE jdp_bytes_in_total counter",
+                f"jdp_bytes_in_total {self.bytes_in}",
+                "# TYPE jdp_bytes_out_total counter",
+                f"jdp_bytes_out_total {self.bytes_out}",
+            ]
+        return "\n".join(lines) + "\n"
\ No newline at end of file
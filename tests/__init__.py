@@ -0,0 +1 @@
+# Empty file to make tests a package
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Regression tests for post-strip verification."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from core.metadata_handler import MetadataHandler
+from core.verify import Verifier
+
+
+def _progressive_jpeg_with_app1_between_scans():
+    """Return a progressive JPEG with an APP1 segment before its third scan."""
+    img = Image.new("RGB", (64, 48))
+    img.putdata([(x * 4, y * 5, (x + y) % 256) for y in range(48) for x in range(64)])
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", progressive=True, quality=90)
+    data = buf.getvalue()
+
+    sos = -1
+    for _ in range(3):
+        sos = data.index(b'\xff\xda', sos + 1)
+    app1 = b'\xff\xe1' + (2 + 6).to_bytes(2, 'big') + b'Secret'
+    return data[:sos] + app1 + data[sos:]
+
+
+class VerifyJpegTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def test_strip_between_progressive_scans_verifies(self):
+        path = os.path.join(self.tmp, "progressive.jpg")
+        with open(path, 'wb') as f:
+            f.write(_progressive_jpeg_with_app1_between_scans())
+        with Image.open(path) as img:
+            before = img.convert("RGB").tobytes()
+
+        verifier = Verifier()
+        verifier.wrap(MetadataHandler().remove_all_metadata)(path)
+
+        self.assertEqual(verifier.payload, 1)
+        self.assertEqual(verifier.failed, [])
+        with open(path, 'rb') as f:
+            self.assertNotIn(b'Secret', f.read())
+        with Image.open(path) as img:
+            self.assertEqual(img.convert("RGB").tobytes(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
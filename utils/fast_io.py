@@ -0,0 +1,300 @@
+"""Copy helpers that move unchanged bytes without passing them through Python."""
+
+import errno
+import io
+import mmap
+import os
+import shutil
+import threading
+
+# Size of the reusable buffer for the plain read/write fallback
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Ranges below this are cheaper to copy in Python than to hand to the
+# kernel (which costs a flush and two seeks)
+KERNEL_COPY_MIN = 64 * 1024
+
+# Largest request handed to the kernel in one copy_file_range/sendfile call
+KERNEL_CHUNK_SIZE = 1 << 30
+
+# Linux ioctl request number for FICLONE (copy-on-write clone)
+FICLONE = 0x40049409
+
+# Errors meaning "this kernel path does not apply here", not real I/O failures
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF,
+                    errno.ENOTSUP, errno.ESPIPE}
+
+_local = threading.local()
+
+
+def _buffer():
+    """Return this thread's reusable copy buffer."""
+    buf = getattr(_local, 'buffer', None)
+    if buf is None:
+        buf = _local.buffer = memoryview(bytearray(COPY_CHUNK_SIZE))
+    return buf
+
+
+def _fileno(f):
+    """
+    Return the OS file descriptor whose bytes are exactly what f reads or writes.
+
+    Only plain files qualify: wrappers such as GzipFile or spooled temp
+    files also have a fileno(), but their descriptor holds different bytes
+    (or asking for it changes the object's behaviour).
+    """
+    if not isinstance(f, MappedFile) and not isinstance(getattr(f, 'raw', f), io.FileIO):
+        return None
+    try:
+        return f.fileno()
+    except (OSError, ValueError):
+        return None
+
+
+def _seekable(f):
+    try:
+        return bool(f.seekable())
+    except (AttributeError, ValueError, OSError):
+        return False
+
+
+class MappedFile:
+    """
+    Read-only file object backed by a memory map.
+
+    Reads are served from the page cache without read() system calls, which
+    suits parsers that seek around (TIFF IFDs), and view() exposes ranges as
+    memoryviews so they can be written out without a copy. fileno() gives
+    the descriptor, so copy_range can still hand ranges to the kernel.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        self.name = self._file.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._map)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        if not self._file.closed:
+            self._map.close()
+            self._file.close()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._map.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._map.tell()
+        elif whence == io.SEEK_END:
+            offset += len(self._map)
+        # mmap refuses positions past the end; files allow them
+        self._map.seek(max(0, min(offset, len(self._map))))
+        return offset
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self._map.read()
+        return self._map.read(size)
+
+    def readinto(self, buffer):
+        data = self._map.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def view(self, offset, size):
+        """Return a memoryview of size bytes at offset; release it before close()."""
+        return memoryview(self._map)[offset:offset + size]
+
+
+def open_mapped(path):
+    """Open path as a MappedFile, or as a regular binary file if it cannot be mapped."""
+    try:
+        return MappedFile(path)
+    except (OSError, ValueError):
+        # Empty files, pipes and some network filesystems cannot be mapped
+        return open(path, 'rb')
+
+
+def _kernel_copy(src, dst, size):
+    """
+    Copy up to size bytes between descriptors with copy_file_range or sendfile.
+
+    Returns:
+        int: Bytes copied; fewer than size if the kernel paths gave up
+    """
+    if size < KERNEL_COPY_MIN:
+        return 0
+    src_fd, dst_fd = _fileno(src), _fileno(dst)
+    if src_fd is None or dst_fd is None:
+        return 0
+
+    dst.flush()
+    src_pos = src.tell()
+    dst_pos = dst.tell() if _seekable(dst) else None
+    copied = 0
+    methods = []
+    if hasattr(os, 'copy_file_range') and dst_pos is not None:
+        methods.append(lambda count: os.copy_file_range(src_fd, dst_fd, count, src_pos + copied))
+    if hasattr(os, 'sendfile'):
+        methods.append(lambda count: os.sendfile(dst_fd, src_fd, src_pos + copied, count))
+
+    try:
+        for method in methods:
+            while copied < size:
+                try:
+                    done = method(min(size - copied, KERNEL_CHUNK_SIZE))
+                except OSError as e:
+                    if e.errno in _FALLBACK_ERRNOS:
+                        break
+                    raise
+                if not done:
+                    break  # end of file
+                copied += done
+            if copied == size:
+                break
+    finally:
+        if copied:
+            # Both calls used explicit source offsets and advanced the
+            # destination descriptor; bring the file objects in line
+            src.seek(src_pos + copied)
+            if dst_pos is not None:
+                dst.seek(dst_pos + copied)
+    return copied
+
+
+def _view_copy(src, dst, size):
+    """Write size bytes straight from the memory behind src, if it has any."""
+    if isinstance(src, MappedFile):
+        pos = src.tell()
+        size = min(size, len(src) - pos)
+        with src.view(pos, size) as view:
+            dst.write(view)
+        src.seek(pos + size)
+        return size
+    if isinstance(src, io.BytesIO):
+        pos = src.tell()
+        with src.getbuffer() as buffer:
+            size = max(0, min(size, len(buffer) - pos))
+            with buffer[pos:pos + size] as part:
+                dst.write(part)
+        src.seek(pos + size)
+        return size
+    return None
+
+
+def _buffered_copy(src, dst, size):
+    """Copy up to size bytes (all remaining if size is None) through a reused buffer."""
+    buf = _buffer()
+    copied = 0
+    while size is None or copied < size:
+        want = COPY_CHUNK_SIZE if size is None else min(size - copied, COPY_CHUNK_SIZE)
+        if hasattr(src, 'readinto'):
+            n = src.readinto(buf[:want])
+            if not n:
+                break
+            dst.write(buf[:n])
+        else:
+            chunk = src.read(want)
+            if not chunk:
+                break
+            n = len(chunk)
+            dst.write(chunk)
+        copied += n
+    return copied
+
+
+def copy_range(src, dst, size):
+    """
+    Copy exactly size bytes from the current position of src to dst.
+
+    Between real files the kernel moves the data (copy_file_range, which
+    can share extents on filesystems that support it, then sendfile);
+    memory-backed sources are written out as views; anything else goes
+    through one reusable buffer per thread. Both streams end up positioned
+    after the copied range.
+
+    Raises:
+        EOFError: If src ends first
+    """
+    copied = _kernel_copy(src, dst, size)
+    if copied < size:
+        viewed = _view_copy(src, dst, size - copied)
+        copied += viewed if viewed is not None else _buffered_copy(src, dst, size - copied)
+    if copied < size:
+        raise EOFError("Unexpected end of image data")
+    return copied
+
+
+def copy_rest(src, dst):
+    """Copy everything from the current position of src to its end; return the byte count."""
+    fd = _fileno(src)
+    if fd is not None and _seekable(src):
+        remaining = os.fstat(fd).st_size - src.tell()
+        if remaining > 0:
+            return copy_range(src, dst, remaining)
+    viewed = _view_copy(src, dst, float('inf')) if isinstance(src, (MappedFile, io.BytesIO)) else None
+    return viewed if viewed is not None else _buffered_copy(src, dst, None)
+
+
+def reflink(src_path, dst_path):
+    """
+    Try to create dst_path as a copy-on-write clone of src_path.
+
+    Returns:
+        bool: True on success; False (with dst_path removed) where the
+              platform or filesystem has no reflinks
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(src_path, 'rb') as s, open(dst_path, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(dst_path)
+        except OSError:
+            pass
+        return False
+
+
+def clone_file(src_path, dst_path):
+    """
+    Copy a whole file as cheaply as the filesystem allows.
+
+    Tries a reflink clone (no data copied at all), then a kernel-side
+    copy, then a buffered copy.
+    """
+    if reflink(src_path, dst_path):
+        return
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        copy_rest(src, dst)
+    shutil.copymode(src_path, dst_path)
\ No newline at end of file
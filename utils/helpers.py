@@ -1,77 +1,332 @@
-"""Helper functions for the application."""
-
-import os
-from pathlib import Path
-
-
-def get_file_size_str(file_path):
-    """
-    Get human-readable file size string.
-    
-    Args:
-        file_path: Path to the file
-        
-    Returns:
-        str: Human-readable file size (e.g., "1.5 MB")
-    """
-    size = os.path.getsize(file_path)
-    
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if size < 1024.0:
-            return f"{size:.1f} {unit}"
-        size /= 1024.0
-        
-    return f"{size:.1f} TB"
-    
-
-def is_image_file(file_path):
-    """
-    Check if a file is an image based on extension.
-    
-    Args:
-        file_path: Path to the file
-        
-    Returns:
-        bool: True if file is an image
-    """
-    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', 
-                       '.tiff', '.tif', '.webp', '.ico'}
-    
-    path = Path(file_path)
-    return path.suffix.lower() in image_extensions
-    
-
-def create_thumbnail(image_path, size=(150, 150)):
-    """
-    Create a thumbnail from an image.
-    
-    Args:
-        image_path: Path to the image
-        size: Tuple of (width, height) for thumbnail
-        
-    Returns:
-        PIL.Image: Thumbnail image
-    """
-    from PIL import Image
-    
-    img = Image.open(image_path)
-    img.thumbnail(size)
-    return img
-    
-
-def safe_filename(filename):
-    """
-    Create a safe filename by removing/replacing invalid characters.
-    
-    Args:
-        filename: Original filename
-        
-    Returns:
-        str: Safe filename
-    """
-    invalid_chars = '<>:"/\\|?*'
-    
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-        
-    return filename
\ No newline at end of file
+"""Helper functions for the application."""
+
+import io
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.fast_io import clone_file, copy_rest, open_mapped
+
+
+def get_file_size_str(file_path):
+    """
+    Get human-readable file size string.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        str: Human-readable file size (e.g., "1.5 MB")
+    """
+    return format_size(os.path.getsize(file_path))
+    
+
+def format_size(size):
+    """
+    Format a byte count for display.
+    
+    Args:
+        size: Number of bytes
+        
+    Returns:
+        str: Human-readable size (e.g., "1.5 MB")
+    """
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+        
+    return f"{size:.1f} TB"
+    
+
+def format_duration(seconds):
+    """
+    Format a duration for display.
+    
+    Args:
+        seconds: Duration in seconds
+        
+    Returns:
+        str: Human-readable duration (e.g., "2m 05s")
+    """
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+    
+
+def get_cache_dir():
+    """
+    Get the per-user cache directory for the application.
+    
+    Returns:
+        Path: Cache directory (not created)
+    """
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+        
+    return Path(base) / 'just_de_pic'
+    
+
+def is_image_file(file_path):
+    """
+    Check if a file is an image based on extension.
+    
+    Args:
+        file_path: Path to the file
+        
+    Returns:
+        bool: True if file is an image
+    """
+    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', 
+                       '.tiff', '.tif', '.webp', '.ico'}
+    
+    path = Path(file_path)
+    return path.suffix.lower() in image_extensions
+    
+
+def iter_image_files(paths, recursive=True):
+    """
+    Yield image files from files and folders, lazily and in a stable order.
+    
+    Folders are walked with os.scandir one directory at a time, so memory
+    stays bounded by the largest single directory, not the whole tree.
+    
+    Args:
+        paths: Files and/or folders
+        recursive: Descend into subfolders
+        
+    Yields:
+        Path: Image file paths (files given explicitly are yielded as-is)
+    """
+    for path in map(Path, paths):
+        if not path.is_dir():
+            yield path
+            continue
+            
+        stack = [path]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    entries = sorted(entries, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(Path(entry.path))
+                    elif entry.is_file() and is_image_file(entry.name):
+                        yield Path(entry.path)
+                except OSError:
+                    continue
+            if recursive:
+                stack.extend(reversed(subdirs))
+    
+
+def create_thumbnail(image_path, size=(150, 150)):
+    """
+    Create a thumbnail from an image.
+    
+    Args:
+        image_path: Path to the image
+        size: Tuple of (width, height) for thumbnail
+        
+    Returns:
+        PIL.Image: Thumbnail image
+    """
+    from PIL import Image
+    
+    with Image.open(image_path) as img:
+        img.thumbnail(size)
+        img.load()
+    return img
+    
+
+def safe_filename(filename):
+    """
+    Create a safe filename by removing/replacing invalid characters.
+    
+    Args:
+        filename: Original filename
+        
+    Returns:
+        str: Safe filename
+    """
+    invalid_chars = '<>:"/\\|?*'
+    
+    for char in invalid_chars:
+        filename = filename.replace(char, '_')
+        
+    return filename
+    
+
+@contextmanager
+def atomic_write(file_path):
+    """
+    Open a temporary sibling of file_path for writing and move it into place on success.
+    
+    Readers never observe a half-written file, and the data is fsynced before
+    the rename, so after a crash the destination holds either the old or the
+    new contents. On error the original is left untouched. The rename itself
+    becomes durable once the parent directory is synced (see fsync_path).
+    
+    Args:
+        file_path: Destination path
+        
+    Yields:
+        file: Binary file object to write to
+    """
+    path = Path(file_path)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    
+    try:
+        with open(tmp_path, 'wb') as f:
+            yield f
+            # Make the data durable before the rename can expose it
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+        
+
+def fsync_path(path):
+    """
+    Flush a file or directory to stable storage where the platform allows it.
+    
+    Syncing a directory makes renames inside it durable. Platforms that
+    cannot open or sync directories (Windows) are silently skipped.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+        
+
+def is_path_like(source):
+    """Check whether source names a file on disk (as opposed to bytes or a stream)."""
+    return isinstance(source, (str, os.PathLike))
+    
+
+@contextmanager
+def open_input(source, seekable=False, mapped=False):
+    """
+    Open an image source for binary reading.
+    
+    Args:
+        source: File path, bytes-like object, or readable binary stream
+        seekable: Buffer non-seekable streams in memory so callers can seek
+        mapped: Memory-map file paths (see fast_io.MappedFile)
+        
+    Yields:
+        file: Readable binary stream (streams passed in are not closed)
+    """
+    if is_path_like(source):
+        with (open_mapped(source) if mapped else open(source, 'rb')) as f:
+            yield f
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        yield io.BytesIO(source)
+    elif seekable and not (hasattr(source, 'seekable') and source.seekable()):
+        yield io.BytesIO(source.read())
+    else:
+        yield source
+        
+
+class _Unchanged(Exception):
+    """Raised inside atomic_write to discard the output and keep the original file."""
+    
+
+def transform_file(source, output, func, seekable=False, mapped=False):
+    """
+    Run a stream-to-stream operation between an image source and a destination.
+    
+    When a path is rewritten in place, the source is closed before the
+    result is moved over it, which keeps the rename safe on Windows.
+    
+    Args:
+        source: File path, bytes-like object, or readable binary stream
+        output: None to overwrite a path source in place (or return bytes for
+                other sources), a path to write to, or a writable binary stream
+        func: Callable taking (src, dst) streams; returning False means the
+              result would be identical to the input. Between two paths
+              whatever func wrote is then discarded; otherwise func must
+              return False before writing anything
+        seekable: Give func a seekable source stream
+        mapped: Memory-map a path source
+        
+    Returns:
+        bytes: The result when it is returned in memory, otherwise None
+    """
+    if is_path_like(source) and (output is None or is_path_like(output)):
+        try:
+            with atomic_write(source if output is None else output) as dst:
+                with open_input(source, seekable, mapped) as src:
+                    if func(src, dst) is False:
+                        raise _Unchanged()
+        except _Unchanged:
+            # An in-place edit is simply skipped; a copy is cloned
+            if output is not None:
+                _clone_to(source, output)
+        return None
+        
+    def write(dst):
+        with open_input(source, seekable, mapped) as src:
+            start = src.tell() if seekable else 0
+            if func(src, dst) is False:
+                src.seek(start)
+                copy_stream(src, dst)
+                
+    if output is None:
+        buffer = io.BytesIO()
+        write(buffer)
+        return buffer.getvalue()
+        
+    if is_path_like(output):
+        with atomic_write(output) as dst:
+            write(dst)
+        return None
+        
+    write(output)
+    return None
+    
+
+def _clone_to(source, output):
+    """Atomically replace output with a copy of source, reflinked where possible."""
+    path = Path(output)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        clone_file(source, tmp_path)
+        fsync_path(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    
+
+def copy_stream(src, dst):
+    """Copy the rest of a binary stream to another (see fast_io.copy_rest)."""
+    copy_rest(src, dst)
\ No newline at end of file